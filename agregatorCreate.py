@@ -1,50 +1,77 @@
+import argparse
+import hashlib
+import io
+import json
+import multiprocessing
+import os
 import random
-from datetime import datetime, timedelta
+import time
+from collections import namedtuple
+from datetime import date, datetime, timedelta
 
-def generate_complete_database(filename='complete_news_database.sql', num_news=3000000):
-    """
-    Generates a complete database with a normalized structure and 3 million news records for PostgreSQL
-    """
-   
-    # Data for generation
-    categories = [
-        ('politics', 'Political news and government affairs'),
-        ('sports', 'Sports events and competitions'),
-        ('technology', 'IT and technology innovations'),
-        ('entertainment', 'Movies, music and entertainment'),
-        ('business', 'Business and economic news'),
-        ('health', 'Healthcare and medicine'),
-        ('science', 'Scientific discoveries and research')
-    ]
-   
-    sources = [
-        ('Reuters', 'https://reuters.com', 'International'),
-        ('Associated Press', 'https://apnews.com', 'USA'),
-        ('BBC News', 'https://bbc.com', 'UK'),
-        ('CNN', 'https://cnn.com', 'USA'),
-        ('Al Jazeera', 'https://aljazeera.com', 'Qatar'),
-        ('Bloomberg', 'https://bloomberg.com', 'USA'),
-        ('TechCrunch', 'https://techcrunch.com', 'USA'),
-        ('ESPN', 'https://espn.com', 'USA')
-    ]
-   
-    # Generate authors
-    authors = []
-    for i in range(1, 101):
-        authors.append((
-            f'Author_{i}',
-            f'LastName_{i}',
-            f'author{i}@news.com',
-            f'Bio for author {i} with experience in journalism'
-        ))
-   
-    with open(filename, 'w', encoding='utf-8') as f:
-        f.write("-- Complete News Database Generation (PostgreSQL)\n")
-        f.write("-- Generated on: {}\n".format(datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
-        f.write("-- Total news records: {:,}\n\n".format(num_news))
-       
-        # Create tables for PostgreSQL
-        f.write("""
+try:
+    import numpy as np
+except ImportError:  # falls back to the per-row generator
+    np = None
+
+from common.distributions import (
+    MAX_DAYS_AGO,
+    POPULARITY_DIST,
+    POPULARITY_ZIPF_S,
+    RECENCY_HALF_LIFE_DAYS,
+    DataProfile,
+)
+from common.postgres import connect   # --mode copy (docker-compose publishes 5432 on localhost)
+
+# Data for generation
+CATEGORIES = [
+    ('politics', 'Political news and government affairs'),
+    ('sports', 'Sports events and competitions'),
+    ('technology', 'IT and technology innovations'),
+    ('entertainment', 'Movies, music and entertainment'),
+    ('business', 'Business and economic news'),
+    ('health', 'Healthcare and medicine'),
+    ('science', 'Scientific discoveries and research')
+]
+
+SOURCES = [
+    ('Reuters', 'https://reuters.com', 'International'),
+    ('Associated Press', 'https://apnews.com', 'USA'),
+    ('BBC News', 'https://bbc.com', 'UK'),
+    ('CNN', 'https://cnn.com', 'USA'),
+    ('Al Jazeera', 'https://aljazeera.com', 'Qatar'),
+    ('Bloomberg', 'https://bloomberg.com', 'USA'),
+    ('TechCrunch', 'https://techcrunch.com', 'USA'),
+    ('ESPN', 'https://espn.com', 'USA')
+]
+
+AUTHORS = [
+    (f'Author_{i}', f'LastName_{i}', f'author{i}@news.com', f'Bio for author {i} with experience in journalism')
+    for i in range(1, 101)
+]
+
+BASE_TITLES = [
+    "Breaking News", "Latest Update", "Exclusive Report", "Special Coverage",
+    "Market Analysis", "Sports Roundup", "Tech Review", "Political Briefing",
+    "In-Depth Investigation", "Weekly Summary", "Expert Opinion", "Live Report"
+]
+
+BASE_CONTENTS = [
+    "Significant developments have occurred in this area with far-reaching implications.",
+    "Experts are analyzing the latest trends and data to provide comprehensive insights.",
+    "This event has drawn international attention from various stakeholders.",
+    "New research reveals important findings that could change current understanding.",
+    "Market participants are closely watching the situation for potential opportunities."
+]
+
+# id is generated explicitly (= record number), so sharded loads stay deterministic
+NEWS_COLUMNS = (
+    "id", "title", "content", "category_id", "source_id", "author_id",
+    "publish_date", "url", "views_count", "likes_count",
+)
+
+# ─── DDL ──────────────────────────────────────────────────────────────────────
+REFERENCE_TABLES_DDL = """
 -- Create categories table
 CREATE TABLE IF NOT EXISTS categories (
     id SERIAL PRIMARY KEY,
@@ -69,6 +96,9 @@ CREATE TABLE IF NOT EXISTS authors (
     bio TEXT,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
+"""
+
+NEWS_TABLE_DDL = """
 -- Create news table (main table with 3 million records)
 CREATE TABLE IF NOT EXISTS news (
     id BIGSERIAL PRIMARY KEY,
@@ -89,103 +119,76 @@ CREATE TABLE IF NOT EXISTS news (
     FOREIGN KEY (source_id) REFERENCES sources(id),
     FOREIGN KEY (author_id) REFERENCES authors(id)
 );
+"""
+
+# Same table without PK/UNIQUE/FK: COPY does not maintain any index, the
+# constraints are added afterwards (same default names news_pkey, news_url_key, ...)
+NEWS_TABLE_BARE_DDL = """
+CREATE TABLE news (
+    id BIGSERIAL,
+    title VARCHAR(255) NOT NULL,
+    content TEXT NOT NULL,
+    category_id INT,
+    source_id INT,
+    author_id INT,
+    publish_date TIMESTAMP NOT NULL,
+    url VARCHAR(500),
+    views_count INT DEFAULT 0,
+    likes_count INT DEFAULT 0,
+    shares_count INT DEFAULT 0,
+    is_active BOOLEAN DEFAULT TRUE,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+NEWS_CONSTRAINTS_DDL = """
+ALTER TABLE news ADD PRIMARY KEY (id);
+ALTER TABLE news ADD UNIQUE (url);
+ALTER TABLE news ADD FOREIGN KEY (category_id) REFERENCES categories(id);
+ALTER TABLE news ADD FOREIGN KEY (source_id) REFERENCES sources(id);
+ALTER TABLE news ADD FOREIGN KEY (author_id) REFERENCES authors(id);
+"""
+
+NEWS_PARTITIONED_DDL = """
+CREATE TABLE news_partitioned (
+    id BIGSERIAL,
+    title VARCHAR(255) NOT NULL,
+    content TEXT NOT NULL,
+    category_id INT,
+    source_id INT,
+    author_id INT,
+    publish_date TIMESTAMP NOT NULL,
+    url VARCHAR(500),
+    views_count INT DEFAULT 0,
+    likes_count INT DEFAULT 0,
+    shares_count INT DEFAULT 0,
+    is_active BOOLEAN DEFAULT TRUE,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+) PARTITION BY RANGE (publish_date);
+"""
+
+# The partition key has to be part of the primary key
+NEWS_PARTITIONED_CONSTRAINTS_DDL = """
+ALTER TABLE news_partitioned ADD PRIMARY KEY (id, publish_date);
+"""
+
+NEWS_PARTITIONED_INDEXES_DDL = """
+CREATE INDEX IF NOT EXISTS idx_news_part_publish_date ON news_partitioned(publish_date);
+CREATE INDEX IF NOT EXISTS idx_news_part_category ON news_partitioned(category_id);
+CREATE INDEX IF NOT EXISTS idx_news_part_views ON news_partitioned(views_count);
+"""
+
+INDEXES_DDL = """
 -- Create indexes for performance
 CREATE INDEX IF NOT EXISTS idx_news_publish_date ON news(publish_date);
 CREATE INDEX IF NOT EXISTS idx_news_category ON news(category_id);
 CREATE INDEX IF NOT EXISTS idx_news_views ON news(views_count);
 CREATE INDEX IF NOT EXISTS idx_news_active ON news(is_active) WHERE is_active = TRUE;
-\n""")
-       
-        # Populate reference tables
-        print("Generating reference tables...")
-       
-        # Categories
-        f.write("-- Insert categories\n")
-        f.write("INSERT INTO categories (name, description) VALUES\n")
-        category_values = []
-        for i, (name, desc) in enumerate(categories, 1):
-            category_values.append(f"('{name}', '{desc}')")
-        f.write(",\n".join(category_values))
-        f.write(";\n\n")
-       
-        # Sources
-        f.write("-- Insert sources\n")
-        f.write("INSERT INTO sources (name, website_url, country) VALUES\n")
-        source_values = []
-        for i, (name, url, country) in enumerate(sources, 1):
-            source_values.append(f"('{name}', '{url}', '{country}')")
-        f.write(",\n".join(source_values))
-        f.write(";\n\n")
-       
-        # Authors
-        f.write("-- Insert authors\n")
-        f.write("INSERT INTO authors (first_name, last_name, email, bio) VALUES\n")
-        author_values = []
-        for i, (first_name, last_name, email, bio) in enumerate(authors, 1):
-            author_values.append(f"('{first_name}', '{last_name}', '{email}', '{bio}')")
-        f.write(",\n".join(author_values))
-        f.write(";\n\n")
-       
-        # Generate 3 million news records
-        print("Generating 3 million news records...")
-       
-        base_titles = [
-            "Breaking News", "Latest Update", "Exclusive Report", "Special Coverage",
-            "Market Analysis", "Sports Roundup", "Tech Review", "Political Briefing",
-            "In-Depth Investigation", "Weekly Summary", "Expert Opinion", "Live Report"
-        ]
-       
-        base_contents = [
-            "Significant developments have occurred in this area with far-reaching implications.",
-            "Experts are analyzing the latest trends and data to provide comprehensive insights.",
-            "This event has drawn international attention from various stakeholders.",
-            "New research reveals important findings that could change current understanding.",
-            "Market participants are closely watching the situation for potential opportunities."
-        ]
-       
-        batch_size = 10000
-        batches = num_news // batch_size
-       
-        for batch in range(batches):
-            f.write(f"-- Batch {batch + 1}/{batches}\n")
-            f.write("INSERT INTO news (title, content, category_id, source_id, author_id, publish_date, url, views_count, likes_count) VALUES\n")
-           
-            batch_values = []
-            for i in range(batch_size):
-                record_num = batch * batch_size + i + 1
-               
-                # Random data
-                category_id = random.randint(1, len(categories))
-                source_id = random.randint(1, len(sources))
-                author_id = random.randint(1, len(authors))
-               
-                title_type = random.choice(base_titles)
-                title = f"{title_type} #{record_num} - {categories[category_id-1][0].capitalize()}"
-               
-                content = f"{random.choice(base_contents)} This is detailed content for news record {record_num}. " + \
-                         f"The article discusses important aspects of {categories[category_id-1][0]} and provides " + \
-                         f"comprehensive analysis based on recent developments."
-               
-                # Random date within the last 3 years
-                days_ago = random.randint(0, 1095) # 3 years
-                hours_ago = random.randint(0, 23)
-                publish_date = datetime.now() - timedelta(days=days_ago, hours=hours_ago)
-               
-                url = f"https://newsportal.com/{categories[category_id-1][0]}/{record_num}"
-                views_count = random.randint(0, 50000)
-                likes_count = random.randint(0, 1000)
-               
-                values = f"('{title}', '{content}', {category_id}, {source_id}, {author_id}, '{publish_date.strftime('%Y-%m-%d %H:%M:%S')}', '{url}', {views_count}, {likes_count})"
-                batch_values.append(values)
-           
-            f.write(",\n".join(batch_values))
-            f.write(";\n\n")
-           
-            if (batch + 1) % 10 == 0:
-                print(f"Progress: {((batch + 1) * batch_size):,} news records generated")
-       
-        # Trigger for updating updated_at
-        f.write("""
+"""
+
+TRIGGER_DDL = """
 -- Create function for updating updated_at
 CREATE OR REPLACE FUNCTION update_updated_at_column()
 RETURNS TRIGGER AS $$
@@ -195,32 +198,753 @@ BEGIN
 END;
 $$ language 'plpgsql';
 -- Create trigger for news table
-CREATE TRIGGER update_news_updated_at BEFORE UPDATE ON news
+CREATE OR REPLACE TRIGGER update_news_updated_at BEFORE UPDATE ON news
 FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
-\n""")
-       
-        # Analyze tables for optimization
-        f.write("""
+"""
+
+ANALYZE_SQL = """
 -- Analyze tables for query optimization
 ANALYZE categories;
 ANALYZE sources;
 ANALYZE authors;
 ANALYZE news;
-""")
-       
-        print(f"\nGeneration complete! File saved as: {filename}")
+"""
+
+
+# ─── Row generation (shared by the SQL file and COPY modes) ──────────────────
+# Rows are generated column-wise per batch. publish_date is relative to today's
+# midnight, so with the same --seed a run on the same day is fully reproducible.
+# Skew (Zipf popularity, recent publish dates, category/source weights) comes
+# from a DataProfile shared with the producer, see common/distributions.py.
+NewsBatch = namedtuple("NewsBatch", [
+    "record_num", "category_id", "source_id", "author_id",
+    "title_type", "content_type", "publish_date", "views_count", "likes_count",
+])
+
+# Lookup tables indexed by category_id (1-based)
+CATEGORY_NAMES  = [None] + [name for name, _ in CATEGORIES]
+CATEGORY_TITLES = [None] + [name.capitalize() for name, _ in CATEGORIES]
+
+UNIFORM_PROFILE = DataProfile(popularity="uniform", recency_half_life_days=0)
+
+
+def make_profile(catalog_size, **overrides):
+    return DataProfile.from_env(
+        CATEGORY_NAMES[1:], [name for name, _, _ in SOURCES], catalog_size=catalog_size, **overrides
+    )
+
+
+def _reference_time():
+    return datetime.combine(date.today(), datetime.min.time())
+
+
+def make_rng(seed, vectorized, state=None):
+    """random.Random or NumPy Generator, optionally restored from rng_state()."""
+    if vectorized:
+        rng = np.random.default_rng(seed)
+        if state is not None:
+            rng.bit_generator.state = state
+        return rng
+    rng = random.Random(seed)
+    if state is not None:
+        version, internal, gauss = state
+        rng.setstate((version, tuple(internal), gauss))
+    return rng
+
+
+def rng_state(rng):
+    """JSON-serializable RNG state (for the checkpoint manifest)."""
+    if isinstance(rng, random.Random):
+        version, internal, gauss = rng.getstate()
+        return [version, list(internal), gauss]
+    return rng.bit_generator.state
+
+
+def python_news_batches(num_news, batch_size, rnd, start_id, profile, now):
+    """Per-row random/strftime path (no NumPy)."""
+    popularity, recency = profile.popularity, profile.recency
+    end = start_id + num_news
+    for first in range(start_id, end, batch_size):
+        count = min(batch_size, end - first)
+        batch = NewsBatch(range(first, first + count), [], [], [], [], [], [], [], [])
+        if profile.categories:
+            batch.category_id.extend(profile.categories.sample(rnd, count))
+        else:
+            batch.category_id.extend(rnd.randint(1, len(CATEGORIES)) for _ in range(count))
+        if profile.sources:
+            batch.source_id.extend(profile.sources.sample(rnd, count))
+        else:
+            batch.source_id.extend(rnd.randint(1, len(SOURCES)) for _ in range(count))
+        for record_num in batch.record_num:
+            batch.author_id.append(rnd.randint(1, len(AUTHORS)))
+            batch.title_type.append(rnd.randrange(len(BASE_TITLES)))
+            batch.content_type.append(rnd.randrange(len(BASE_CONTENTS)))
+            if recency.uniform:
+                age = timedelta(days=rnd.randint(0, MAX_DAYS_AGO), hours=rnd.randint(0, 23))
+            else:
+                age = timedelta(seconds=int(recency.days_ago(rnd.random()) * 86400))
+            batch.publish_date.append((now - age).strftime('%Y-%m-%d %H:%M:%S'))
+            if popularity:
+                views = int(profile.max_views * popularity.weight(popularity.rank_of(record_num))
+                            * rnd.uniform(0.5, 1.5))
+                batch.views_count.append(views)
+                batch.likes_count.append(int(views * rnd.uniform(0, 0.04)))
+            else:
+                batch.views_count.append(rnd.randint(0, 50000))
+                batch.likes_count.append(rnd.randint(0, 1000))
+        yield batch
+
+
+def numpy_news_batches(num_news, batch_size, rng, start_id, profile, now):
+    """Vectorized path: every column of a batch is one NumPy call, dates are formatted in bulk."""
+    now = np.datetime64(now, "s")
+    popularity, recency = profile.popularity, profile.recency
+    end = start_id + num_news
+    for first in range(start_id, end, batch_size):
+        count = min(batch_size, end - first)
+        if profile.categories:
+            category_id = profile.categories.sample_array(rng, count)
+        else:
+            category_id = rng.integers(1, len(CATEGORIES) + 1, count)
+        if profile.sources:
+            source_id = profile.sources.sample_array(rng, count)
+        else:
+            source_id = rng.integers(1, len(SOURCES) + 1, count)
+
+        if recency.uniform:
+            seconds_ago = (
+                rng.integers(0, MAX_DAYS_AGO + 1, count) * 86400
+                + rng.integers(0, 24, count) * 3600
+            )
+        else:
+            seconds_ago = (recency.days_ago_array(rng.random(count)) * 86400).astype(np.int64)
+        publish_date = np.datetime_as_string(now - seconds_ago.astype("timedelta64[s]"), unit="s")
+
+        if popularity:
+            ranks = popularity.rank_of(np.arange(first, first + count, dtype=np.int64))
+            views = (profile.max_views * popularity.weight(ranks.astype(np.float64))
+                     * rng.uniform(0.5, 1.5, count)).astype(np.int64)
+            likes = (views * rng.uniform(0, 0.04, count)).astype(np.int64)
+        else:
+            views = rng.integers(0, 50001, count)
+            likes = rng.integers(0, 1001, count)
+
+        yield NewsBatch(
+            range(first, first + count),
+            category_id.tolist(),
+            source_id.tolist(),
+            rng.integers(1, len(AUTHORS) + 1, count).tolist(),
+            rng.integers(0, len(BASE_TITLES), count).tolist(),
+            rng.integers(0, len(BASE_CONTENTS), count).tolist(),
+            # ISO 'YYYY-MM-DDTHH:MM:SS' — PostgreSQL accepts the T separator
+            publish_date.tolist(),
+            views.tolist(),
+            likes.tolist(),
+        )
+
+
+def resolve_vectorized(vectorized):
+    """None — NumPy if it is installed."""
+    if vectorized is None:
+        return np is not None
+    if vectorized and np is None:
+        raise SystemExit("vectorized generation requires numpy (pip install numpy)")
+    return vectorized
+
+
+def generate_news_batches(num_news, batch_size=10000, seed=None, start_id=1, vectorized=None,
+                          profile=UNIFORM_PROFILE, rng=None, now=None):
+    """
+    NewsBatch per batch_size records. Batches are produced lazily from rng, so
+    right after a batch is received rng_state(rng) is the state to resume from.
+    """
+    vectorized = resolve_vectorized(vectorized)
+    if rng is None:
+        rng = make_rng(seed, vectorized)
+    generate = numpy_news_batches if vectorized else python_news_batches
+    return generate(num_news, batch_size, rng, start_id, profile, now or _reference_time())
+
+
+def batch_to_sql_values(batch):
+    """VALUES list for INSERT INTO news (NEWS_COLUMNS)."""
+    return ",\n".join([
+        f"({n}, '{BASE_TITLES[t]} #{n} - {CATEGORY_TITLES[c]}', "
+        f"'{BASE_CONTENTS[k]} This is detailed content for news record {n}. "
+        f"The article discusses important aspects of {CATEGORY_NAMES[c]} and provides "
+        f"comprehensive analysis based on recent developments.', "
+        f"{c}, {s}, {a}, '{d}', 'https://newsportal.com/{CATEGORY_NAMES[c]}/{n}', {v}, {l})"
+        for n, c, s, a, t, k, d, v, l in zip(*batch)
+    ])
+
+
+def batch_csv_lines(batch):
+    """CSV lines for COPY news (NEWS_COLUMNS). Generated text never contains quotes or newlines."""
+    return [
+        f'{n},"{BASE_TITLES[t]} #{n} - {CATEGORY_TITLES[c]}",'
+        f'"{BASE_CONTENTS[k]} This is detailed content for news record {n}. '
+        f'The article discusses important aspects of {CATEGORY_NAMES[c]} and provides '
+        f'comprehensive analysis based on recent developments.",'
+        f'{c},{s},{a},{d},https://newsportal.com/{CATEGORY_NAMES[c]}/{n},{v},{l}\n'
+        for n, c, s, a, t, k, d, v, l in zip(*batch)
+    ]
+
+
+def batch_to_csv(batch):
+    return "".join(batch_csv_lines(batch)).encode()
+
+
+# ─── Sharding (--workers) ─────────────────────────────────────────────────────
+def shard_ranges(num_news, workers, start_id=1):
+    """Contiguous record-number ranges [(shard, first_id, count)], one per worker."""
+    base, extra = divmod(num_news, workers)
+    shards, first = [], start_id
+    for shard in range(workers):
+        count = base + (shard < extra)
+        if count:
+            shards.append((shard, first, count))
+        first += count
+    return shards
+
+
+def shard_seed(seed, shard):
+    """
+    Independent deterministic seed per shard: the same --seed and --workers
+    always give the same rows, whichever process finishes first.
+    """
+    if seed is None:
+        return None
+    digest = hashlib.blake2b(f"{seed}:{shard}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+
+def run_shards(worker, tasks, workers, total):
+    """Runs worker(task) in a process pool, prints per-shard and overall rows/s."""
+    started = time.monotonic()
+    done = 0
+    with multiprocessing.Pool(workers) as pool:
+        for shard, count, elapsed in pool.imap_unordered(worker, tasks):
+            done += count
+            print(f"Shard {shard}: {count:,} records in {elapsed:.1f}s ({count / elapsed:,.0f} rows/s); "
+                  f"total {done:,}/{total:,} ({done / (time.monotonic() - started):,.0f} rows/s)")
+
+
+# ─── SQL file mode ────────────────────────────────────────────────────────────
+def write_reference_data(f):
+    # Categories
+    f.write("-- Insert categories\n")
+    f.write("INSERT INTO categories (name, description) VALUES\n")
+    f.write(",\n".join(f"('{name}', '{desc}')" for name, desc in CATEGORIES))
+    f.write(";\n\n")
+
+    # Sources
+    f.write("-- Insert sources\n")
+    f.write("INSERT INTO sources (name, website_url, country) VALUES\n")
+    f.write(",\n".join(f"('{name}', '{url}', '{country}')" for name, url, country in SOURCES))
+    f.write(";\n\n")
+
+    # Authors
+    f.write("-- Insert authors\n")
+    f.write("INSERT INTO authors (first_name, last_name, email, bio) VALUES\n")
+    f.write(",\n".join(
+        f"('{first_name}', '{last_name}', '{email}', '{bio}')"
+        for first_name, last_name, email, bio in AUTHORS
+    ))
+    f.write(";\n\n")
+
+
+class Checkpoint:
+    """
+    Manifest <file>.checkpoint.json for a SQL file being generated: run
+    parameters, progress (next record, batch number, byte offset of the file)
+    and the RNG state at that point, saved every EVERY_BATCHES batches.
+
+    --resume truncates the file back to byte_offset and continues from the
+    restored RNG state and reference time, so the file ends up byte-identical
+    to one from an uninterrupted run.
+    """
+
+    EVERY_BATCHES = 10
+
+    def __init__(self, filename, params):
+        self.filename = filename
+        self.path = f"{filename}.checkpoint.json"
+        self.params = params
+        self.last = None
+
+    def load(self):
+        """Saved progress of the same run, or None if there is nothing to resume."""
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            return None
+        if manifest["params"] != self.params:
+            raise SystemExit(
+                f"{self.path} belongs to a run with different parameters:\n"
+                f"  saved:   {manifest['params']}\n  current: {self.params}\n"
+                f"Repeat the original arguments or drop --resume to start over."
+            )
+        if not os.path.exists(self.filename) or os.path.getsize(self.filename) < manifest["byte_offset"]:
+            raise SystemExit(f"{self.filename} is shorter than its checkpoint, cannot resume")
+        return manifest
+
+    def open(self, resume):
+        """(file, manifest): the file positioned at the checkpoint, or a new one."""
+        manifest = self.load() if resume else None
+        if manifest is None:
+            return open(self.filename, 'w', encoding='utf-8', buffering=1 << 22), None
+        if not manifest["done"]:
+            os.truncate(self.filename, manifest["byte_offset"])
+            print(f"Resuming {self.filename} from record {manifest['next_record']:,} "
+                  f"(batch {manifest['batch']})")
+        return open(self.filename, 'a', encoding='utf-8', buffering=1 << 22), manifest
+
+    def save(self, f, next_record, batch, rng, reference, done=False):
+        self.last = (next_record, batch, rng, reference)
+        f.flush()
+        os.fsync(f.fileno())
+        manifest = {
+            "params": self.params,
+            "next_record": next_record,
+            "batch": batch,
+            "byte_offset": f.tell(),
+            "reference_time": reference.isoformat(),
+            "rng_state": rng_state(rng),
+            "done": done,
+        }
+        tmp = f"{self.path}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as out:
+            json.dump(manifest, out)
+        os.replace(tmp, self.path)
+
+    def finish(self, f):
+        """Marks the file complete; --resume then leaves it alone."""
+        self.save(f, *self.last, done=True)
+
+    def remove(self):
+        """Drops the manifest once the whole run has succeeded."""
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def checkpoint_params(num_news, first, seed, vectorized, profile, **extra):
+    return {
+        "rows": num_news,
+        "first_id": first,
+        "seed": seed,
+        "generator": "numpy" if vectorized else "python",
+        "profile": profile.describe(),
+        "category_weights": profile.categories.weights if profile.categories else None,
+        "source_weights": profile.sources.weights if profile.sources else None,
+        **extra,
+    }
+
+
+def write_news_inserts(f, num_news, first, seed, vectorized, profile,
+                       checkpoint=None, manifest=None, label="", report=True):
+    """
+    INSERT batches for records first..first+num_news-1. With a checkpoint the
+    progress is saved periodically; with a manifest generation continues
+    from where it stopped.
+    """
+    batch_size = 10000
+    count = -(-num_news // batch_size)
+    end = first + num_news
+    if manifest:
+        start = manifest["next_record"]
+        reference = datetime.fromisoformat(manifest["reference_time"])
+        rng = make_rng(None, vectorized, manifest["rng_state"])
+        first_batch = manifest["batch"] + 1
+    else:
+        start, reference, rng, first_batch = first, _reference_time(), make_rng(seed, vectorized), 1
+
+    batches = generate_news_batches(end - start, batch_size, start_id=start, vectorized=vectorized,
+                                    profile=profile, rng=rng, now=reference)
+    started = time.monotonic()
+    done = 0
+    number = first_batch - 1
+    for number, batch in enumerate(batches, first_batch):
+        f.write(f"-- Batch {label}{number}/{count}\n")
+        f.write(f"INSERT INTO news ({', '.join(NEWS_COLUMNS)}) VALUES\n")
+        f.write(batch_to_sql_values(batch))
+        f.write(";\n\n")
+        done += len(batch.record_num)
+
+        if checkpoint and number % Checkpoint.EVERY_BATCHES == 0:
+            checkpoint.save(f, batch.record_num[-1] + 1, number, rng, reference)
+        if report and number % 10 == 0:
+            print(f"Progress: {batch.record_num[-1] - first + 1:,}/{num_news:,} news records generated "
+                  f"({done / (time.monotonic() - started):,.0f} rows/s)")
+    if checkpoint:
+        checkpoint.save(f, end, number, rng, reference)
+
+
+def write_sql_finish(f, table="news"):
+    # id is explicit in the generated rows — move the BIGSERIAL sequence past it
+    f.write(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT MAX(id) FROM {table}));\n")
+
+    # Trigger for updating updated_at
+    f.write(TRIGGER_DDL + "\n")
+
+    # Analyze tables for optimization
+    f.write(ANALYZE_SQL)
+
+
+def generate_complete_database(filename='complete_news_database.sql', num_news=3000000,
+                               seed=None, vectorized=None, profile=UNIFORM_PROFILE, resume=False):
+    """
+    Generates a complete database with a normalized structure and 3 million news records for PostgreSQL
+    """
+    vectorized = resolve_vectorized(vectorized)
+    checkpoint = Checkpoint(filename, checkpoint_params(num_news, 1, seed, vectorized, profile))
+    f, manifest = checkpoint.open(resume)
+    with f:
+        if manifest and manifest["done"]:
+            print(f"{filename} is already complete")
+            return
+
+        if manifest is None:
+            f.write("-- Complete News Database Generation (PostgreSQL)\n")
+            f.write("-- Generated on: {}\n".format(datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+            f.write("-- Total news records: {:,}\n\n".format(num_news))
+
+            # Create tables for PostgreSQL
+            f.write(REFERENCE_TABLES_DDL + NEWS_TABLE_DDL + INDEXES_DDL + "\n")
+
+            # Populate reference tables
+            print("Generating reference tables...")
+            write_reference_data(f)
+
+        # Generate 3 million news records
+        print(f"Generating {num_news:,} news records...")
+        write_news_inserts(f, num_news, 1, seed, vectorized, profile, checkpoint, manifest)
+
+        write_sql_finish(f)
+        checkpoint.finish(f)
+
+    checkpoint.remove()
+    print(f"\nGeneration complete! File saved as: {filename}")
+
+
+def _write_sql_shard(task):
+    filename, shard, first, count, seed, vectorized, profile, resume = task
+    started = time.monotonic()
+    checkpoint = Checkpoint(filename, checkpoint_params(count, first, seed, vectorized, profile, shard=shard))
+    f, manifest = checkpoint.open(resume)
+    with f:
+        if manifest and manifest["done"]:
+            return shard, 0, time.monotonic() - started
+        if manifest is None:
+            f.write(f"-- News records {first:,}..{first + count - 1:,} (shard {shard})\n\n")
+        write_news_inserts(f, count, first, shard_seed(seed, shard), vectorized, profile,
+                           checkpoint, manifest, label=f"{shard}.", report=False)
+        checkpoint.finish(f)
+    generated = first + count - (manifest["next_record"] if manifest else first)
+    return shard, generated, time.monotonic() - started
+
+
+def generate_sharded_database(filename, num_news, workers, seed=None, vectorized=None,
+                              profile=UNIFORM_PROFILE, resume=False):
+    """
+    --workers N for the SQL mode: <stem>_schema.sql (tables + reference data),
+    <stem>_partNN.sql written in parallel (one per shard, can be replayed in
+    parallel too) and <stem>_finish.sql (indexes, trigger, ANALYZE).
+    Every part has its own checkpoint; --resume skips finished parts. The
+    checkpoints are removed once all parts are done.
+    """
+    vectorized = resolve_vectorized(vectorized)
+    stem = os.path.splitext(filename)[0]
+    schema, finish = f"{stem}_schema.sql", f"{stem}_finish.sql"
+    parts = []
+
+    with open(schema, 'w', encoding='utf-8') as f:
+        f.write("-- Complete News Database Generation (PostgreSQL), schema and reference data\n")
+        f.write(REFERENCE_TABLES_DDL + NEWS_TABLE_DDL + "\n")
+        write_reference_data(f)
+
+    tasks = []
+    for shard, first, count in shard_ranges(num_news, workers):
+        parts.append(f"{stem}_part{shard:02d}.sql")
+        tasks.append((parts[-1], shard, first, count, seed, vectorized, profile, resume))
+    print(f"Generating {num_news:,} news records in {len(tasks)} shards...")
+    run_shards(_write_sql_shard, tasks, workers, num_news)
+    for part in parts:
+        Checkpoint(part, None).remove()
+
+    with open(finish, 'w', encoding='utf-8') as f:
+        f.write(INDEXES_DDL + "\n")
+        write_sql_finish(f)
+
+    print(f"\nGeneration complete! Files: {schema}, {stem}_part*.sql ({len(parts)}), {finish}")
+    return schema, parts, finish
+
+
+# ─── COPY loader ──────────────────────────────────────────────────────────────
+class CopyStream:
+    """
+    File-like object for cursor.copy_expert(): renders one batch as CSV at a
+    time, so memory stays bounded by a single batch. Prints rows/s progress.
+    """
+
+    def __init__(self, batches, total, report_every=100_000):
+        self.batches = batches
+        self.total = total
+        self.report_every = report_every
+        self.buffer = b""
+        self.pos = 0
+        self.count = 0
+        self.next_report = report_every
+        self.started = time.monotonic()
+
+    def read(self, size=-1):
+        while size < 0 or len(self.buffer) - self.pos < size:
+            batch = next(self.batches, None)
+            if batch is None:
+                break
+            self.buffer = self.buffer[self.pos:] + batch_to_csv(batch)
+            self.pos = 0
+            self.count += len(batch.record_num)
+            if self.count >= self.next_report:
+                self.report()
+                self.next_report += self.report_every
+        if size < 0:
+            size = len(self.buffer) - self.pos
+        data = self.buffer[self.pos:self.pos + size]
+        self.pos += len(data)
+        return data
+
+    def report(self):
+        elapsed = time.monotonic() - self.started
+        print(f"Progress: {self.count:,}/{self.total:,} news records "
+              f"({self.count / elapsed:,.0f} rows/s)")
+
+
+def partition_name(month):
+    """'2025-03' -> news_2025_03 (naming used by partitioning.sql)."""
+    return f"news_{month.replace('-', '_')}"
+
+
+def generated_months():
+    """Every 'YYYY-MM' a generated publish_date can fall into."""
+    last = _reference_time()
+    current = (last - timedelta(days=MAX_DAYS_AGO, hours=23)).replace(day=1)
+    months = []
+    while current <= last:
+        months.append(current.strftime("%Y-%m"))
+        current = (current + timedelta(days=32)).replace(day=1)
+    return months
+
+
+def create_monthly_partitions(cur):
+    for month in generated_months():
+        start = datetime.strptime(month, "%Y-%m")
+        end = (start + timedelta(days=32)).replace(day=1)
+        cur.execute(
+            f"CREATE TABLE IF NOT EXISTS {partition_name(month)} PARTITION OF news_partitioned "
+            f"FOR VALUES FROM ('{start:%Y-%m-%d}') TO ('{end:%Y-%m-%d}')"
+        )
+
+
+def _copy_shard(task):
+    """One worker: own connection, own transaction, COPY of one shard."""
+    shard, first, count, seed, vectorized, profile, partitioned = task
+    started = time.monotonic()
+    columns = ", ".join(NEWS_COLUMNS)
+    conn = connect()
+    try:
+        with conn, conn.cursor() as cur:
+            batches = generate_news_batches(count, 50_000, shard_seed(seed, shard), first, vectorized, profile)
+            if not partitioned:
+                cur.copy_expert(f"COPY news ({columns}) FROM STDIN WITH (FORMAT csv)",
+                                CopyStream(batches, count, report_every=count + 1), size=1 << 20)
+            else:
+                # Straight into the month's partition: no tuple routing in the parent
+                for batch in batches:
+                    months = {}
+                    for line, publish_date in zip(batch_csv_lines(batch), batch.publish_date):
+                        months.setdefault(publish_date[:7], []).append(line)
+                    for month, lines in months.items():
+                        cur.copy_expert(
+                            f"COPY {partition_name(month)} ({columns}) FROM STDIN WITH (FORMAT csv)",
+                            io.BytesIO("".join(lines).encode()),
+                            size=1 << 20,
+                        )
+    finally:
+        conn.close()
+    return shard, count, time.monotonic() - started
+
+
+def load_with_copy(num_news=3000000, seed=None, vectorized=None, workers=1, partitioned=False,
+                   profile=UNIFORM_PROFILE):
+    """
+    Streams generated rows into PostgreSQL with COPY FROM STDIN (CSV), no SQL file.
+
+    A fresh news table is created without constraints; PK/UNIQUE/FK, indexes
+    and the update_news_updated_at trigger are built once, after the load.
+    If news already exists, rows are appended after its MAX(id); with --seed
+    the appended rows get their own seed derived from the first new id, so
+    repeated appends do not copy earlier rows. The Zipf catalog then spans
+    the whole table (ids 1..MAX(id) + num_news), not just the appended rows.
+
+    workers > 1: the record range is split into shards, each loaded by its own
+    process and connection. With one worker the table is created in the same
+    transaction as COPY ... FREEZE instead.
+    partitioned: loads news_partitioned (monthly RANGE partitions on
+    publish_date), each row straight into its month's partition.
+    """
+    table = "news_partitioned" if partitioned else "news"
+    conn = connect()
+    started = time.monotonic()
+    try:
+        with conn, conn.cursor() as cur:
+            cur.execute(REFERENCE_TABLES_DDL)
+            cur.execute("SELECT count(*) FROM categories")
+            if cur.fetchone()[0] == 0:
+                print("Loading reference tables...")
+                cur.executemany("INSERT INTO categories (name, description) VALUES (%s, %s)", CATEGORIES)
+                cur.executemany("INSERT INTO sources (name, website_url, country) VALUES (%s, %s, %s)", SOURCES)
+                cur.executemany(
+                    "INSERT INTO authors (first_name, last_name, email, bio) VALUES (%s, %s, %s, %s)", AUTHORS
+                )
+
+        with conn, conn.cursor() as cur:
+            cur.execute("SELECT to_regclass(%s) IS NULL", (table,))
+            fresh = cur.fetchone()[0]
+            if partitioned:
+                if fresh:
+                    cur.execute(NEWS_PARTITIONED_DDL)
+                create_monthly_partitions(cur)
+            elif fresh:
+                cur.execute(NEWS_TABLE_BARE_DDL)
+
+            start_id = 1
+            if not fresh:
+                cur.execute(f"SELECT COALESCE(MAX(id), 0) + 1 FROM {table}")
+                start_id = cur.fetchone()[0]
+            if start_id > 1:
+                print(f"{table} already has records, appending from id {start_id:,}")
+                seed = shard_seed(seed, f"from-{start_id}")
+                if profile.popularity:
+                    profile = profile.with_catalog_size(start_id + num_news - 1)
+                    print(f"Data profile: {profile.describe()} "
+                          f"(set POPULARITY_CATALOG_SIZE={profile.catalog_size} for the producer)")
+
+            if workers == 1 and not partitioned:
+                print(f"Streaming {num_news:,} news records via COPY...")
+                batches = generate_news_batches(num_news, 50_000, seed, start_id, vectorized, profile)
+                stream = CopyStream(batches, num_news)
+                cur.copy_expert(
+                    f"COPY news ({', '.join(NEWS_COLUMNS)}) FROM STDIN "
+                    f"WITH (FORMAT csv{', FREEZE' if fresh else ''})",
+                    stream,
+                    size=1 << 20,
+                )
+                stream.report()
+
+        if workers > 1 or partitioned:
+            tasks = [
+                (shard, first, count, seed, vectorized, profile, partitioned)
+                for shard, first, count in shard_ranges(num_news, workers, start_id)
+            ]
+            print(f"Streaming {num_news:,} news records into {table} via {len(tasks)} parallel COPY streams...")
+            run_shards(_copy_shard, tasks, workers, num_news)
+
+        with conn, conn.cursor() as cur:
+            step = time.monotonic()
+            if partitioned:
+                print("Creating primary key and indexes on partitions...")
+                if fresh:
+                    cur.execute(NEWS_PARTITIONED_CONSTRAINTS_DDL)
+                cur.execute(NEWS_PARTITIONED_INDEXES_DDL)
+            else:
+                if fresh:
+                    print("Adding constraints...")
+                    cur.execute(NEWS_CONSTRAINTS_DDL)
+                print("Creating indexes and trigger...")
+                cur.execute(INDEXES_DDL)
+                cur.execute(TRIGGER_DDL)
+            cur.execute(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT MAX(id) FROM {table}))"
+            )
+            print(f"Constraints/indexes built in {time.monotonic() - step:.1f}s")
+
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            cur.execute(ANALYZE_SQL)
+            if partitioned:
+                cur.execute("ANALYZE news_partitioned")
+    finally:
+        conn.close()
+
+    elapsed = time.monotonic() - started
+    print(f"\nLoad complete: {num_news:,} news records in {elapsed:.1f}s "
+          f"({num_news / elapsed:,.0f} rows/s overall)")
+
 
 def main():
+    parser = argparse.ArgumentParser(description="News aggregator test data generator (PostgreSQL)")
+    parser.add_argument("--mode", choices=("sql", "copy"), default="sql",
+                        help="sql: write an INSERT script; copy: stream straight into PostgreSQL via COPY")
+    parser.add_argument("--rows", type=int, default=3000000, help="number of news records")
+    parser.add_argument("--output", default="complete_news_database_postgres.sql", help="SQL file for --mode sql")
+    parser.add_argument("--seed", type=int, default=None, help="random seed for reproducible data")
+    parser.add_argument("--generator", choices=("auto", "numpy", "python"), default="auto",
+                        help="numpy: vectorized batches; python: per-row random calls; auto: numpy if installed")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="processes; the record range is split into one shard per worker")
+    parser.add_argument("--partitioned", action="store_true",
+                        help="--mode copy: load news_partitioned (monthly partitions) instead of news")
+    parser.add_argument("--resume", action="store_true",
+                        help="--mode sql: continue an interrupted run from <output>.checkpoint.json "
+                             "(same arguments and --seed required)")
+    parser.add_argument("--popularity", choices=("uniform", "zipf"), default=POPULARITY_DIST,
+                        help="views/likes per article; zipf matches the producer's hot set (env POPULARITY_DIST)")
+    parser.add_argument("--zipf-s", type=float, default=POPULARITY_ZIPF_S, help="Zipf exponent")
+    parser.add_argument("--recency-half-life", type=float, default=RECENCY_HALF_LIFE_DAYS,
+                        help="days; > 0 skews publish_date towards recent dates, 0 = uniform over 3 years")
+    args = parser.parse_args()
+    vectorized = None if args.generator == "auto" else args.generator == "numpy"
+    # CATEGORY_WEIGHTS / SOURCE_WEIGHTS come from the environment, as in the producer
+    profile = make_profile(args.rows, popularity=args.popularity, zipf_s=args.zipf_s,
+                           recency_half_life_days=args.recency_half_life)
+    print(f"Data profile: {profile.describe()}")
+    if args.workers < 1:
+        parser.error("--workers must be >= 1")
+    if args.partitioned and args.mode != "copy":
+        parser.error("--partitioned requires --mode copy")
+    if args.resume and args.mode != "sql":
+        parser.error("--resume requires --mode sql; --mode copy appends after MAX(id) by itself")
+
+    if args.mode == "copy":
+        load_with_copy(args.rows, args.seed, vectorized, args.workers, args.partitioned, profile)
+        return
+
+    psql = "docker exec -i bd-postgres-1 psql -U postgres -d news_aggregator -q -f -"
+
+    if args.workers > 1:
+        schema, parts, finish = generate_sharded_database(args.output, args.rows, args.workers, args.seed, vectorized,
+                                                           profile, args.resume)
+        print("\nTo import, execute (parts in parallel):")
+        print(f"{psql} < {schema}")
+        print(f"ls {os.path.splitext(args.output)[0]}_part*.sql | "
+              f"xargs -P {args.workers} -I{{}} sh -c '{psql} < {{}}'")
+        print(f"{psql} < {finish}")
+        return
+
     # Generate complete database for PostgreSQL
-    generate_complete_database("complete_news_database_postgres.sql", 3000000)
-   
+    generate_complete_database(args.output, args.rows, args.seed, vectorized, profile, args.resume)
+
     print("\n" + "="*50)
     print("GENERATION FOR POSTGRESQL COMPLETED!")
     print("="*50)
     print("Created file:")
-    print("1. complete_news_database_postgres.sql - Database for PostgreSQL")
+    print(f"1. {args.output} - Database for PostgreSQL")
     print("\nTo import, execute:")
-    print("docker exec -i bd-postgres-1 psql -U postgres -d news_aggregator -f - < complete_news_database_postgres.sql")
+    print(f"docker exec -i bd-postgres-1 psql -U postgres -d news_aggregator -f - < {args.output}")
+    print("\nOr skip the file and load directly:")
+    print("python agregatorCreate.py --mode copy")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,59 @@
+"""
+Benchmark of agregatorCreate.py row generation: per-row Python vs vectorized NumPy.
+
+    python bench_generator.py [--rows 500000] [--seed 42]
+
+Measures generation + rendering (CSV for COPY and INSERT VALUES for the SQL
+file) without touching the database, and checks that a seeded run is reproducible.
+"""
+
+import argparse
+import time
+
+from agregatorCreate import batch_to_csv, batch_to_sql_values, generate_news_batches, np
+
+
+def bench(rows, seed, vectorized, render, batch_size):
+    started = time.perf_counter()
+    size = 0
+    for batch in generate_news_batches(rows, batch_size, seed, vectorized=vectorized):
+        size += len(render(batch))
+    return rows / (time.perf_counter() - started), size
+
+
+def check_reproducible(seed, vectorized):
+    first, second = (
+        b"".join(batch_to_csv(b) for b in generate_news_batches(20_000, 5_000, seed, vectorized=vectorized))
+        for _ in range(2)
+    )
+    assert first == second, "same seed produced different rows"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    generators = [("python", False)] + ([("numpy", True)] if np is not None else [])
+    if np is None:
+        print("numpy is not installed — only the per-row path is measured")
+
+    for name, vectorized in generators:
+        check_reproducible(args.seed, vectorized)
+    print(f"Seeded runs are reproducible ({', '.join(name for name, _ in generators)})")
+
+    for render_name, render, batch_size in (
+        ("COPY csv  ", batch_to_csv, 50_000),
+        ("SQL VALUES", batch_to_sql_values, 10_000),
+    ):
+        results = {}
+        for name, vectorized in generators:
+            results[name], size = bench(args.rows, args.seed, vectorized, render, batch_size)
+            print(f"{render_name} {name:<7}: {results[name]:>12,.0f} rows/s  ({size / args.rows:.0f} B/row)")
+        if "numpy" in results:
+            print(f"{render_name} speedup: x{results['numpy'] / results['python']:.2f}")
+
+
+if __name__ == "__main__":
+    main()
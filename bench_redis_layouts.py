@@ -0,0 +1,123 @@
+"""
+Benchmark of the Redis article layouts (common/redis_cache.py): json vs bucketed.
+
+    python bench_redis_layouts.py [--articles 200000] [--reads 20000] [--db 15]
+
+Fills an otherwise unused Redis database (FLUSHDB before every layout) with
+articles generated like agregatorCreate.py and reports used_memory per
+article, the encoding Redis picked, single-article read latency (p50/p99,
+one pipeline round-trip each), batched reads/s and the client-side decode cost.
+"""
+
+import argparse
+import json
+import random
+import time
+
+from agregatorCreate import BASE_TITLES, CATEGORY_NAMES, CATEGORY_TITLES, generate_news_batches
+from common.redis_cache import REDIS_DB, ArticleCacheWriter, BucketedLayout, JsonLayout, connect_redis
+
+
+def make_articles(count, seed):
+    for batch in generate_news_batches(count, 50_000, seed):
+        for n, c, t, d, v, l in zip(batch.record_num, batch.category_id, batch.title_type,
+                                    batch.publish_date, batch.views_count, batch.likes_count):
+            yield {
+                "id": n,
+                "title": f"{BASE_TITLES[t]} #{n} - {CATEGORY_TITLES[c]}",
+                "category": CATEGORY_NAMES[c],
+                "url": f"https://newsportal.com/{CATEGORY_NAMES[c]}/{n}",
+                "published_at": d.replace(" ", "T"),
+                "views": v,
+                "likes": l,
+            }
+
+
+def percentile(sorted_values, p):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p))]
+
+
+def bench_layout(client, layout, args):
+    client.flushdb()
+    before = client.info("memory")["used_memory"]
+    started = time.perf_counter()
+    with ArticleCacheWriter(client, 5000, ttl=None, top_key=None, layout=layout) as writer:
+        for article in make_articles(args.articles, args.seed):
+            writer.add(article)
+    write_rate = args.articles / (time.perf_counter() - started)
+    per_article = (client.info("memory")["used_memory"] - before) / args.articles
+    sample_key = next(client.scan_iter(count=100))
+    encoding = client.object("encoding", sample_key).decode()
+
+    rnd = random.Random(args.seed)
+    ids = [rnd.randint(1, args.articles) for _ in range(args.reads)]
+    latencies = []
+    for article_id in ids:
+        started = time.perf_counter_ns()
+        layout.read_many(client, [article_id])
+        latencies.append(time.perf_counter_ns() - started)
+    latencies.sort()
+
+    started = time.perf_counter()
+    for i in range(0, len(ids), 100):
+        layout.read_many(client, ids[i:i + 100])
+    batched_rate = len(ids) / (time.perf_counter() - started)
+
+    return {
+        "bytes/article": per_article,
+        "encoding": encoding,
+        "write/s": write_rate,
+        "p50 us": percentile(latencies, 0.50) / 1000,
+        "p99 us": percentile(latencies, 0.99) / 1000,
+        "batched read/s": batched_rate,
+    }
+
+
+def bench_decode(layout, args):
+    """Client CPU only: json.loads vs Avro decode of the same articles, per article."""
+    articles = list(make_articles(min(args.articles, 20_000), args.seed))
+    if isinstance(layout, JsonLayout):
+        payloads = [json.dumps(a, ensure_ascii=False).encode() for a in articles]
+        decode = json.loads
+    else:
+        payloads = [layout.codec.encode(a) for a in articles]
+        decode = layout.codec.decode
+    started = time.perf_counter()
+    for payload in payloads:
+        decode(payload)
+    return (time.perf_counter() - started) / len(payloads) * 1e6, sum(map(len, payloads)) / len(payloads)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--articles", type=int, default=200_000)
+    parser.add_argument("--reads", type=int, default=20_000)
+    parser.add_argument("--db", type=int, default=15, help="Redis database to FLUSHDB and fill")
+    parser.add_argument("--bucket-size", type=int, default=64)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    if args.db == REDIS_DB:
+        parser.error(f"--db {args.db} is the application database (REDIS_DB); pick another one")
+
+    client = connect_redis(db=args.db)
+    config = client.config_get("hash-max-listpack-*")
+    print(f"Redis {client.info('server')['redis_version']}, db {args.db}, {args.articles:,} articles, {config}")
+
+    results = {}
+    for layout in (JsonLayout(), BucketedLayout(args.bucket_size)):
+        results[layout.name] = bench_layout(client, layout, args)
+        decode_us, payload_bytes = bench_decode(layout, args)
+        results[layout.name].update({"decode us": decode_us, "payload B": payload_bytes})
+    client.flushdb()
+
+    print(f"\n{'':<16}" + "".join(f"{name:>14}" for name in results))
+    for metric in results["json"]:
+        values = [results[name][metric] for name in results]
+        cells = "".join(f"{v:>14}" if isinstance(v, str) else f"{v:>14,.1f}" for v in values)
+        print(f"{metric:<16}{cells}")
+    ratio = results["json"]["bytes/article"] / results["bucketed"]["bytes/article"]
+    print(f"\nbucketed uses x{ratio:.1f} less memory per article")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+"""Shared code for the producer, consumers and streams services."""
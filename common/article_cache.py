@@ -0,0 +1,311 @@
+"""
+News Aggregator — read-through article cache
+============================================
+Article lookups by id through three tiers:
+
+  in-process LRU   CACHE_LOCAL_SIZE entries, CACHE_LOCAL_TTL_S seconds (short:
+                   views/likes keep changing in Redis)
+  Redis            json layout of common/redis_cache.py (article:{id} with a
+                   TTL, live counters overlaid), ARTICLE_TTL_S shortened by up
+                   to CACHE_TTL_JITTER so keys written together do not expire
+                   together; "null" is cached for CACHE_NEGATIVE_TTL_S
+  PostgreSQL       news joined with categories, one row per miss
+
+Stampede protection:
+  - single-flight: concurrent misses for the same id share one PostgreSQL
+    query, the other callers wait for its result (counted as "coalesced");
+  - probabilistic early refresh (XFetch): a Redis hit with remaining TTL t is
+    reloaded ahead of expiry when -load_time * beta * ln(U) >= t, so hot keys
+    are refreshed by one request shortly before they expire instead of by
+    all of them right after. While a refresh is running, others get the
+    cached value.
+
+stats() returns hit/miss counters for tuning CACHE_LOCAL_SIZE and the TTLs.
+Only the json layout has per-article TTLs; a bucketed cache is filled
+wholesale by warm_redis_cache.py instead.
+"""
+
+import json
+import logging
+import math
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+
+from common.redis_cache import ARTICLE_TTL_S, article_key, likes_key, views_key
+
+logger = logging.getLogger("article-cache")
+
+CACHE_LOCAL_SIZE         = int(os.getenv("CACHE_LOCAL_SIZE", "10000"))
+CACHE_LOCAL_TTL_S        = float(os.getenv("CACHE_LOCAL_TTL_S", "5"))
+CACHE_TTL_JITTER         = float(os.getenv("CACHE_TTL_JITTER", "0.1"))        # share of ARTICLE_TTL_S
+CACHE_EARLY_REFRESH_BETA = float(os.getenv("CACHE_EARLY_REFRESH_BETA", "1.0"))  # 0 disables XFetch
+CACHE_NEGATIVE_TTL_S     = int(os.getenv("CACHE_NEGATIVE_TTL_S", "30"))
+
+ARTICLE_SQL = """
+SELECT n.id, n.title, c.name, n.publish_date, n.url, n.views_count, n.likes_count
+FROM news n
+LEFT JOIN categories c ON c.id = n.category_id
+WHERE n.is_active
+"""
+
+
+def article_from_row(row) -> dict:
+    """ARTICLE_SQL row -> the article dict cached in Redis."""
+    article_id, title, category, published_at, url, views, likes = row
+    return {
+        "id": article_id,
+        "title": title,
+        "category": category,
+        "url": url,
+        "published_at": published_at.isoformat(),
+        "views": views or 0,
+        "likes": likes or 0,
+    }
+
+
+class PostgresArticleLoader:
+    """loader(article_id) -> article or None; one connection per calling thread."""
+
+    def __init__(self, connect):
+        self.connect = connect
+        self._local = threading.local()
+
+    def __call__(self, article_id):
+        conn = getattr(self._local, "conn", None)
+        if conn is None or conn.closed:
+            conn = self._local.conn = self.connect()
+        try:
+            with conn.cursor() as cur:
+                cur.execute(ARTICLE_SQL + "AND n.id = %s", (article_id,))
+                row = cur.fetchone()
+        finally:
+            conn.rollback()   # do not keep a read transaction open between lookups
+        return article_from_row(row) if row else None
+
+
+# ─── Building blocks ─────────────────────────────────────────────────────────
+class LocalLRU:
+    """Thread-safe LRU with a size bound and a per-entry TTL; caches None too."""
+
+    def __init__(self, max_size: int = CACHE_LOCAL_SIZE, ttl: float = CACHE_LOCAL_TTL_S):
+        self.max_size = max_size
+        self.ttl      = ttl
+        self._entries = OrderedDict()   # key -> (value, expires_at)
+        self._lock    = threading.Lock()
+
+    def get(self, key) -> tuple:
+        """(found, value)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            if entry[1] <= time.monotonic():
+                del self._entries[key]
+                return False, None
+            self._entries.move_to_end(key)
+            return True, entry[0]
+
+    def put(self, key, value):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done   = threading.Event()
+        self.result = None
+        self.error  = None
+
+
+class SingleFlight:
+    """Concurrent do(key, fn) calls for the same key share one execution of fn."""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock  = threading.Lock()
+
+    def in_flight(self, key) -> bool:
+        return key in self._calls
+
+    def do(self, key, fn) -> tuple:
+        """(result, shared): shared is True for callers that waited for another one."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+        try:
+            call.result = fn()
+        except Exception as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+
+# ─── Cache ───────────────────────────────────────────────────────────────────
+class ArticleCache:
+
+    COUNTERS = ("local_hits", "redis_hits", "misses", "coalesced", "early_refreshes",
+                "stale_served", "redis_errors")
+
+    def __init__(self, redis_client, loader, local_size: int = CACHE_LOCAL_SIZE,
+                 local_ttl: float = CACHE_LOCAL_TTL_S, ttl: int = ARTICLE_TTL_S,
+                 jitter: float = CACHE_TTL_JITTER, beta: float = CACHE_EARLY_REFRESH_BETA,
+                 negative_ttl: int = CACHE_NEGATIVE_TTL_S):
+        self.redis        = redis_client
+        self.loader       = loader
+        self.local        = LocalLRU(local_size, local_ttl)
+        self.flight       = SingleFlight()
+        self.ttl          = ttl
+        self.jitter       = jitter
+        self.beta         = beta
+        self.negative_ttl = negative_ttl
+        self.load_time    = 0.05   # seconds, EWMA of loader calls (XFetch delta)
+        self._counts      = dict.fromkeys(self.COUNTERS, 0)
+        self._counts_lock = threading.Lock()
+
+    def get(self, article_id):
+        """Article dict or None if it does not exist (or is inactive)."""
+        found, article = self.local.get(article_id)
+        if found:
+            self._count("local_hits")
+            return article
+
+        cached = self._redis_get(article_id)
+        if cached is None:
+            self._count("misses")
+            return self._load(article_id)
+
+        article, ttl_ms = cached
+        if self._refresh_early(ttl_ms):
+            if not self.flight.in_flight(article_id):
+                self._count("early_refreshes")
+                return self._load(article_id)
+            self._count("stale_served")
+        else:
+            self._count("redis_hits")
+        self.local.put(article_id, article)
+        return article
+
+    def invalidate(self, article_id):
+        """Drops the article from both tiers (e.g. after ArticleDeleted / an edit)."""
+        self.local.invalidate(article_id)
+        try:
+            self.redis.delete(article_key(article_id))
+        except Exception as exc:
+            self._count("redis_errors")
+            logger.warning(f"[CACHE] Redis invalidate of article {article_id} failed: {exc}")
+
+    def stats(self) -> dict:
+        with self._counts_lock:
+            counts = dict(self._counts)
+        lookups = counts["local_hits"] + counts["redis_hits"] + counts["misses"] \
+            + counts["early_refreshes"] + counts["stale_served"]
+        hits = lookups - counts["misses"] - counts["early_refreshes"]
+        counts.update(
+            lookups=lookups,
+            local_size=len(self.local),
+            local_hit_ratio=counts["local_hits"] / lookups if lookups else 0.0,
+            hit_ratio=hits / lookups if lookups else 0.0,
+            load_time_ms=self.load_time * 1000,
+        )
+        return counts
+
+    # ── internals ────────────────────────────────────────────────────────────
+    def _count(self, name: str):
+        with self._counts_lock:
+            self._counts[name] += 1
+
+    def _redis_get(self, article_id):
+        """(article or None, remaining TTL in ms) or None on a miss / Redis error."""
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.get(article_key(article_id))
+        pipe.pttl(article_key(article_id))
+        pipe.get(views_key(article_id))
+        pipe.get(likes_key(article_id))
+        try:
+            data, ttl_ms, views, likes = pipe.execute()
+        except Exception as exc:
+            self._count("redis_errors")
+            logger.warning(f"[CACHE] Redis read of article {article_id} failed: {exc}")
+            return None
+        if data is None or ttl_ms == -2:
+            return None
+        article = json.loads(data)
+        if article is not None:
+            if views is not None:
+                article["views"] = int(views)
+            if likes is not None:
+                article["likes"] = int(likes)
+        return article, ttl_ms
+
+    def _refresh_early(self, ttl_ms: int) -> bool:
+        if ttl_ms < 0 or self.beta <= 0:      # -1: no TTL, nothing to refresh
+            return False
+        return -self.load_time * self.beta * math.log(1.0 - random.random()) * 1000 >= ttl_ms
+
+    def _load(self, article_id):
+        article, shared = self.flight.do(article_id, lambda: self._load_and_store(article_id))
+        if shared:
+            self._count("coalesced")
+        self.local.put(article_id, article)
+        return article
+
+    def _load_and_store(self, article_id):
+        started = time.monotonic()
+        article = self.loader(article_id)
+        self.load_time += (time.monotonic() - started - self.load_time) * 0.2
+
+        if article is None:
+            value, ttl = "null", self.negative_ttl
+        else:
+            value = json.dumps(article, ensure_ascii=False, default=str)
+            ttl = max(1, int(self.ttl * (1.0 - random.uniform(0.0, self.jitter))))
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.set(article_key(article_id), value, ex=ttl)
+        if article is not None:
+            # nx: live counters of redis-counters-group are ahead of news.views_count;
+            # read them back so a load answers like a Redis hit (_redis_get)
+            pipe.set(views_key(article_id), article["views"], nx=True)
+            pipe.set(likes_key(article_id), article["likes"], nx=True)
+            pipe.get(views_key(article_id))
+            pipe.get(likes_key(article_id))
+        try:
+            replies = pipe.execute()
+        except Exception as exc:
+            self._count("redis_errors")
+            logger.warning(f"[CACHE] Redis write of article {article_id} failed: {exc}")
+            return article
+        if article is not None:
+            views, likes = replies[-2:]
+            if views is not None:
+                article["views"] = int(views)
+            if likes is not None:
+                article["likes"] = int(likes)
+        return article
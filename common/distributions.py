@@ -0,0 +1,237 @@
+"""
+News Aggregator — data distributions
+====================================
+One source of skew for agregatorCreate.py (the news table) and producer.py
+(the live view/like stream), so that both agree on which articles are hot.
+
+Article popularity:
+  uniform   — every article is equally likely (the historical behaviour)
+  zipf      — the article of popularity rank r gets weight r^-s. Ranks are
+              spread over ids 1..catalog_size by a fixed multiplicative
+              scramble, so the hot set is the same in every process and is not
+              simply the lowest ids. The generator turns the weight into
+              views_count and the producer samples views/likes from it.
+
+Publish dates:
+  RECENCY_HALF_LIFE_DAYS = 0   uniform over the last MAX_DAYS_AGO days
+  RECENCY_HALF_LIFE_DAYS > 0   exponential decay of article age, truncated to
+                               MAX_DAYS_AGO (half of the articles are younger
+                               than the half-life, if it is much smaller)
+
+Categories and sources: relative weights by name, e.g.
+  CATEGORY_WEIGHTS = "politics=4,sports=3,technology=3"   (unlisted = 1)
+
+Environment (shared by both tools; the generator can override via flags):
+  POPULARITY_DIST, POPULARITY_ZIPF_S, POPULARITY_CATALOG_SIZE (= --rows of
+  the generator), POPULARITY_MAX_VIEWS, POPULARITY_FRESH_SHARE,
+  RECENCY_HALF_LIFE_DAYS, CATEGORY_WEIGHTS, SOURCE_WEIGHTS
+"""
+
+import copy
+import math
+import os
+import random
+from itertools import accumulate
+from math import gcd
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+POPULARITY_DIST         = os.getenv("POPULARITY_DIST", "uniform")
+POPULARITY_ZIPF_S       = float(os.getenv("POPULARITY_ZIPF_S", "1.1"))
+POPULARITY_CATALOG_SIZE = int(os.getenv("POPULARITY_CATALOG_SIZE", "3000000"))
+POPULARITY_MAX_VIEWS    = int(os.getenv("POPULARITY_MAX_VIEWS", "1000000"))   # views of rank 1
+# Producer only: share of views/likes that go to articles published after the
+# catalog was generated (ids > catalog_size), uniformly
+POPULARITY_FRESH_SHARE  = float(os.getenv("POPULARITY_FRESH_SHARE", "0.2"))
+RECENCY_HALF_LIFE_DAYS  = float(os.getenv("RECENCY_HALF_LIFE_DAYS", "0"))
+CATEGORY_WEIGHTS        = os.getenv("CATEGORY_WEIGHTS", "")
+SOURCE_WEIGHTS          = os.getenv("SOURCE_WEIGHTS", "")
+
+MAX_DAYS_AGO = 1095  # 3 years
+
+# Odd constant close to 2^32 / golden ratio; adjusted until coprime with n
+_SCRAMBLE = 2654435761
+
+
+def parse_weights(spec: str, names: list) -> list:
+    """"name=weight,..." → weights aligned with names; unlisted names get 1."""
+    weights = dict.fromkeys(names, 1.0)
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, value = item.partition("=")
+        name = name.strip()
+        if name not in weights:
+            raise ValueError(f"Unknown name {name!r} in weights {spec!r}; expected one of {names}")
+        weights[name] = float(value)
+    if sum(weights.values()) <= 0:
+        raise ValueError(f"Weights must not all be zero: {spec!r}")
+    return [weights[name] for name in names]
+
+
+class WeightedChoice:
+    """Weighted choice among 1-based ids (category_id, source_id, ...)."""
+
+    def __init__(self, weights: list):
+        self.ids = list(range(1, len(weights) + 1))
+        self.weights = weights
+        self.cum_weights = list(accumulate(weights))
+        self.probabilities = [w / self.cum_weights[-1] for w in weights]
+
+    def sample(self, rnd=random, k: int = 1) -> list:
+        return rnd.choices(self.ids, cum_weights=self.cum_weights, k=k)
+
+    def sample_array(self, rng, size: int):
+        return rng.choice(len(self.ids), size=size, p=self.probabilities) + 1
+
+
+class ZipfPopularity:
+    """
+    Bounded Zipf over article ids 1..catalog_size.
+
+    Ranks are sampled by rejection-inversion (Hörmann & Derflinger), O(1)
+    memory and a few float ops per sample, so the producer does not need a
+    table of catalog_size cumulative weights.
+    """
+
+    def __init__(self, catalog_size: int = POPULARITY_CATALOG_SIZE, s: float = POPULARITY_ZIPF_S):
+        if catalog_size < 1 or s <= 0:
+            raise ValueError("catalog_size must be >= 1 and s > 0")
+        self.n = catalog_size
+        self.s = s
+
+        self.multiplier = _SCRAMBLE % catalog_size or 1
+        while gcd(self.multiplier, catalog_size) != 1:
+            self.multiplier += 1
+        self.inverse = pow(self.multiplier, -1, catalog_size) if catalog_size > 1 else 0
+
+        self._h_integral_x1 = self._h_integral(1.5) - 1.0
+        self._h_integral_n = self._h_integral(catalog_size + 0.5)
+        self._s_const = 2.0 - self._h_integral_inverse(self._h_integral(2.5) - self._h(2.0))
+
+    # ── rank <-> article id ──────────────────────────────────────────────────
+    def article_for_rank(self, rank: int) -> int:
+        return (rank - 1) * self.multiplier % self.n + 1
+
+    def rank_of(self, article_id):
+        """Works on ints and on NumPy int64 arrays (ids <= ~3e9)."""
+        return (article_id - 1) * self.inverse % self.n + 1
+
+    def weight(self, rank):
+        """Relative popularity, 1.0 for rank 1."""
+        return rank ** -self.s
+
+    # ── sampling ─────────────────────────────────────────────────────────────
+    def sample_rank(self, rnd=random) -> int:
+        while True:
+            u = self._h_integral_n + rnd.random() * (self._h_integral_x1 - self._h_integral_n)
+            x = self._h_integral_inverse(u)
+            k = min(max(int(x + 0.5), 1), self.n)
+            if k - x <= self._s_const or u >= self._h_integral(k + 0.5) - self._h(k):
+                return k
+
+    def sample(self, rnd=random) -> int:
+        return self.article_for_rank(self.sample_rank(rnd))
+
+    def _h(self, x: float) -> float:
+        return math.exp(-self.s * math.log(x))
+
+    def _h_integral(self, x: float) -> float:
+        log_x = math.log(x)
+        return _expm1_over_x((1.0 - self.s) * log_x) * log_x
+
+    def _h_integral_inverse(self, x: float) -> float:
+        t = max(x * (1.0 - self.s), -1.0)
+        return math.exp(_log1p_over_x(t) * x)
+
+
+def _expm1_over_x(x: float) -> float:
+    return math.expm1(x) / x if abs(x) > 1e-8 else 1.0 + x / 2.0
+
+
+def _log1p_over_x(x: float) -> float:
+    return math.log1p(x) / x if abs(x) > 1e-8 else 1.0 - x / 2.0
+
+
+class RecencySkew:
+    """Article age in days on [0, max_days]: uniform, or truncated exponential."""
+
+    def __init__(self, half_life_days: float = RECENCY_HALF_LIFE_DAYS, max_days: int = MAX_DAYS_AGO):
+        self.max_days = max_days
+        self.rate = math.log(2) / half_life_days if half_life_days > 0 else 0.0
+        # P(age <= max_days) of the untruncated distribution
+        self._mass = -math.expm1(-self.rate * max_days) if self.rate else 1.0
+
+    @property
+    def uniform(self) -> bool:
+        return not self.rate
+
+    def days_ago(self, u: float) -> float:
+        """Inverse CDF for u in [0, 1)."""
+        if not self.rate:
+            return u * self.max_days
+        return -math.log1p(-u * self._mass) / self.rate
+
+    def days_ago_array(self, u):
+        if not self.rate:
+            return u * self.max_days
+        return -np.log1p(-u * self._mass) / self.rate
+
+
+def _weighted_or_none(weights):
+    return WeightedChoice(weights) if weights and len(set(weights)) > 1 else None
+
+
+class DataProfile:
+    """
+    Everything that shapes generated data. Plain attributes, so a profile can be
+    handed to worker processes. popularity is None for the uniform mode.
+    """
+
+    def __init__(self, catalog_size: int = POPULARITY_CATALOG_SIZE,
+                 popularity: str = POPULARITY_DIST, zipf_s: float = POPULARITY_ZIPF_S,
+                 max_views: int = POPULARITY_MAX_VIEWS, fresh_share: float = POPULARITY_FRESH_SHARE,
+                 recency_half_life_days: float = RECENCY_HALF_LIFE_DAYS,
+                 category_weights: list | None = None, source_weights: list | None = None):
+        if popularity not in ("uniform", "zipf"):
+            raise ValueError(f"Unknown popularity distribution {popularity!r}")
+        self.catalog_size = catalog_size
+        self.popularity = ZipfPopularity(catalog_size, zipf_s) if popularity == "zipf" else None
+        self.max_views = max_views
+        self.fresh_share = fresh_share
+        self.recency = RecencySkew(recency_half_life_days)
+        # None — all weights equal, callers keep their plain uniform draw
+        self.categories = _weighted_or_none(category_weights)
+        self.sources = _weighted_or_none(source_weights)
+
+    def with_catalog_size(self, catalog_size: int) -> "DataProfile":
+        """The same profile over ids 1..catalog_size (e.g. after appending to a table)."""
+        profile = copy.copy(self)
+        profile.catalog_size = catalog_size
+        if self.popularity:
+            profile.popularity = ZipfPopularity(catalog_size, self.popularity.s)
+        return profile
+
+    @classmethod
+    def from_env(cls, category_names: list, source_names: list, **overrides):
+        overrides.setdefault("category_weights", parse_weights(CATEGORY_WEIGHTS, category_names))
+        overrides.setdefault("source_weights", parse_weights(SOURCE_WEIGHTS, source_names))
+        return cls(**overrides)
+
+    def pick_article(self, max_article_id: int, rnd=random) -> int:
+        """
+        Article for a view/like while max_article_id articles exist. Under Zipf,
+        POPULARITY_FRESH_SHARE of picks go uniformly to articles newer than the
+        catalog, the rest follow the catalog's popularity.
+        """
+        if self.popularity is None:
+            return rnd.randint(1, max_article_id)
+        if max_article_id > self.catalog_size and rnd.random() < self.fresh_share:
+            return rnd.randint(self.catalog_size + 1, max_article_id)
+        return self.popularity.sample(rnd)
+
+    def describe(self) -> str:
+        popularity = f"zipf(s={self.popularity.s}, n={self.catalog_size:,})" if self.popularity else "uniform"
+        recency = "uniform" if self.recency.uniform else f"half-life {math.log(2) / self.recency.rate:g}d"
+        return f"popularity={popularity} publish_date={recency}"
@@ -0,0 +1,406 @@
+"""
+News Aggregator — event codecs
+===============================
+One serialization layer for producer.py, consumers.py and streams_app.py.
+
+Codecs:
+  json      — json.dumps / json.loads (default, also used for DLQ and stats topics)
+  avro      — schemas/news-event.avsc, Confluent wire format
+              (magic byte 0x00 + 4-byte schema id + Avro binary);
+              schema ids come from FileSchemaRegistry (schemas/registry/)
+  protobuf  — schemas/news-event.proto, compiled to news_event_pb2 at image build
+
+Selection is per topic through the environment:
+  EVENT_CODEC   = json | avro | protobuf      codec for the three event topics
+  TOPIC_CODECS  = "news.views.events=avro,news.reactions.events=protobuf"
+
+Decoding is self-describing (first byte: 0x00 → Avro, '{' → JSON, otherwise
+Protobuf), so consumers keep working while producers switch codecs.
+
+PartialDecoder serves consumers that need only a few fields: it reads them
+from Kafka headers (eventType, entityId set by the producer), then from a
+key scan of the JSON bytes, and only decodes the full event as a last resort.
+"""
+
+import hashlib
+import json
+import os
+import re
+import struct
+import threading
+from io import BytesIO
+from pathlib import Path
+
+from kafka.serializer import Deserializer, Serializer
+
+SCHEMAS_DIR  = Path(os.getenv("SCHEMAS_DIR", Path(__file__).resolve().parent.parent / "schemas"))
+AVRO_SCHEMA  = SCHEMAS_DIR / "news-event.avsc"
+REGISTRY_DIR = Path(os.getenv("SCHEMA_REGISTRY_DIR", SCHEMAS_DIR / "registry"))
+
+EVENT_TOPICS = ("news.articles.events", "news.views.events", "news.reactions.events")
+
+AVRO_MAGIC = 0
+_AVRO_HEADER = struct.Struct(">bI")
+
+
+# ─── Local schema registry stand-in ──────────────────────────────────────────
+class FileSchemaRegistry:
+    """
+    Minimal file-backed replacement for a Confluent Schema Registry.
+    Layout of REGISTRY_DIR:
+      <id>.avsc      — immutable snapshot of every registered schema
+      subjects.json  — {"<subject>": [<id>, ...]}
+    Schemas are deduplicated by fingerprint; new ones get the next free id.
+    Snapshots are committed to the repo, so every image resolves the same ids.
+    """
+
+    def __init__(self, directory: Path = REGISTRY_DIR):
+        self.directory = Path(directory)
+        self._lock = threading.Lock()
+        self._by_id = {}           # id -> schema dict
+        self._by_fingerprint = {}  # sha256 of canonical JSON -> id
+        self._subjects = {}
+        for snapshot in self.directory.glob("*.avsc"):
+            self._remember(int(snapshot.stem), json.loads(snapshot.read_text(encoding="utf-8")))
+        subjects_file = self.directory / "subjects.json"
+        if subjects_file.exists():
+            self._subjects = json.loads(subjects_file.read_text(encoding="utf-8"))
+
+    @staticmethod
+    def _fingerprint(schema: dict) -> str:
+        return hashlib.sha256(json.dumps(schema, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def _remember(self, schema_id: int, schema: dict):
+        self._by_id[schema_id] = schema
+        self._by_fingerprint[self._fingerprint(schema)] = schema_id
+
+    def register(self, subject: str, schema_file: Path) -> int:
+        schema = json.loads(Path(schema_file).read_text(encoding="utf-8"))
+        with self._lock:
+            schema_id = self._by_fingerprint.get(self._fingerprint(schema))
+            if schema_id is None:
+                schema_id = max(self._by_id, default=0) + 1
+                self.directory.mkdir(parents=True, exist_ok=True)
+                self._write(f"{schema_id}.avsc", schema)
+                self._remember(schema_id, schema)
+            versions = self._subjects.setdefault(subject, [])
+            if schema_id not in versions:
+                versions.append(schema_id)
+                self._write("subjects.json", self._subjects)
+        return schema_id
+
+    def get(self, schema_id: int) -> dict:
+        try:
+            return self._by_id[schema_id]
+        except KeyError:
+            raise KeyError(f"Unknown schema id {schema_id} in {self.directory}") from None
+
+    def _write(self, filename: str, data: dict):
+        target = self.directory / filename
+        tmp = target.with_suffix(".tmp")
+        tmp.write_text(json.dumps(data, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+        os.replace(tmp, target)
+
+
+# ─── Codecs ──────────────────────────────────────────────────────────────────
+class JsonCodec:
+    name = "json"
+
+    def encode(self, event: dict) -> bytes:
+        return json.dumps(event).encode("utf-8")
+
+    def decode(self, data: bytes) -> dict:
+        return json.loads(data)
+
+
+class AvroCodec:
+    name = "avro"
+
+    def __init__(self, subject: str, registry: FileSchemaRegistry):
+        import fastavro
+
+        self._fastavro = fastavro
+        self._registry = registry
+        self._schema_id = registry.register(subject, AVRO_SCHEMA)
+        self._header = _AVRO_HEADER.pack(AVRO_MAGIC, self._schema_id)
+        self._parsed = {}  # schema id -> fastavro parsed schema
+        self._writer_schema = self._parsed_schema(self._schema_id)
+
+    def _parsed_schema(self, schema_id: int):
+        parsed = self._parsed.get(schema_id)
+        if parsed is None:
+            parsed = self._fastavro.parse_schema(self._registry.get(schema_id))
+            self._parsed[schema_id] = parsed
+        return parsed
+
+    def encode(self, event: dict) -> bytes:
+        buf = _BytesWriter(self._header)
+        self._fastavro.schemaless_writer(buf, self._writer_schema, event)
+        return buf.getvalue()
+
+    def decode(self, data: bytes) -> dict:
+        _, schema_id = _AVRO_HEADER.unpack_from(data)
+        buf = BytesIO(data)
+        buf.seek(_AVRO_HEADER.size)
+        schema = self._parsed_schema(schema_id)
+        return self._fastavro.schemaless_reader(buf, schema, schema)
+
+
+class ProtobufCodec:
+    name = "protobuf"
+
+    _EVENT_TYPES = {
+        "ArticlePublished": 1, "ArticleViewed": 2, "ArticleLiked": 3,
+        "ArticleShared": 4, "ArticleDeleted": 5,
+    }
+
+    def __init__(self):
+        try:
+            from common import news_event_pb2
+        except ImportError as exc:
+            raise ImportError(
+                "common/news_event_pb2.py is missing; generate it with "
+                "`python -m grpc_tools.protoc -I schemas --python_out=common schemas/news-event.proto`"
+            ) from exc
+        self._pb2 = news_event_pb2
+        self._event_type_names = {v: k for k, v in self._EVENT_TYPES.items()}
+
+    def encode(self, event: dict) -> bytes:
+        payload  = event.get("payload") or {}
+        metadata = event.get("metadata") or {}
+        msg = self._pb2.NewsEvent(
+            event_id=event["eventId"],
+            event_type=self._EVENT_TYPES.get(event["eventType"], 0),
+            entity_id=event["entityId"],
+            timestamp=event["timestamp"],
+            source=event["source"],
+            version=event.get("version", "1.0"),
+        )
+        p = msg.payload
+        p.article_id    = payload.get("articleId", 0)
+        p.title         = payload.get("title", "")
+        p.category_id   = payload.get("categoryId", 0)
+        p.category_name = payload.get("categoryName", "")
+        p.source_id     = payload.get("sourceId", 0)
+        p.source_name   = payload.get("sourceName", "")
+        p.author_id     = payload.get("authorId", 0)
+        p.views_count   = payload.get("viewsCount", 0)
+        p.likes_count   = payload.get("likesCount", 0)
+        p.publish_date  = payload.get("publishDate", "")
+        p.content       = payload.get("content", "")
+        p.author_name   = payload.get("authorName", "")
+        p.url           = payload.get("url", "")
+        m = msg.metadata
+        m.correlation_id = metadata.get("correlationId") or ""
+        m.user_id        = metadata.get("userId") or ""
+        m.ip_address     = metadata.get("ipAddress") or ""
+        m.user_agent     = metadata.get("userAgent") or ""
+        m.environment    = metadata.get("environment") or "production"
+        return msg.SerializeToString()
+
+    def decode(self, data: bytes) -> dict:
+        msg = self._pb2.NewsEvent.FromString(data)
+        p, m = msg.payload, msg.metadata
+        return {
+            "eventId":   msg.event_id,
+            "eventType": self._event_type_names.get(msg.event_type, "UNKNOWN"),
+            "entityId":  msg.entity_id,
+            "timestamp": msg.timestamp,
+            "source":    msg.source,
+            "version":   msg.version,
+            "payload": {
+                "articleId":    p.article_id,
+                "title":        p.title,
+                "content":      p.content,
+                "categoryId":   p.category_id,
+                "categoryName": p.category_name,
+                "sourceId":     p.source_id,
+                "sourceName":   p.source_name,
+                "authorId":     p.author_id,
+                "authorName":   p.author_name,
+                "viewsCount":   p.views_count,
+                "likesCount":   p.likes_count,
+                "publishDate":  p.publish_date,
+                "url":          p.url,
+            },
+            "metadata": {
+                # proto3: empty string = absent
+                "correlationId": m.correlation_id,
+                "userId":        m.user_id or None,
+                "ipAddress":     m.ip_address or None,
+                "userAgent":     m.user_agent or None,
+                "environment":   m.environment,
+            },
+        }
+
+
+class _BytesWriter:
+    """Append-only buffer pre-seeded with the Avro wire header."""
+
+    __slots__ = ("_parts",)
+
+    def __init__(self, header: bytes):
+        self._parts = [header]
+
+    def write(self, data: bytes):
+        self._parts.append(data)
+
+    def getvalue(self) -> bytes:
+        return b"".join(self._parts)
+
+
+# ─── Per-topic selection ─────────────────────────────────────────────────────
+def _parse_topic_codecs(spec: str) -> dict:
+    mapping = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        topic, _, codec = item.partition("=")
+        mapping[topic.strip()] = codec.strip()
+    return mapping
+
+
+EVENT_CODEC  = os.getenv("EVENT_CODEC", "json")
+TOPIC_CODECS = {topic: EVENT_CODEC for topic in EVENT_TOPICS}
+TOPIC_CODECS.update(_parse_topic_codecs(os.getenv("TOPIC_CODECS", "")))
+
+_registry = None
+_codecs = {}  # (codec name, topic) -> codec
+_codecs_lock = threading.Lock()
+
+
+def make_codec(name: str, topic: str):
+    global _registry
+    if name == "json":
+        return JsonCodec()
+    if name == "avro":
+        if _registry is None:
+            _registry = FileSchemaRegistry()
+        return AvroCodec(f"{topic}-value", _registry)
+    if name == "protobuf":
+        return ProtobufCodec()
+    raise ValueError(f"Unknown codec {name!r} for topic {topic!r}")
+
+
+def _cached_codec(name: str, topic: str):
+    codec = _codecs.get((name, topic))
+    if codec is None:
+        with _codecs_lock:
+            codec = _codecs.get((name, topic))
+            if codec is None:
+                codec = _codecs[(name, topic)] = make_codec(name, topic)
+    return codec
+
+
+def codec_for(topic: str):
+    """Codec configured for topic (JSON unless TOPIC_CODECS/EVENT_CODEC say otherwise)."""
+    return _cached_codec(TOPIC_CODECS.get(topic, "json"), topic)
+
+
+def decode_any(topic: str, data: bytes) -> dict:
+    """Decode by wire format, independent of what the topic is configured to produce."""
+    first = data[0] if data else None
+    if first == 0x7B:  # '{'
+        return json.loads(data)
+    name = "avro" if first == AVRO_MAGIC else "protobuf"
+    return _cached_codec(name, topic).decode(data)
+
+
+# ─── Partial decoding ────────────────────────────────────────────────────────
+# For Article* events entityId == str(payload.articleId), so both are served
+# from the single "entityId" header the producer attaches.
+FIELD_HEADERS = {
+    "eventType":         "eventType",
+    "entityId":          "entityId",
+    "payload.articleId": "entityId",
+}
+
+_JSON_NUMBER = re.compile(rb"-?\d+(?:\.\d+)?(?:[eE][+-]?\d+)?")
+_MISSING = object()
+
+
+def _scan_json_field(data: bytes, key: bytes):
+    """
+    Value after key (b'"name": ', json.dumps default separators) via bytes.find —
+    several times cheaper than json.loads of the whole message.
+    Returns _MISSING for anything unusual (absent key, escaped string, nested value).
+    """
+    i = data.find(key)
+    if i < 0:
+        return _MISSING
+    i += len(key)
+    if data[i:i + 1] == b'"':
+        j = data.find(b'"', i + 1)
+        token = data[i + 1:j]
+        if j < 0 or b"\\" in token:
+            return _MISSING
+        return token.decode("utf-8")
+    match = _JSON_NUMBER.match(data, i)
+    if match:
+        token = match.group()
+        return int(token) if token.isdigit() or token[1:].isdigit() else float(token)
+    if data.startswith(b"null", i):
+        return None
+    return _MISSING
+
+
+class PartialDecoder:
+    """
+    Extract a fixed set of fields without building the whole event dict.
+
+        decoder = PartialDecoder({"eventType": str, "payload.articleId": int})
+        fields  = decoder.extract(msg.topic, msg.value, msg.headers)
+
+    msg.value must be raw bytes (consumer without value_deserializer).
+    Lookup order per field: Kafka header → JSON key scan → full decode.
+    The key scan matches the leaf name, which is unique within NewsEvent.
+    Use decode_any() to materialize the full event (e.g. for the DLQ).
+    """
+
+    def __init__(self, fields: dict):
+        self.fields = [
+            (path, cast, FIELD_HEADERS.get(path), b'"%s": ' % path.rsplit(".", 1)[-1].encode())
+            for path, cast in fields.items()
+        ]
+
+    def extract(self, topic: str, data: bytes, headers=None) -> dict:
+        header_map = dict(headers) if headers else {}
+        is_json = data[:1] == b"{"
+        result  = {}
+        missing = []
+        for path, cast, header, key in self.fields:
+            raw = header_map.get(header) if header else None
+            if raw is not None:
+                result[path] = cast(raw.decode("utf-8"))
+                continue
+            value = _scan_json_field(data, key) if is_json else _MISSING
+            if value is _MISSING:
+                missing.append((path, cast))
+            else:
+                result[path] = cast(value) if value is not None else None
+
+        if missing:
+            event = decode_any(topic, data)
+            for path, cast in missing:
+                value = event
+                for part in path.split("."):
+                    value = value.get(part) if isinstance(value, dict) else None
+                result[path] = cast(value) if value is not None else None
+        return result
+
+
+# ─── kafka-python hooks ──────────────────────────────────────────────────────
+class EventSerializer(Serializer):
+    """value_serializer for KafkaProducer: picks the codec by topic."""
+
+    def serialize(self, topic, value):
+        if value is None:
+            return None
+        return codec_for(topic).encode(value)
+
+
+class EventDeserializer(Deserializer):
+    """value_deserializer for KafkaConsumer: detects the wire format per message."""
+
+    def deserialize(self, topic, bytes_):
+        if bytes_ is None:
+            return None
+        return decode_any(topic, bytes_)
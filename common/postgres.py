@@ -0,0 +1,36 @@
+"""
+News Aggregator — PostgreSQL connection for the host-side tools
+===============================================================
+agregatorCreate.py (--mode copy), warm_redis_cache.py and the neo4j scripts
+(export_postgres_csv.py, postgres_vs_cypher.py) connect to the same database;
+docker-compose publishes 5432 on localhost. The consumers run inside the
+compose network and keep their own settings.
+
+Environment: POSTGRES_HOST, POSTGRES_PORT, POSTGRES_DB, POSTGRES_USER,
+POSTGRES_PASSWORD
+"""
+
+import os
+
+POSTGRES_HOST     = os.getenv("POSTGRES_HOST", "localhost")
+POSTGRES_PORT     = int(os.getenv("POSTGRES_PORT", "5432"))
+POSTGRES_DB       = os.getenv("POSTGRES_DB", "news_aggregator")
+POSTGRES_USER     = os.getenv("POSTGRES_USER", "postgres")
+POSTGRES_PASSWORD = os.getenv("POSTGRES_PASSWORD", "password")
+
+
+def connect(**overrides):
+    """psycopg2 connection for POSTGRES_*; psycopg2 is imported lazily."""
+    try:
+        import psycopg2
+    except ImportError:
+        raise SystemExit("PostgreSQL access requires psycopg2 (pip install psycopg2-binary)")
+    params = {
+        "host": POSTGRES_HOST,
+        "port": POSTGRES_PORT,
+        "dbname": POSTGRES_DB,
+        "user": POSTGRES_USER,
+        "password": POSTGRES_PASSWORD,
+    }
+    params.update(overrides)
+    return psycopg2.connect(**params)
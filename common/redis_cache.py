@@ -0,0 +1,255 @@
+"""
+News Aggregator — Redis article cache
+=====================================
+Key layout shared by seed_redis.py, warm_redis_cache.py and the services.
+
+ARTICLE_LAYOUT=json (default):
+  article:{id}          JSON of the article, TTL ARTICLE_TTL_S
+  article:{id}:views    views counter (no TTL)
+  article:{id}:likes    likes counter (no TTL)
+
+ARTICLE_LAYOUT=bucketed — ARTICLE_BUCKET_SIZE articles per small hash, so
+Redis keeps them as one listpack instead of 2-3 top-level keys per article:
+  articles:{id // size}     hash, for slot = id % size:
+      {slot}                Avro record (schemas/cached-article.avsc)
+      v{slot} / l{slot}     views / likes counters (HINCRBY)
+  Needs hash-max-listpack-entries >= 3 * size and hash-max-listpack-value
+  above the record size (docker-compose sets 256 / 512); no per-article TTL.
+
+Both layouts:
+  top_articles          zset, member = article id, score = views
+  offsets:{group}       hash "topic:partition" -> next offset already applied
+                        to the counters above (consumers.py, redis-counters-group)
+
+ArticleCacheWriter buffers articles and writes each batch through one
+non-transactional pipeline: the layout's writes per article and a single ZADD
+with all members of the batch, i.e. one round-trip per batch instead of three
+per article. bench_redis_layouts.py compares memory and read latency.
+
+Counters and top_articles scores are live: redis-counters-group increments
+them. The writer only seeds missing ones (SET NX / HSETNX / ZADD NX) unless
+overwrite_counters=True, which is safe only while that group is stopped.
+
+Environment: REDIS_HOST, REDIS_PORT, REDIS_DB, ARTICLE_TTL_S, ARTICLE_LAYOUT,
+ARTICLE_BUCKET_SIZE
+"""
+
+import json
+import os
+import time
+from io import BytesIO
+from pathlib import Path
+
+REDIS_HOST    = os.getenv("REDIS_HOST", "localhost")
+REDIS_PORT    = int(os.getenv("REDIS_PORT", "6379"))
+REDIS_DB      = int(os.getenv("REDIS_DB", "0"))
+ARTICLE_TTL_S = int(os.getenv("ARTICLE_TTL_S", "3600"))
+ARTICLE_LAYOUT      = os.getenv("ARTICLE_LAYOUT", "json")
+ARTICLE_BUCKET_SIZE = int(os.getenv("ARTICLE_BUCKET_SIZE", "64"))
+
+SCHEMAS_DIR    = Path(os.getenv("SCHEMAS_DIR", Path(__file__).resolve().parent.parent / "schemas"))
+ARTICLE_SCHEMA = SCHEMAS_DIR / "cached-article.avsc"
+
+TOP_ARTICLES = "top_articles"
+
+
+def article_key(article_id) -> str:
+    return f"article:{article_id}"
+
+
+def views_key(article_id) -> str:
+    return f"article:{article_id}:views"
+
+
+def likes_key(article_id) -> str:
+    return f"article:{article_id}:likes"
+
+
+def offsets_key(group: str) -> str:
+    return f"offsets:{group}"
+
+
+def connect_redis(**overrides):
+    """redis.Redis for REDIS_HOST/PORT/DB; redis-py is imported lazily."""
+    import redis
+    params = {"host": REDIS_HOST, "port": REDIS_PORT, "db": REDIS_DB}
+    params.update(overrides)
+    return redis.Redis(**params)
+
+
+# ─── Layouts ─────────────────────────────────────────────────────────────────
+class JsonLayout:
+    """One JSON string and one counter key per article."""
+
+    name = "json"
+
+    def write(self, pipe, article: dict, ttl: int | None, counters: bool, overwrite: bool = False):
+        pipe.set(article_key(article["id"]), json.dumps(article, ensure_ascii=False, default=str), ex=ttl)
+        if counters:
+            pipe.set(views_key(article["id"]), article["views"], nx=not overwrite)
+            if "likes" in article:
+                pipe.set(likes_key(article["id"]), article["likes"], nx=not overwrite)
+
+    def read_many(self, client, article_ids: list) -> list:
+        """Articles (None for misses) with views/likes from the live counters."""
+        pipe = client.pipeline(transaction=False)
+        for article_id in article_ids:
+            pipe.get(article_key(article_id))
+            pipe.get(views_key(article_id))
+            pipe.get(likes_key(article_id))
+        replies = pipe.execute()
+        articles = []
+        for data, views, likes in zip(replies[::3], replies[1::3], replies[2::3]):
+            article = json.loads(data) if data is not None else None
+            if article is not None:
+                if views is not None:
+                    article["views"] = int(views)
+                if likes is not None:
+                    article["likes"] = int(likes)
+            articles.append(article)
+        return articles
+
+    def incr(self, pipe, article_id, views: int, likes: int):
+        if views:
+            pipe.incrby(views_key(article_id), views)
+        if likes:
+            pipe.incrby(likes_key(article_id), likes)
+
+
+class ArticleAvroCodec:
+    """Schemaless Avro for schemas/cached-article.avsc; fastavro is imported lazily."""
+
+    def __init__(self, schema_file: Path = ARTICLE_SCHEMA):
+        import fastavro
+
+        self._fastavro = fastavro
+        self._schema = fastavro.parse_schema(json.loads(schema_file.read_text(encoding="utf-8")))
+
+    def encode(self, article: dict) -> bytes:
+        buf = BytesIO()
+        self._fastavro.schemaless_writer(buf, self._schema, article)
+        return buf.getvalue()
+
+    def decode(self, data: bytes) -> dict:
+        return self._fastavro.schemaless_reader(BytesIO(data), self._schema, self._schema)
+
+
+class BucketedLayout:
+    """bucket_size articles per hash: Avro record + counters as fields."""
+
+    name = "bucketed"
+
+    def __init__(self, bucket_size: int = ARTICLE_BUCKET_SIZE, codec=None):
+        self.bucket_size = bucket_size
+        self.codec = codec or ArticleAvroCodec()
+
+    def location(self, article_id) -> tuple:
+        """(bucket key, slot) of an article."""
+        bucket, slot = divmod(int(article_id), self.bucket_size)
+        return f"articles:{bucket}", slot
+
+    def write(self, pipe, article: dict, ttl: int | None, counters: bool, overwrite: bool = False):
+        # ttl is ignored: a bucket is shared, an article cannot expire on its own
+        key, slot = self.location(article["id"])
+        fields = {slot: self.codec.encode(article)}
+        counter_fields = {}
+        if counters:
+            counter_fields[f"v{slot}"] = article["views"]
+            if "likes" in article:
+                counter_fields[f"l{slot}"] = article["likes"]
+        if overwrite:
+            fields.update(counter_fields)
+        else:
+            for field, value in counter_fields.items():
+                pipe.hsetnx(key, field, value)
+        pipe.hset(key, mapping=fields)
+
+    def read_many(self, client, article_ids: list) -> list:
+        pipe = client.pipeline(transaction=False)
+        for article_id in article_ids:
+            key, slot = self.location(article_id)
+            pipe.hmget(key, slot, f"v{slot}", f"l{slot}")
+        articles = []
+        for data, views, likes in pipe.execute():
+            article = self.codec.decode(data) if data is not None else None
+            if article is not None:
+                article["views"] = int(views) if views is not None else 0
+                if likes is not None:
+                    article["likes"] = int(likes)
+            articles.append(article)
+        return articles
+
+    def incr(self, pipe, article_id, views: int, likes: int):
+        key, slot = self.location(article_id)
+        if views:
+            pipe.hincrby(key, f"v{slot}", views)
+        if likes:
+            pipe.hincrby(key, f"l{slot}", likes)
+
+
+def make_layout(name: str = ARTICLE_LAYOUT):
+    if name == "json":
+        return JsonLayout()
+    if name == "bucketed":
+        return BucketedLayout()
+    raise ValueError(f"Unknown ARTICLE_LAYOUT {name!r}, expected json or bucketed")
+
+
+# ─── Batched writes ──────────────────────────────────────────────────────────
+class ArticleCacheWriter:
+    """
+    add(article) buffers, every batch_size articles the buffer is written with
+    one pipeline round-trip. article is a dict with at least "id" and "views".
+    Use as a context manager or call flush() at the end.
+    Existing counters and top_key scores are kept unless overwrite_counters.
+    """
+
+    def __init__(self, client, batch_size: int = 1000, ttl: int | None = ARTICLE_TTL_S,
+                 top_key: str | None = TOP_ARTICLES, counters: bool = True, layout=None,
+                 overwrite_counters: bool = False):
+        self.client     = client
+        self.batch_size = batch_size
+        self.ttl        = ttl
+        self.top_key    = top_key
+        self.counters   = counters
+        self.overwrite_counters = overwrite_counters
+        self.layout     = layout or make_layout()
+        self.pending    = []
+        self.written    = 0     # articles
+        self.commands   = 0     # Redis commands sent
+        self.round_trips = 0
+        self.started    = time.monotonic()
+
+    def add(self, article: dict):
+        self.pending.append(article)
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+        pipe = self.client.pipeline(transaction=False)
+        for article in self.pending:
+            self.layout.write(pipe, article, self.ttl, self.counters, self.overwrite_counters)
+        if self.top_key:
+            pipe.zadd(self.top_key, {article["id"]: article["views"] for article in self.pending},
+                      nx=not self.overwrite_counters)
+        commands = len(pipe)
+        pipe.execute()
+
+        self.written += len(self.pending)
+        self.commands += commands
+        self.round_trips += 1
+        self.pending.clear()
+
+    @property
+    def rate(self) -> float:
+        """Articles per second since the writer was created."""
+        return self.written / max(time.monotonic() - self.started, 1e-9)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.flush()
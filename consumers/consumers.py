@@ -10,21 +10,41 @@ Consumer Group 1: notifications-group
 Consumer Group 2: analytics-group
   - Subscribes to views + reactions
   - Persists stats to PostgreSQL
-  - Auto commit with at-least-once semantics
   - Retry logic with exponential backoff
+  - ANALYTICS_MODE=batch (default): poll() + per-article deltas flushed as one
+    multi-row upsert; applied offsets are stored in kafka_consumer_offsets in
+    the same transaction and are authoritative (sought to on assignment and
+    after a failed batch, records below them dropped), Kafka commits only
+    mirror them, so a failed Kafka commit never counts twice. A row PostgreSQL
+    rejects is isolated by bisecting the batch under savepoints and its events
+    go to the DLQ; undecodable events go to the DLQ straight away
+  - ANALYTICS_MODE=per-event: one upsert per event, auto commit with
+    at-least-once semantics, DLQ per failed event
+  - Reads only eventType + payload.articleId (PartialDecoder: Kafka headers
+    first); the full event is decoded only on the DLQ path
+
+Consumer Group 3: redis-counters-group
+  - Subscribes to views + reactions
+  - Same batching as analytics-group, deltas applied to the Redis counters
+    (views/likes of ARTICLE_LAYOUT, top_articles) in one MULTI/EXEC
+    together with the applied offsets (hash offsets:redis-counters-group),
+    which play the role of kafka_consumer_offsets
 """
 
 import asyncio
-import json
 import logging
 import os
 import time
 from datetime import datetime, timezone
 
 import psycopg2
-from kafka import KafkaConsumer, KafkaProducer
+import psycopg2.extras
+from kafka import ConsumerRebalanceListener, KafkaConsumer, KafkaProducer, TopicPartition
 from kafka.errors import KafkaError
 
+from common.event_codecs import EventDeserializer, EventSerializer, PartialDecoder, decode_any
+from common.redis_cache import TOP_ARTICLES, connect_redis, make_layout, offsets_key
+
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s %(levelname)s [%(name)s] %(message)s",
@@ -47,12 +67,24 @@ TOPIC_DLQ       = "news.events.dlq"
 MAX_RETRY_ATTEMPTS = 3
 RETRY_BACKOFF_BASE = 2  # seconds
 
+# analytics-group batching: "batch" (poll + multi-row upsert) or "per-event"
+ANALYTICS_MODE              = os.getenv("ANALYTICS_MODE", "batch")
+ANALYTICS_BATCH_SIZE        = int(os.getenv("ANALYTICS_BATCH_SIZE", "5000"))         # events per flush
+ANALYTICS_FLUSH_INTERVAL_MS = int(os.getenv("ANALYTICS_FLUSH_INTERVAL_MS", "1000"))  # max delay per flush
+ANALYTICS_POLL_TIMEOUT_MS   = 200
+
+ANALYTICS_GROUP      = "analytics-group"
+REDIS_COUNTERS_GROUP = "redis-counters-group"
+
+# The only fields analytics-group needs; everything else stays undecoded
+ANALYTICS_FIELDS = PartialDecoder({"eventType": str, "payload.articleId": int})
+
 
 # ─── DLQ Producer ─────────────────────────────────────────────────────────────
 def make_dlq_producer() -> KafkaProducer:
     return KafkaProducer(
         bootstrap_servers=BOOTSTRAP_SERVERS,
-        value_serializer=lambda v: json.dumps(v).encode("utf-8"),
+        value_serializer=EventSerializer(),
         key_serializer=lambda k: k.encode("utf-8") if k else None,
     )
 
@@ -72,6 +104,14 @@ def send_to_dlq(producer: KafkaProducer, original_topic: str,
     logger.warning(f"[DLQ] Sent to DLQ from topic={original_topic} key={key}: {error}")
 
 
+def materialize_event(msg) -> dict:
+    """Full event for a raw-bytes message (DLQ path of the partial-decoding consumers)."""
+    try:
+        return decode_any(msg.topic, msg.value)
+    except Exception:
+        return {"raw": msg.value.decode("utf-8", errors="replace")}
+
+
 # ─── Helper: retry wrapper ─────────────────────────────────────────────────────
 def with_retry(fn, *args, attempts=MAX_RETRY_ATTEMPTS, **kwargs):
     """Run fn with exponential backoff retries."""
@@ -130,6 +170,150 @@ def upsert_like_stats(conn, article_id: int):
     conn.commit()
 
 
+def upsert_stats_rows(cur, rows: list):
+    psycopg2.extras.execute_values(
+        cur,
+        """
+        INSERT INTO kafka_article_stats (article_id, view_count, like_count, updated_at)
+        VALUES %s
+        ON CONFLICT (article_id)
+        DO UPDATE SET
+            view_count = kafka_article_stats.view_count + EXCLUDED.view_count,
+            like_count = kafka_article_stats.like_count + EXCLUDED.like_count,
+            updated_at = NOW()
+        """,
+        rows,
+        template="(%s, %s, %s, NOW())",
+        page_size=len(rows),
+    )
+
+
+def write_stats_batch(conn, deltas: dict[int, list[int]], next_offsets: dict,
+                      group: str = ANALYTICS_GROUP, on_rejected=None) -> list[int]:
+    """
+    Apply accumulated {article_id: [views, likes]} deltas as one multi-row upsert
+    and store next_offsets {TopicPartition: offset} in the same transaction.
+
+    Rows are sorted by article_id so concurrent consumers lock rows in the same
+    order and cannot deadlock each other. A row PostgreSQL rejects (bad value,
+    constraint) is isolated by bisecting the batch under savepoints; the rest
+    is applied, on_rejected(article_ids) runs before COMMIT (DLQ), and the
+    rejected ids are returned.
+    """
+    rows = [(article_id, views, likes) for article_id, (views, likes) in sorted(deltas.items())]
+    rejected = []
+
+    def apply(cur, chunk):
+        cur.execute("SAVEPOINT stats_chunk")
+        try:
+            upsert_stats_rows(cur, chunk)
+        except (psycopg2.DataError, psycopg2.IntegrityError):
+            cur.execute("ROLLBACK TO SAVEPOINT stats_chunk")
+            if len(chunk) == 1:
+                rejected.append(chunk[0][0])
+                return
+            middle = len(chunk) // 2
+            apply(cur, chunk[:middle])
+            apply(cur, chunk[middle:])
+        else:
+            cur.execute("RELEASE SAVEPOINT stats_chunk")
+
+    try:
+        with conn.cursor() as cur:
+            if rows:
+                apply(cur, rows)
+            if next_offsets:
+                psycopg2.extras.execute_values(
+                    cur,
+                    """
+                    INSERT INTO kafka_consumer_offsets (group_id, topic, partition, next_offset, updated_at)
+                    VALUES %s
+                    ON CONFLICT (group_id, topic, partition)
+                    DO UPDATE SET next_offset = EXCLUDED.next_offset, updated_at = NOW()
+                    """,
+                    [(group, tp.topic, tp.partition, offset) for tp, offset in next_offsets.items()],
+                    template="(%s, %s, %s, %s, NOW())",
+                )
+        if rejected and on_rejected is not None:
+            on_rejected(rejected)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return rejected
+
+
+def ensure_offsets_table(conn):
+    """kafka_consumer_offsets is also in docker/init-kafka-tables.sql; this covers existing volumes."""
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS kafka_consumer_offsets (
+                group_id    VARCHAR(255),
+                topic       VARCHAR(255),
+                partition   INT,
+                next_offset BIGINT NOT NULL,
+                updated_at  TIMESTAMP DEFAULT NOW(),
+                PRIMARY KEY (group_id, topic, partition)
+            )
+            """
+        )
+    conn.commit()
+
+
+def load_stored_offsets(conn, group: str) -> dict:
+    """{TopicPartition: next offset} already applied to kafka_article_stats by group."""
+    with conn.cursor() as cur:
+        cur.execute(
+            "SELECT topic, partition, next_offset FROM kafka_consumer_offsets WHERE group_id = %s",
+            (group,),
+        )
+        rows = cur.fetchall()
+    conn.commit()
+    return {TopicPartition(topic, partition): offset for topic, partition, offset in rows}
+
+
+# ─── Redis helpers ─────────────────────────────────────────────────────────────
+def partition_field(tp: TopicPartition) -> str:
+    return f"{tp.topic}:{tp.partition}"
+
+
+def apply_redis_counters(client, deltas: dict, next_offsets: dict, layout,
+                         group: str = REDIS_COUNTERS_GROUP) -> int:
+    """
+    Apply per-partition {TopicPartition: {article_id: [views, likes]}} deltas
+    and store next_offsets {TopicPartition: offset} in one MULTI/EXEC.
+
+    The offsets hash is WATCHed and read first; partitions whose stored offset
+    already covers the batch are left out (a retry after a lost EXEC reply, a
+    redelivery after a crash between EXEC and the Kafka commit).
+    Returns the number of partitions applied.
+    """
+    key = offsets_key(group)
+    tps = list(next_offsets)
+
+    def apply(pipe):
+        stored = pipe.hmget(key, [partition_field(tp) for tp in tps])
+        fresh = [tp for tp, offset in zip(tps, stored) if offset is None or int(offset) < next_offsets[tp]]
+        totals = {}
+        for tp in fresh:
+            for article_id, (views, likes) in deltas.get(tp, {}).items():
+                total = totals.setdefault(article_id, [0, 0])
+                total[0] += views
+                total[1] += likes
+
+        pipe.multi()
+        for article_id, (views, likes) in totals.items():
+            layout.incr(pipe, article_id, views, likes)
+            if views:
+                pipe.zincrby(TOP_ARTICLES, views, article_id)
+        if fresh:
+            pipe.hset(key, mapping={partition_field(tp): next_offsets[tp] for tp in fresh})
+        return len(fresh)
+
+    return client.transaction(apply, key, value_from_callable=True)
+
+
 # ═══════════════════════════════════════════════════════════════════════════════
 # CONSUMER GROUP 1 — notifications-group
 #   • Manual offset commit (enable_auto_commit=False)
@@ -148,7 +332,7 @@ def run_notifications_consumer():
         group_id="notifications-group",
         enable_auto_commit=False,          # ← manual commit
         auto_offset_reset="earliest",
-        value_deserializer=lambda v: json.loads(v.decode("utf-8")),
+        value_deserializer=EventDeserializer(),
         key_deserializer=lambda k: k.decode("utf-8") if k else None,
         max_poll_records=100,
         session_timeout_ms=30_000,
@@ -202,13 +386,22 @@ def _handle_article_published_notification(event: dict):
 
 # ═══════════════════════════════════════════════════════════════════════════════
 # CONSUMER GROUP 2 — analytics-group
-#   • Auto commit (simpler, acceptable for analytics)
+#   • per-event: auto commit, one upsert + commit per event
+#   • batch:     one multi-row upsert + applied offsets per transaction,
+#                rejected rows isolated to the DLQ, Kafka commit mirrors offsets
 #   • Persists stats to PostgreSQL
 #   • Retry on DB errors
 # ═══════════════════════════════════════════════════════════════════════════════
 
 def run_analytics_consumer():
-    logger.info("Starting consumer group: analytics-group")
+    if ANALYTICS_MODE == "batch":
+        run_analytics_consumer_batched()
+    else:
+        run_analytics_consumer_per_event()
+
+
+def run_analytics_consumer_per_event():
+    logger.info("Starting consumer group: analytics-group (per-event)")
 
     consumer = KafkaConsumer(
         TOPIC_VIEWS,
@@ -218,7 +411,7 @@ def run_analytics_consumer():
         enable_auto_commit=True,           # ← auto commit
         auto_commit_interval_ms=5_000,
         auto_offset_reset="earliest",
-        value_deserializer=lambda v: json.loads(v.decode("utf-8")),
+        # raw bytes: fields come from ANALYTICS_FIELDS.extract()
         key_deserializer=lambda k: k.decode("utf-8") if k else None,
     )
 
@@ -232,10 +425,20 @@ def run_analytics_consumer():
                 logger.info("[ANALYTICS] Connected to PostgreSQL")
 
             for msg in consumer:
-                event      = msg.value
-                event_type = event.get("eventType", "UNKNOWN")
-                payload    = event.get("payload", {})
-                article_id = payload.get("articleId")
+                try:
+                    fields = ANALYTICS_FIELDS.extract(msg.topic, msg.value, msg.headers)
+                except Exception as exc:
+                    logger.error(f"[ANALYTICS] Undecodable event at {msg.topic}@{msg.offset}: {exc}")
+                    send_to_dlq(
+                        dlq_producer,
+                        original_topic=msg.topic,
+                        message=materialize_event(msg),
+                        error=f"Undecodable event: {exc}",
+                        key=msg.key,
+                    )
+                    continue
+                event_type = fields["eventType"] or "UNKNOWN"
+                article_id = fields["payload.articleId"]
 
                 logger.info(
                     f"[ANALYTICS] topic={msg.topic} eventType={event_type} articleId={article_id}"
@@ -252,7 +455,7 @@ def run_analytics_consumer():
                     send_to_dlq(
                         dlq_producer,
                         original_topic=msg.topic,
-                        message=event,
+                        message=materialize_event(msg),
                         error=str(exc),
                         key=msg.key,
                     )
@@ -267,6 +470,305 @@ def run_analytics_consumer():
             pg_conn = None  # force reconnect
 
 
+# ─── analytics-group: batched mode ────────────────────────────────────────────
+class AnalyticsBatch(ConsumerRebalanceListener):
+    """
+    Per-article view/like deltas accumulated since the last successful flush.
+    Doubles as the rebalance listener: pending deltas are flushed and committed
+    before partitions are handed to another group member.
+
+    Applied offsets live next to the counters (kafka_consumer_offsets, written
+    in the stats transaction) and are authoritative: partitions are sought to
+    them on assignment and after a failed batch, and records below them are
+    dropped. Kafka commits only mirror them, so a lost commit never counts a
+    record twice.
+    """
+
+    group   = ANALYTICS_GROUP
+    log_tag = "ANALYTICS"
+
+    def __init__(self, consumer: KafkaConsumer, dlq_producer: KafkaProducer):
+        self.consumer     = consumer
+        self.dlq_producer = dlq_producer
+        self.pg_conn      = None
+        self.deltas       = {}     # article_id -> [views, likes]
+        self.sources      = {}     # article_id -> records counted into it (DLQ on a rejected row)
+        self.consumed     = 0      # records polled since last commit
+        self.first_offsets = {}    # TopicPartition -> first uncommitted offset
+        self.next_offsets = {}     # TopicPartition -> offset after the last polled record
+        self.stored       = {}     # TopicPartition -> offset already applied to the store
+        self.rewind_to    = {}     # TopicPartition -> fallback seek for partitions the store doesn't know
+        self.needs_seek   = False
+        self.last_flush   = time.monotonic()
+
+    def add(self, msg):
+        tp = TopicPartition(msg.topic, msg.partition)
+        if msg.offset < self.stored.get(tp, 0):
+            return  # already applied (redelivered after a lost Kafka commit)
+        self.first_offsets.setdefault(tp, msg.offset)
+        self.next_offsets[tp] = msg.offset + 1
+        self.consumed += 1
+
+        try:
+            fields = ANALYTICS_FIELDS.extract(msg.topic, msg.value, msg.headers)
+        except Exception as exc:
+            self.dead_letter([msg], f"Undecodable event: {exc}")
+            return
+        event_type = fields["eventType"]
+        article_id = fields["payload.articleId"]
+        if not article_id:
+            return
+        if event_type == "ArticleViewed":
+            self.deltas_for(msg).setdefault(article_id, [0, 0])[0] += 1
+        elif event_type == "ArticleLiked":
+            self.deltas_for(msg).setdefault(article_id, [0, 0])[1] += 1
+        else:
+            return
+        self.sources.setdefault(article_id, []).append(msg)
+
+    def deltas_for(self, msg) -> dict:
+        """{article_id: [views, likes]} the message is counted into."""
+        return self.deltas
+
+    def dead_letter(self, msgs, error: str):
+        for msg in msgs:
+            send_to_dlq(
+                self.dlq_producer,
+                original_topic=msg.topic,
+                message=materialize_event(msg),
+                error=error,
+                key=msg.key,
+            )
+
+    def reject(self, article_ids):
+        """Rows PostgreSQL refused: their records go to the DLQ instead of stalling the partition."""
+        for article_id in article_ids:
+            logger.error(f"[ANALYTICS] Row for article {article_id} rejected, sending its events to DLQ")
+            self.dead_letter(self.sources.get(article_id, []), f"Rejected by PostgreSQL: article {article_id}")
+
+    def due(self) -> bool:
+        if not self.consumed:
+            return False
+        if self.consumed >= ANALYTICS_BATCH_SIZE:
+            return True
+        return (time.monotonic() - self.last_flush) * 1000 >= ANALYTICS_FLUSH_INTERVAL_MS
+
+    def flush(self):
+        """Upsert deltas + offsets in one transaction, then mirror the offsets to Kafka."""
+        if self.consumed:
+            started = time.monotonic()
+            rejected = write_stats_batch(self.pg_conn, self.deltas, self.next_offsets, self.group,
+                                         on_rejected=self.reject)
+            logger.info(
+                f"[ANALYTICS] Flushed {self.consumed} events as {len(self.deltas) - len(rejected)} rows "
+                f"({len(rejected)} rejected) in {(time.monotonic() - started) * 1000:.1f}ms"
+            )
+            self.stored.update(self.next_offsets)
+            self.consumer.commit()
+        self.reset()
+
+    def rewind(self):
+        """
+        Drop the failed batch. Whether the store applied it is unknown here (lost
+        COMMIT/EXEC reply, failed Kafka commit), so resume() seeks to the stored
+        offsets before the next poll instead of Kafka's first uncommitted offset.
+        """
+        for tp, offset in self.first_offsets.items():
+            self.rewind_to.setdefault(tp, offset)
+        self.reset()
+        self.needs_seek = True
+
+    def resume(self):
+        """Finish a pending rewind; raises (and stays pending) while the store is down."""
+        if not self.needs_seek:
+            return
+        self.seek_to_stored(self.consumer.assignment(), self.rewind_to)
+        self.rewind_to.clear()
+        self.needs_seek = False
+
+    def load_offsets(self) -> dict:
+        return load_stored_offsets(self.pg_conn, self.group)
+
+    def seek_to_stored(self, tps, fallback=None):
+        """Seek to the stored offset, or to fallback for partitions the store has no offset for."""
+        self.stored = self.load_offsets()
+        fallback = fallback or {}
+        for tp in tps:
+            offset = self.stored.get(tp, fallback.get(tp))
+            if offset is not None:
+                self.consumer.seek(tp, offset)
+
+    def reset(self):
+        self.deltas.clear()
+        self.sources.clear()
+        self.first_offsets.clear()
+        self.next_offsets.clear()
+        self.consumed   = 0
+        self.last_flush = time.monotonic()
+
+    def on_partitions_revoked(self, revoked):
+        if not self.consumed:
+            return
+        try:
+            self.flush()
+        except Exception as exc:
+            # Uncommitted records will be redelivered to the new owner
+            logger.error(f"[{self.log_tag}] Flush on revoke failed: {exc}")
+            self.reset()
+
+    def on_partitions_assigned(self, assigned):
+        with_retry(self.seek_to_stored, assigned)
+        logger.info(
+            f"[{self.log_tag}] Assigned partitions: "
+            f"{sorted((tp.topic, tp.partition, self.stored.get(tp)) for tp in assigned)}"
+        )
+
+
+def run_analytics_consumer_batched():
+    logger.info(
+        f"Starting consumer group: analytics-group (batch size={ANALYTICS_BATCH_SIZE}, "
+        f"interval={ANALYTICS_FLUSH_INTERVAL_MS}ms)"
+    )
+
+    consumer = KafkaConsumer(
+        bootstrap_servers=BOOTSTRAP_SERVERS,
+        group_id=ANALYTICS_GROUP,
+        enable_auto_commit=False,          # ← commit only after a successful flush
+        auto_offset_reset="earliest",
+        # raw bytes: fields come from ANALYTICS_FIELDS.extract()
+        key_deserializer=lambda k: k.decode("utf-8") if k else None,
+        max_poll_records=ANALYTICS_BATCH_SIZE,
+        session_timeout_ms=30_000,
+        heartbeat_interval_ms=10_000,
+    )
+    batch = AnalyticsBatch(consumer, make_dlq_producer())
+    consumer.subscribe([TOPIC_VIEWS, TOPIC_REACTIONS], listener=batch)
+
+    while True:
+        try:
+            if batch.pg_conn is None or batch.pg_conn.closed:
+                batch.pg_conn = with_retry(get_pg_conn)
+                ensure_offsets_table(batch.pg_conn)
+                logger.info("[ANALYTICS] Connected to PostgreSQL")
+            batch.resume()
+
+            records = consumer.poll(
+                timeout_ms=ANALYTICS_POLL_TIMEOUT_MS,
+                max_records=ANALYTICS_BATCH_SIZE - batch.consumed or 1,
+            )
+            for msgs in records.values():
+                for msg in msgs:
+                    batch.add(msg)
+
+            if batch.due():
+                batch.flush()
+
+        except KafkaError as ke:
+            logger.error(f"[ANALYTICS] Kafka error: {ke}. Reconnecting in 5s…")
+            batch.rewind()
+            time.sleep(5)
+
+        except Exception as exc:
+            logger.error(f"[ANALYTICS] Batch flush failed: {exc}", exc_info=True)
+            batch.rewind()
+            time.sleep(5)
+            batch.pg_conn = None  # force reconnect
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# CONSUMER GROUP 3 — redis-counters-group
+#   • analytics-group batching, deltas go to Redis instead of PostgreSQL
+#   • Counters and applied offsets change in one MULTI/EXEC
+#   • Kafka commits only mirror the Redis offsets (lag monitoring)
+# ═══════════════════════════════════════════════════════════════════════════════
+
+class RedisCountersBatch(AnalyticsBatch):
+    """
+    AnalyticsBatch with deltas kept per partition: a partition that is
+    already applied can be dropped from a batch without touching the others.
+    Applied offsets are stored in Redis next to the counters.
+    """
+
+    group   = REDIS_COUNTERS_GROUP
+    log_tag = "REDIS"
+
+    def __init__(self, consumer: KafkaConsumer, dlq_producer: KafkaProducer, redis_client):
+        super().__init__(consumer, dlq_producer)
+        self.redis  = redis_client
+        self.layout = make_layout()   # ARTICLE_LAYOUT: where the counters live
+
+    def deltas_for(self, msg) -> dict:
+        return self.deltas.setdefault(TopicPartition(msg.topic, msg.partition), {})
+
+    def flush(self):
+        """Apply deltas + offsets to Redis, then mirror the offsets to Kafka."""
+        if self.consumed:
+            started = time.monotonic()
+            applied = with_retry(apply_redis_counters, self.redis, self.deltas, self.next_offsets, self.layout)
+            articles = sum(len(d) for d in self.deltas.values())
+            logger.info(
+                f"[REDIS] Applied {self.consumed} events as {articles} article deltas "
+                f"({applied}/{len(self.next_offsets)} partitions new) "
+                f"in {(time.monotonic() - started) * 1000:.1f}ms"
+            )
+            self.stored.update(self.next_offsets)
+            self.consumer.commit()
+        self.reset()
+
+    def load_offsets(self) -> dict:
+        stored = self.redis.hgetall(offsets_key(self.group))
+        offsets = {}
+        for field, offset in stored.items():
+            topic, partition = field.decode().rsplit(":", 1)
+            offsets[TopicPartition(topic, int(partition))] = int(offset)
+        return offsets
+
+
+def run_redis_counters_consumer():
+    logger.info(
+        f"Starting consumer group: {REDIS_COUNTERS_GROUP} (batch size={ANALYTICS_BATCH_SIZE}, "
+        f"interval={ANALYTICS_FLUSH_INTERVAL_MS}ms)"
+    )
+
+    consumer = KafkaConsumer(
+        bootstrap_servers=BOOTSTRAP_SERVERS,
+        group_id=REDIS_COUNTERS_GROUP,
+        enable_auto_commit=False,
+        auto_offset_reset="earliest",
+        key_deserializer=lambda k: k.decode("utf-8") if k else None,
+        max_poll_records=ANALYTICS_BATCH_SIZE,
+        session_timeout_ms=30_000,
+        heartbeat_interval_ms=10_000,
+    )
+    batch = RedisCountersBatch(consumer, make_dlq_producer(), connect_redis())
+    consumer.subscribe([TOPIC_VIEWS, TOPIC_REACTIONS], listener=batch)
+
+    while True:
+        try:
+            batch.resume()
+
+            records = consumer.poll(
+                timeout_ms=ANALYTICS_POLL_TIMEOUT_MS,
+                max_records=ANALYTICS_BATCH_SIZE - batch.consumed or 1,
+            )
+            for msgs in records.values():
+                for msg in msgs:
+                    batch.add(msg)
+
+            if batch.due():
+                batch.flush()
+
+        except KafkaError as ke:
+            logger.error(f"[REDIS] Kafka error: {ke}. Reconnecting in 5s…")
+            batch.rewind()
+            time.sleep(5)
+
+        except Exception as exc:
+            logger.error(f"[REDIS] Batch apply failed: {exc}", exc_info=True)
+            batch.rewind()
+            time.sleep(5)
+
+
 # ─── Entrypoint ───────────────────────────────────────────────────────────────
 if __name__ == "__main__":
     group = CONSUMER_GROUP
@@ -275,6 +777,8 @@ if __name__ == "__main__":
         run_notifications_consumer()
     elif group == "analytics-group":
         run_analytics_consumer()
+    elif group == REDIS_COUNTERS_GROUP:
+        run_redis_counters_consumer()
     else:
         logger.error(f"Unknown CONSUMER_GROUP: {group}")
         raise SystemExit(1)
\ No newline at end of file
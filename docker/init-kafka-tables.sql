@@ -6,6 +6,16 @@ CREATE TABLE IF NOT EXISTS kafka_article_stats (
     updated_at  TIMESTAMP DEFAULT NOW()
 );
 
+-- analytics-group: применённые offsets (пишутся в одной транзакции со статистикой)
+CREATE TABLE IF NOT EXISTS kafka_consumer_offsets (
+    group_id    VARCHAR(255),
+    topic       VARCHAR(255),
+    partition   INT,
+    next_offset BIGINT NOT NULL,
+    updated_at  TIMESTAMP DEFAULT NOW(),
+    PRIMARY KEY (group_id, topic, partition)
+);
+
 -- Kafka Streams: оконные агрегаты по категориям
 CREATE TABLE IF NOT EXISTS kafka_category_windows (
     id            SERIAL PRIMARY KEY,
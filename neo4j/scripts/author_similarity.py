@@ -0,0 +1,226 @@
+"""
+Материализованная похожесть авторов по общим тегам.
+
+    python author_similarity.py rebuild [--batch-size 500]
+    PYTHONPATH=../.. python author_similarity.py follow [--bootstrap localhost:9092]
+
+Запросы 7 и 14 (queries.py) раскрывают Author-WROTE-Article-HAS_TAG-Tag-...-Author
+на каждом вызове — число путей растёт квадратично от числа статей. Здесь
+этот обход считается заранее в два слоя:
+
+  (:Author)-[:USES_TAG]->(:Tag)            автор хотя бы раз писал с тегом;
+  (:Author)-[:SHARES_TAGS {count, tags}]->(:Author)
+                                           общие теги пары, одна связь на пару
+                                           (от меньшего email к большему).
+
+"Авторы с общими тегами" — один переход по SHARES_TAGS.
+
+rebuild — полный пересчёт по текущему графу (после seed.py / импорта).
+follow  — consumer news.articles.events: каждое ArticlePublished добавляет
+статью, WROTE и HAS_TAG, а SHARES_TAGS пересчитывается только для авторов,
+у которых появился новый USES_TAG. Пересчёт пары идёт по слою USES_TAG
+(авторы × теги, не статьи) и ставит значения через SET, поэтому повтор
+события после сбоя ничего не удваивает: offsets коммитятся после записи.
+Удаление статей здесь не учитывается — для этого rebuild.
+
+После каждой пачки follow публикует затронутых авторов в
+neo4j.authors.changed ({"authors": [...]}) — по нему кэши
+ReachabilityService в других процессах вызывают invalidate()
+(reachability.py, follow_invalidations).
+"""
+
+import argparse
+import json
+import os
+import random
+import time
+
+from neo4j_client import Neo4jClient
+from seed import cat_tags
+
+TOPIC_ARTICLES  = "news.articles.events"
+TOPIC_AUTHORS_CHANGED = "neo4j.authors.changed"
+SIMILARITY_GROUP = "neo4j-similarity-group"
+
+INDEXES = [
+    "CREATE INDEX shares_tags_count IF NOT EXISTS FOR ()-[s:SHARES_TAGS]-() ON (s.count)",
+]
+
+# ── ПОЛНЫЙ ПЕРЕСЧЁТ ────────────────────────────────────────
+DROP_CYPHER = """
+MATCH ()-[r:{type}]->()
+CALL {{ WITH r DELETE r }} IN TRANSACTIONS OF 10000 ROWS
+"""
+
+USES_TAG_CYPHER = """
+UNWIND $authors AS email
+MATCH (au:Author {email: email})-[:WROTE]->(:Article)-[:HAS_TAG]->(t:Tag)
+WITH DISTINCT au, t
+MERGE (au)-[:USES_TAG]->(t)
+"""
+
+# Пары для авторов из $authors; lower_only — только пары, где автор меньший
+# (при полном пересчёте каждая пара считается один раз)
+PAIRS_CYPHER = """
+UNWIND $authors AS email
+MATCH (a1:Author {email: email})-[:USES_TAG]->(t:Tag)<-[:USES_TAG]-(a2:Author)
+WHERE a1 <> a2 AND (NOT $lower_only OR a1.email < a2.email)
+WITH a1, a2, collect(t.name) AS tags
+WITH CASE WHEN a1.email < a2.email THEN a1 ELSE a2 END AS low,
+     CASE WHEN a1.email < a2.email THEN a2 ELSE a1 END AS high,
+     tags
+MERGE (low)-[s:SHARES_TAGS]->(high)
+SET s.count = size(tags), s.tags = tags
+"""
+
+# ── ИНКРЕМЕНТАЛЬНО: пачка ArticlePublished ─────────────────
+# Возвращает авторов, у которых появился новый тег (только им нужен PAIRS_CYPHER).
+# Автор и теги — MERGE: producer берёт authorId из 1..100, а seed.py по
+# умолчанию создаёт 25 авторов; MATCH молча терял бы такие статьи
+PUBLISHED_CYPHER = """
+UNWIND $rows AS row
+MERGE (art:Article {id: row.id})
+SET art.title = row.title, art.category = row.category, art.publishDate = row.publishDate
+WITH art, row
+MERGE (au:Author {email: row.author})
+  ON CREATE SET au.name = row.authorName
+MERGE (au)-[:WROTE {publishedAt: row.publishDate}]->(art)
+WITH art, au, row
+UNWIND row.tags AS tag
+MERGE (t:Tag {name: tag})
+MERGE (art)-[:HAS_TAG]->(t)
+WITH au, t
+OPTIONAL MATCH (au)-[known:USES_TAG]->(t)
+WITH au, t, known IS NULL AS added
+MERGE (au)-[:USES_TAG]->(t)
+WITH au, added WHERE added
+RETURN DISTINCT au.email AS author
+"""
+
+
+def chunks(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def rebuild(client, batch_size):
+    started = time.monotonic()
+    for statement in INDEXES:
+        client.query(statement)
+    for rel_type in ("SHARES_TAGS", "USES_TAG"):
+        client.query(DROP_CYPHER.format(type=rel_type))
+    print("✅ Old USES_TAG / SHARES_TAGS removed")
+
+    authors = [r["email"] for r in client.query("MATCH (a:Author) RETURN a.email AS email ORDER BY email")]
+    for batch in chunks(authors, batch_size):
+        client.write(USES_TAG_CYPHER, authors=batch)
+    print(f"✅ USES_TAG for {len(authors):,} authors")
+
+    pairs = 0
+    for batch in chunks(authors, batch_size):
+        summary = client.write(PAIRS_CYPHER, authors=batch, lower_only=True)
+        pairs += summary.counters.relationships_created
+    print(f"🎉 SHARES_TAGS: {pairs:,} pairs in {time.monotonic() - started:.1f}s")
+
+
+# ── СОБЫТИЯ ────────────────────────────────────────────────
+def article_tags(payload):
+    """Теги статьи: из события, а если их там нет — по категории, как в seed.py."""
+    if payload.get("tags"):
+        return list(payload["tags"])
+    options = cat_tags.get(payload["categoryName"], [])
+    # Детерминированно по articleId: повтор события даёт те же теги
+    return random.Random(payload["articleId"]).sample(options, k=min(2, len(options)))
+
+
+def published_row(event):
+    payload = event["payload"]
+    return {
+        "id":          f"art{payload['articleId']}",
+        "title":       payload["title"],
+        "category":    payload["categoryName"],
+        "publishDate": payload["publishDate"][:10],
+        "author":      f"author{payload['authorId']}@news.com",
+        # Имя по id, как в seed.py (authorName в событии может быть от другого id)
+        "authorName":  f"Author_{payload['authorId']} LastName_{payload['authorId']}",
+        "tags":        article_tags(payload),
+    }
+
+
+def apply_published(client, rows, on_changed=None):
+    """
+    Пачка статей → новые HAS_TAG/USES_TAG → пересчёт пар затронутых авторов.
+    on_changed(authors) вызывается после записи (например, ReachabilityService.invalidate).
+    """
+    changed = [r["author"] for r in client.session().execute_write(
+        lambda tx: list(tx.run(PUBLISHED_CYPHER, rows=rows)))]
+    if changed:
+        client.write(PAIRS_CYPHER, authors=changed, lower_only=False)
+        if on_changed is not None:
+            on_changed(changed)
+    return changed
+
+
+def follow(client, args):
+    # Kafka и декодеры нужны только этому режиму (общий пакет common — из корня репозитория)
+    from kafka import KafkaConsumer, KafkaProducer
+    from common.event_codecs import EventDeserializer
+
+    for statement in INDEXES:
+        client.query(statement)
+    consumer = KafkaConsumer(
+        TOPIC_ARTICLES,
+        bootstrap_servers=args.bootstrap,
+        group_id=SIMILARITY_GROUP,
+        enable_auto_commit=False,
+        auto_offset_reset="earliest",
+        value_deserializer=EventDeserializer(),
+        max_poll_records=args.batch_size,
+    )
+    producer = KafkaProducer(
+        bootstrap_servers=args.bootstrap,
+        value_serializer=lambda v: json.dumps(v).encode("utf-8"),
+        acks="all",
+    )
+
+    def publish_changed(authors):
+        producer.send(TOPIC_AUTHORS_CHANGED, {"authors": authors})
+
+    print(f"👂 {SIMILARITY_GROUP}: {TOPIC_ARTICLES} @ {args.bootstrap} → {TOPIC_AUTHORS_CHANGED}")
+    try:
+        while True:
+            records = consumer.poll(timeout_ms=1000, max_records=args.batch_size)
+            rows = [published_row(msg.value)
+                    for msgs in records.values() for msg in msgs
+                    if msg.value and msg.value.get("eventType") == "ArticlePublished"]
+            if rows:
+                changed = apply_published(client, rows, on_changed=publish_changed)
+                print(f"  +{len(rows)} articles, SHARES_TAGS updated for {len(changed)} authors")
+            if records:
+                # Инвалидации — до коммита: при сбое пачка повторится вместе с ними
+                producer.flush()
+                consumer.commit()
+    finally:
+        consumer.close()
+        producer.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("mode", choices=["rebuild", "follow"])
+    parser.add_argument("--batch-size", type=int, default=500,
+                        help="авторов на транзакцию (rebuild) / событий на пачку (follow)")
+    parser.add_argument("--bootstrap", default=os.getenv("KAFKA_BOOTSTRAP_SERVERS", "localhost:9092"))
+    args = parser.parse_args()
+    if args.batch_size < 1:
+        parser.error("--batch-size должно быть >= 1")
+
+    with Neo4jClient() as client:
+        if args.mode == "rebuild":
+            rebuild(client, args.batch_size)
+        else:
+            follow(client, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+"""
+Выгрузка PostgreSQL → CSV для офлайн-импорта `neo4j-admin database import full`.
+
+    PYTHONPATH=../.. python export_postgres_csv.py [--output ../import/graph] [--chunk-rows 1000000] [--fetch-size 50000]
+
+Таблицы читаются серверными курсорами (память — одна выборка), строки
+пишутся в куски по --chunk-rows строк, сжатые gzip (neo4j-admin читает .gz
+сам). Заголовки — отдельными файлами *_header.csv, поэтому куски можно
+склеивать регулярным выражением в --nodes/--relationships.
+
+Модель графа та же, что у seed.py:
+  (:Article {id: "art<news.id>"}), (:Author {email}), (:Source {name}),
+  (:Category {name}), (:Tag {name});
+  WROTE, PUBLISHED_IN, IN_CATEGORY, HAS_TAG.
+tags/news_tags выгружаются, только если такие таблицы есть (генератор
+agregatorCreate.py их не создаёт). В конце печатается команда импорта.
+Подключение — common/postgres.py (POSTGRES_*), поэтому PYTHONPATH — корень репозитория.
+"""
+
+import argparse
+import csv
+import gzip
+import time
+from pathlib import Path
+
+from common.postgres import connect
+
+DEFAULT_OUTPUT = Path(__file__).resolve().parent.parent / "import" / "graph"
+
+# Ключ автора: email, а если его нет — синтетический (ID должен быть у каждого узла)
+AUTHOR_ID_SQL = "COALESCE(a.email, 'author-' || a.id)"
+
+# ── УЗЛЫ: имя файла → (заголовок neo4j-admin, запрос) ─────────
+NODES = {
+    "categories": (
+        ["name:ID(Category)", "description", ":LABEL"],
+        "SELECT name, description, 'Category' FROM categories",
+    ),
+    "sources": (
+        ["name:ID(Source)", "website", "country", ":LABEL"],
+        "SELECT name, website_url, country, 'Source' FROM sources",
+    ),
+    "authors": (
+        ["email:ID(Author)", "name", "bio", ":LABEL"],
+        f"SELECT {AUTHOR_ID_SQL}, a.first_name || ' ' || a.last_name, a.bio, 'Author' FROM authors a",
+    ),
+}
+
+TAG_NODES = (
+    ["name:ID(Tag)", ":LABEL"],
+    "SELECT DISTINCT name, 'Tag' FROM tags",
+)
+
+# Одно чтение news даёт узлы Article и три вида связей
+ARTICLE_FILES = {
+    "articles":     ["id:ID(Article)", "title", "category", "views:long", "likes:long", "shares:long",
+                     "publishDate", ":LABEL"],
+    "wrote":        [":START_ID(Author)", "publishedAt", ":END_ID(Article)", ":TYPE"],
+    "published_in": [":START_ID(Article)", ":END_ID(Source)", ":TYPE"],
+    "in_category":  [":START_ID(Article)", ":END_ID(Category)", ":TYPE"],
+}
+
+ARTICLES_SQL = f"""
+SELECT n.id, n.title, c.name, n.views_count, n.likes_count, n.shares_count,
+       to_char(n.publish_date, 'YYYY-MM-DD'), {AUTHOR_ID_SQL}, s.name
+FROM news n
+LEFT JOIN categories c ON c.id = n.category_id
+LEFT JOIN authors a ON a.id = n.author_id
+LEFT JOIN sources s ON s.id = n.source_id
+"""
+
+HAS_TAG = (
+    [":START_ID(Article)", ":END_ID(Tag)", ":TYPE"],
+    "SELECT 'art' || nt.news_id, t.name, 'HAS_TAG' FROM news_tags nt JOIN tags t ON t.id = nt.tag_id",
+)
+
+
+class ChunkedCsv:
+    """<name>_header.csv + <name>.partNNNN.csv.gz по chunk_rows строк."""
+
+    def __init__(self, directory: Path, name: str, header: list, chunk_rows: int, compresslevel: int):
+        self.directory     = directory
+        self.name          = name
+        self.chunk_rows    = chunk_rows
+        self.compresslevel = compresslevel
+        self.rows          = 0
+        self.chunks        = 0
+        self._file         = None
+        self._writer       = None
+        self._in_chunk     = 0
+        with open(directory / f"{name}_header.csv", "w", newline="", encoding="utf-8") as f:
+            csv.writer(f).writerow(header)
+
+    def write(self, row):
+        if self._file is None or self._in_chunk >= self.chunk_rows:
+            self._rotate()
+        self._writer.writerow(row)
+        self._in_chunk += 1
+        self.rows += 1
+
+    def _rotate(self):
+        self.close()
+        path = self.directory / f"{self.name}.part{self.chunks:04d}.csv.gz"
+        self._file = gzip.open(path, "wt", newline="", encoding="utf-8", compresslevel=self.compresslevel)
+        self._writer = csv.writer(self._file)
+        self._in_chunk = 0
+        self.chunks += 1
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def finish(self):
+        """Закрывает последний кусок; пустая таблица всё равно даёт один (пустой) кусок."""
+        if self.chunks == 0:
+            self._rotate()
+        self.close()
+
+    def pattern(self, import_dir: str) -> str:
+        """Файлы для neo4j-admin: заголовок и регулярное выражение кусков."""
+        return f"{import_dir}/{self.name}_header.csv,{import_dir}/{self.name}.part[0-9]+.csv.gz"
+
+
+def remove_previous(directory: Path):
+    """Удаляет прошлую выгрузку (только свои файлы — в каталоге может лежать tags.csv)."""
+    names = [*NODES, *ARTICLE_FILES, "tags", "has_tag"]
+    for name in names:
+        for old in [*directory.glob(f"{name}_header.csv"), *directory.glob(f"{name}.part*.csv.gz")]:
+            old.unlink()
+
+
+def stream(conn, name, query, fetch_size):
+    """Серверный курсор: строки приходят пачками по fetch_size."""
+    with conn.cursor(name=f"export_{name}") as cur:
+        cur.itersize = fetch_size
+        cur.execute(query)
+        yield from cur
+
+
+def table_exists(conn, table) -> bool:
+    with conn.cursor() as cur:
+        cur.execute("SELECT to_regclass(%s) IS NOT NULL", (table,))
+        return cur.fetchone()[0]
+
+
+def export_simple(conn, directory, name, header, query, args, report):
+    out = ChunkedCsv(directory, name, header, args.chunk_rows, args.compresslevel)
+    try:
+        for row in stream(conn, name, query, args.fetch_size):
+            out.write(row)
+    finally:
+        out.finish()
+    report(out)
+    return out
+
+
+def export_articles(conn, directory, args, report):
+    outs = {name: ChunkedCsv(directory, name, header, args.chunk_rows, args.compresslevel)
+            for name, header in ARTICLE_FILES.items()}
+    articles, wrote, published_in, in_category = outs.values()
+    started = time.monotonic()
+    try:
+        for (news_id, title, category, views, likes, shares, publish_date,
+             author, source) in stream(conn, "news", ARTICLES_SQL, args.fetch_size):
+            article_id = f"art{news_id}"
+            articles.write((article_id, title, category, views, likes, shares, publish_date, "Article"))
+            if author is not None:
+                wrote.write((author, publish_date, article_id, "WROTE"))
+            if source is not None:
+                published_in.write((article_id, source, "PUBLISHED_IN"))
+            if category is not None:
+                in_category.write((article_id, category, "IN_CATEGORY"))
+            if articles.rows % args.report_every == 0:
+                print(f"  articles: {articles.rows:,} "
+                      f"({articles.rows / (time.monotonic() - started):,.0f} rows/s)")
+    finally:
+        for out in outs.values():
+            out.finish()
+    for out in outs.values():
+        report(out)
+    return outs
+
+
+def import_command(nodes, relationships, import_dir, database):
+    # В кавычках: [0-9]+ — регулярное выражение для neo4j-admin, а не glob для shell
+    args = [f"--nodes='{out.pattern(import_dir)}'" for out in nodes]
+    args += [f"--relationships='{out.pattern(import_dir)}'" for out in relationships]
+    return " \\\n    ".join(
+        ["neo4j-admin database import full", *args,
+         "--overwrite-destination=true", "--skip-duplicate-nodes=true", database]
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT, help="каталог для CSV")
+    parser.add_argument("--chunk-rows", type=int, default=1_000_000, help="строк в одном .csv.gz")
+    parser.add_argument("--fetch-size", type=int, default=50_000, help="строк за одну выборку курсора")
+    parser.add_argument("--compresslevel", type=int, default=1, choices=range(1, 10),
+                        help="уровень gzip: 1 — быстрее, 9 — меньше")
+    parser.add_argument("--database", default="neo4j", help="база, в которую импортировать")
+    parser.add_argument("--import-dir", default="/var/lib/neo4j/import/graph",
+                        help="где CSV будут лежать для neo4j-admin (внутри контейнера)")
+    parser.add_argument("--report-every", type=int, default=500_000)
+    args = parser.parse_args()
+    if args.chunk_rows < 1 or args.fetch_size < 1:
+        parser.error("--chunk-rows и --fetch-size должны быть >= 1")
+
+    args.output.mkdir(parents=True, exist_ok=True)
+    remove_previous(args.output)
+
+    started = time.monotonic()
+
+    def report(out):
+        print(f"✅ {out.name}: {out.rows:,} rows in {out.chunks} chunks "
+              f"({time.monotonic() - started:.1f}s since start)")
+
+    conn = connect()
+    try:
+        nodes = [export_simple(conn, args.output, name, header, query, args, report)
+                 for name, (header, query) in NODES.items()]
+        outs = export_articles(conn, args.output, args, report)
+        nodes.append(outs["articles"])
+        relationships = [outs["wrote"], outs["published_in"], outs["in_category"]]
+
+        if table_exists(conn, "tags") and table_exists(conn, "news_tags"):
+            nodes.append(export_simple(conn, args.output, "tags", *TAG_NODES, args, report))
+            relationships.append(export_simple(conn, args.output, "has_tag", *HAS_TAG, args, report))
+        else:
+            print("ℹ️  tags/news_tags not found — HAS_TAG is not exported")
+    finally:
+        conn.close()
+
+    size = sum(f.stat().st_size for f in args.output.glob("*.csv*"))
+    print(f"\n🎉 Export complete: {size / 2**20:,.1f} MiB in {time.monotonic() - started:.1f}s")
+    print("\nImport (база должна быть остановлена):")
+    print(f"docker cp {args.output}/. bd-neo4j:{args.import_dir}")
+    print(import_command(nodes, relationships, args.import_dir, args.database))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Общий клиент Neo4j для скриптов neo4j/scripts.
+
+  - один драйвер на процесс с настроенным пулом соединений (NEO4J_POOL_SIZE);
+  - сессия на поток, переиспользуется всеми запросами этого потока
+    (сессия не потокобезопасна, а открывать её на каждый запрос дорого);
+  - только параметризованные запросы: текст запроса не меняется от значений,
+    поэтому Neo4j берёт план из кэша;
+  - run_all() выполняет независимые запросы параллельно в пуле потоков
+    (NEO4J_WORKERS), каждый поток — со своей сессией.
+
+    with Neo4jClient() as client:
+        rows = client.query("MATCH (t:Tag {name: $tag}) RETURN t", tag="ai")
+        results = client.run_all({"top": (TOP_QUERY, {"limit": 5}), ...})
+
+Окружение: NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD, NEO4J_DATABASE,
+NEO4J_POOL_SIZE, NEO4J_WORKERS
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from neo4j import GraphDatabase
+
+URI            = os.getenv("NEO4J_URI", "bolt://localhost:7687")
+AUTH           = (os.getenv("NEO4J_USER", "neo4j"), os.getenv("NEO4J_PASSWORD", "password123"))
+NEO4J_DATABASE = os.getenv("NEO4J_DATABASE", "neo4j")
+NEO4J_POOL_SIZE = int(os.getenv("NEO4J_POOL_SIZE", "16"))
+NEO4J_WORKERS   = int(os.getenv("NEO4J_WORKERS", "8"))
+
+
+def profile_totals(operator: dict) -> tuple:
+    """Сумма dbHits/pageCacheHits по всему дереву операторов PROFILE."""
+    db_hits = operator.get("dbHits", 0)
+    page_hits = operator.get("pageCacheHits", 0)
+    for child in operator.get("children", []):
+        child_hits, child_page_hits = profile_totals(child)
+        db_hits += child_hits
+        page_hits += child_page_hits
+    return db_hits, page_hits
+
+
+class Neo4jClient:
+
+    def __init__(self, uri: str = URI, auth: tuple = AUTH, database: str = NEO4J_DATABASE,
+                 pool_size: int = NEO4J_POOL_SIZE, workers: int = NEO4J_WORKERS):
+        self.database = database
+        self.workers  = workers
+        self.driver   = GraphDatabase.driver(
+            uri,
+            auth=auth,
+            max_connection_pool_size=pool_size,
+            connection_acquisition_timeout=30,
+            keep_alive=True,
+        )
+        self._local    = threading.local()
+        self._sessions = []
+        self._lock     = threading.Lock()
+        self._executor = None
+
+    # ── Сессии ───────────────────────────────────────────────
+    def session(self):
+        """Сессия текущего потока (создаётся при первом обращении)."""
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = self.driver.session(database=self.database)
+            with self._lock:
+                self._sessions.append(session)
+        return session
+
+    # ── Запросы ──────────────────────────────────────────────
+    def query(self, cypher: str, **params) -> list:
+        """Читающий/служебный запрос в auto-commit транзакции; список Record."""
+        return list(self.session().run(cypher, params))
+
+    def write(self, cypher: str, **params):
+        """Запись в управляемой транзакции (повтор при временных ошибках); сводка счётчиков."""
+        return self.session().execute_write(lambda tx: tx.run(cypher, params).consume())
+
+    def profile(self, cypher: str, **params) -> dict:
+        """PROFILE запроса: дерево операторов с dbHits/rows (ResultSummary.profile)."""
+        return self.session().run("PROFILE " + cypher, params).consume().profile
+
+    def query_profiled(self, cypher: str, **params) -> tuple:
+        """PROFILE с записями: (список Record, ResultSummary.profile)."""
+        result = self.session().run("PROFILE " + cypher, params)
+        records = list(result)
+        return records, result.consume().profile
+
+    def run_all(self, jobs: dict) -> dict:
+        """
+        jobs: {имя: (cypher, params)} → {имя: список Record или исключение}.
+        Запросы независимы и идут параллельно; ошибка одного не прерывает остальные.
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="neo4j")
+        futures = {
+            name: self._executor.submit(self.query, cypher, **(params or {}))
+            for name, (cypher, params) in jobs.items()
+        }
+        results = {}
+        for name, future in futures.items():
+            try:
+                results[name] = future.result()
+            except Exception as exc:
+                results[name] = exc
+        return results
+
+    # ── Закрытие ─────────────────────────────────────────────
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        with self._lock:
+            for session in self._sessions:
+                session.close()
+            self._sessions.clear()
+        self.driver.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
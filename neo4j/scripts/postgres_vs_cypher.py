@@ -1,101 +1,269 @@
-from neo4j import GraphDatabase
-
-URI = "bolt://localhost:7687"
-AUTH = ("neo4j", "password123")
-driver = GraphDatabase.driver(URI, auth=AUTH)
-
-def run(title, sql, cypher_query):
-    print(f"\n{'='*60}")
-    print(f"📌 {title}")
-    print(f"\n🐘 PostgreSQL:\n{sql}")
-    print(f"\n🔵 Cypher:")
-    with driver.session() as session:
-        results = list(session.run(cypher_query))
-        if not results:
-            print("  (нет результатов)")
-        for r in results:
-            print(" ", dict(r))
-        print(f"  Найдено записей: {len(results)}")
-
-# ── ЗАПРОС 1: Авторы и количество их статей ─────────────────
-run(
-    "Авторы и статистика по статьям (2 таблицы)",
-    """
-    SELECT a.first_name, a.last_name,
-           COUNT(n.id) as articles_count,
-           AVG(n.views_count) as avg_views
-    FROM authors a
-    LEFT JOIN news n ON a.id = n.author_id
-    GROUP BY a.id, a.first_name, a.last_name
-    ORDER BY articles_count DESC
-    LIMIT 10;
-    """,
-    """
-    MATCH (a:Author)-[:WROTE]->(art:Article)
-    RETURN a.name AS author,
-           count(art) AS articles_count,
-           avg(art.views) AS avg_views
-    ORDER BY articles_count DESC
-    LIMIT 10
-    """
-)
-
-# ── ЗАПРОС 2: Статьи с категорией и источником (3 таблицы) ──
-run(
-    "Статьи с категориями и источниками (3 таблицы)",
-    """
-    SELECT n.title, c.name as category, s.name as source, n.publish_date
-    FROM news n
-    JOIN categories c ON n.category_id = c.id
-    JOIN sources s ON n.source_id = s.id
-    ORDER BY n.publish_date DESC
-    LIMIT 15;
-    """,
-    """
-    MATCH (art:Article)-[:IN_CATEGORY]->(c:Category),
-          (art)-[:PUBLISHED_IN]->(s:Source)
-    RETURN art.title AS title,
-           c.name AS category,
-           s.name AS source,
-           art.publishDate AS publish_date
-    ORDER BY publish_date DESC
-    LIMIT 15
-    """
-)
-
-# ── ЗАПРОС 3: Автор + статья + категория + теги (4 таблицы) ─
-run(
-    "Полная информация: автор, статья, категория, теги (4 таблицы)",
-    """
-    SELECT n.title, n.views_count,
-           c.name as category,
-           s.name as source,
-           a.first_name || ' ' || a.last_name as author,
-           STRING_AGG(DISTINCT t.name, ', ') as tags
-    FROM news n
-    JOIN categories c ON n.category_id = c.id
-    JOIN sources s ON n.source_id = s.id
-    JOIN authors a ON n.author_id = a.id
-    LEFT JOIN news_tags nt ON n.id = nt.news_id
-    LEFT JOIN tags t ON nt.tag_id = t.id
-    GROUP BY n.id, n.title, n.views_count, c.name, s.name, a.first_name, a.last_name
-    ORDER BY n.views_count DESC
-    LIMIT 10;
-    """,
-    """
-    MATCH (a:Author)-[:WROTE]->(art:Article)-[:IN_CATEGORY]->(c:Category),
-          (art)-[:PUBLISHED_IN]->(s:Source)
-    OPTIONAL MATCH (art)-[:HAS_TAG]->(t:Tag)
-    RETURN art.title AS title,
-           art.views AS views,
-           c.name AS category,
-           s.name AS source,
-           a.name AS author,
-           collect(DISTINCT t.name) AS tags
-    ORDER BY views DESC
-    LIMIT 10
-    """
-)
-
-driver.close()
-print("\n✅ Сравнение выполнено!")
\ No newline at end of file
+"""
+Бенчмарк PostgreSQL vs Neo4j (Cypher) на одинаковых по смыслу запросах.
+
+    PYTHONPATH=../.. python postgres_vs_cypher.py [--warmup 3] [--runs 20] [--cases authors_stats,...] [--output results.json]
+
+Для каждого запроса и каждой базы: --warmup прогревочных выполнений, затем
+--runs замеров (выполнение + чтение всех строк на клиенте). В отчёте
+p50/p95/p99/mean в мс и rows/s, план с реальной статистикой
+(EXPLAIN (ANALYZE, BUFFERS) / PROFILE: время, буферы, db hits) и размер
+данных (строк news, узлов Article) — по нему сравниваются прогоны на
+разных объёмах. Всё пишется в JSON (--output).
+"""
+
+import argparse
+import json
+import math
+import platform
+import time
+from datetime import datetime
+
+from common.postgres import connect
+from neo4j_client import Neo4jClient, profile_totals
+
+# ── ЗАПРОСЫ: одни и те же параметры для обеих сторон ─────────
+CASES = [
+    {
+        "name": "authors_stats",
+        "title": "Авторы и статистика по статьям (2 таблицы)",
+        "sql": """
+            SELECT a.first_name, a.last_name,
+                   COUNT(n.id) as articles_count,
+                   AVG(n.views_count) as avg_views
+            FROM authors a
+            LEFT JOIN news n ON a.id = n.author_id
+            GROUP BY a.id, a.first_name, a.last_name
+            ORDER BY articles_count DESC
+            LIMIT %(limit)s
+        """,
+        "cypher": """
+            MATCH (a:Author)-[:WROTE]->(art:Article)
+            RETURN a.name AS author,
+                   count(art) AS articles_count,
+                   avg(art.views) AS avg_views
+            ORDER BY articles_count DESC
+            LIMIT $limit
+        """,
+        "params": {"limit": 10},
+    },
+    {
+        "name": "articles_category_source",
+        "title": "Статьи с категориями и источниками (3 таблицы)",
+        "sql": """
+            SELECT n.title, c.name as category, s.name as source, n.publish_date
+            FROM news n
+            JOIN categories c ON n.category_id = c.id
+            JOIN sources s ON n.source_id = s.id
+            ORDER BY n.publish_date DESC
+            LIMIT %(limit)s
+        """,
+        "cypher": """
+            MATCH (art:Article)-[:IN_CATEGORY]->(c:Category),
+                  (art)-[:PUBLISHED_IN]->(s:Source)
+            RETURN art.title AS title,
+                   c.name AS category,
+                   s.name AS source,
+                   art.publishDate AS publish_date
+            ORDER BY publish_date DESC
+            LIMIT $limit
+        """,
+        "params": {"limit": 15},
+    },
+    {
+        "name": "article_full",
+        "title": "Полная информация: автор, статья, категория, теги (4 таблицы)",
+        "sql": """
+            SELECT n.title, n.views_count,
+                   c.name as category,
+                   s.name as source,
+                   a.first_name || ' ' || a.last_name as author,
+                   STRING_AGG(DISTINCT t.name, ', ') as tags
+            FROM news n
+            JOIN categories c ON n.category_id = c.id
+            JOIN sources s ON n.source_id = s.id
+            JOIN authors a ON n.author_id = a.id
+            LEFT JOIN news_tags nt ON n.id = nt.news_id
+            LEFT JOIN tags t ON nt.tag_id = t.id
+            GROUP BY n.id, n.title, n.views_count, c.name, s.name, a.first_name, a.last_name
+            ORDER BY n.views_count DESC
+            LIMIT %(limit)s
+        """,
+        "cypher": """
+            MATCH (a:Author)-[:WROTE]->(art:Article)-[:IN_CATEGORY]->(c:Category),
+                  (art)-[:PUBLISHED_IN]->(s:Source)
+            OPTIONAL MATCH (art)-[:HAS_TAG]->(t:Tag)
+            RETURN art.title AS title,
+                   art.views AS views,
+                   c.name AS category,
+                   s.name AS source,
+                   a.name AS author,
+                   collect(DISTINCT t.name) AS tags
+            ORDER BY views DESC
+            LIMIT $limit
+        """,
+        "params": {"limit": 10},
+    },
+]
+
+
+# ── ИЗМЕРЕНИЯ ──────────────────────────────────────────────
+def percentile(sorted_values, p):
+    """Nearest-rank перцентиль отсортированного списка."""
+    return sorted_values[max(0, math.ceil(p / 100 * len(sorted_values)) - 1)]
+
+
+def summarize(latencies_ms, rows):
+    values = sorted(latencies_ms)
+    mean = sum(values) / len(values)
+    return {
+        "runs": len(values),
+        "rows": rows,
+        "min_ms": values[0],
+        "p50_ms": percentile(values, 50),
+        "p95_ms": percentile(values, 95),
+        "p99_ms": percentile(values, 99),
+        "max_ms": values[-1],
+        "mean_ms": mean,
+        "rows_per_s": rows / (mean / 1000) if mean else 0.0,
+        "latencies_ms": latencies_ms,
+    }
+
+
+def measure(execute, warmup, runs):
+    """execute() -> число строк; прогрев, затем runs замеров."""
+    for _ in range(warmup):
+        execute()
+    latencies, rows = [], 0
+    for _ in range(runs):
+        started = time.perf_counter()
+        rows = execute()
+        latencies.append((time.perf_counter() - started) * 1000)
+    return summarize(latencies, rows)
+
+
+def postgres_execute(conn, sql, params):
+    def execute():
+        with conn.cursor() as cur:
+            cur.execute(sql, params)
+            return len(cur.fetchall())
+    return execute
+
+
+def postgres_plan(conn, sql, params):
+    with conn.cursor() as cur:
+        cur.execute("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + sql, params)
+        plan = cur.fetchone()[0][0]
+    root = plan["Plan"]
+    return {
+        "planning_ms": plan.get("Planning Time"),
+        "execution_ms": plan.get("Execution Time"),
+        "root_node": root["Node Type"],
+        "shared_hit_blocks": root.get("Shared Hit Blocks"),
+        "shared_read_blocks": root.get("Shared Read Blocks"),
+        "plan": plan,
+    }
+
+
+def cypher_execute(client, cypher, params):
+    return lambda: len(client.query(cypher, **params))
+
+
+def cypher_plan(client, cypher, params):
+    profile = client.profile(cypher, **params)
+    db_hits, page_hits = profile_totals(profile)
+    return {
+        "db_hits": db_hits,
+        "page_cache_hits": page_hits,
+        "root_operator": profile.get("operatorType"),
+        "plan": profile,
+    }
+
+
+def run_side(name, execute, plan, args):
+    """Замеры одной стороны; ошибка (например, нет news_tags) попадает в отчёт."""
+    try:
+        result = measure(execute, args.warmup, args.runs)
+        if not args.no_plans:
+            result["profile"] = plan()
+        return result
+    except Exception as exc:
+        print(f"  ⚠️ {name}: {exc}")
+        return {"error": str(exc)}
+
+
+def dataset_size(conn, client):
+    with conn.cursor() as cur:
+        cur.execute("SELECT count(*) FROM news")
+        news = cur.fetchone()[0]
+    articles = client.query("MATCH (a:Article) RETURN count(a) AS count")[0]["count"]
+    return {"postgres_news_rows": news, "neo4j_article_nodes": articles}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--cases", default=",".join(case["name"] for case in CASES),
+                        help="через запятую: " + ", ".join(case["name"] for case in CASES))
+    parser.add_argument("--no-plans", action="store_true", help="без EXPLAIN ANALYZE / PROFILE")
+    parser.add_argument("--output", default=f"postgres_vs_cypher_{datetime.now():%Y%m%d_%H%M%S}.json")
+    args = parser.parse_args()
+    if args.runs < 1 or args.warmup < 0:
+        parser.error("--runs должно быть >= 1, --warmup >= 0")
+    selected = args.cases.split(",")
+    unknown = set(selected) - {case["name"] for case in CASES}
+    if unknown:
+        parser.error(f"неизвестные запросы: {', '.join(sorted(unknown))}")
+
+    conn = connect()
+    conn.autocommit = True   # каждый запрос — отдельная транзакция, как у Cypher auto-commit
+    with Neo4jClient() as client:
+        report = {
+            "started_at": datetime.now().isoformat(timespec="seconds"),
+            "host": platform.node(),
+            "warmup": args.warmup,
+            "runs": args.runs,
+            "dataset": dataset_size(conn, client),
+            "cases": [],
+        }
+        print(f"📦 Данные: {report['dataset']}")
+
+        for case in (case for case in CASES if case["name"] in selected):
+            print(f"\n{'='*60}\n📌 {case['title']}")
+            params = case["params"]
+            postgres = run_side(
+                "PostgreSQL",
+                postgres_execute(conn, case["sql"], params),
+                lambda: postgres_plan(conn, case["sql"], params),
+                args,
+            )
+            cypher = run_side(
+                "Cypher",
+                cypher_execute(client, case["cypher"], params),
+                lambda: cypher_plan(client, case["cypher"], params),
+                args,
+            )
+            report["cases"].append({"name": case["name"], "title": case["title"], "params": params,
+                                    "postgres": postgres, "cypher": cypher})
+
+            for label, result in (("🐘 PostgreSQL", postgres), ("🔵 Cypher", cypher)):
+                if "error" in result:
+                    continue
+                line = (f"  {label:<14} p50 {result['p50_ms']:8.2f}  p95 {result['p95_ms']:8.2f}  "
+                        f"p99 {result['p99_ms']:8.2f} ms  {result['rows']} rows  "
+                        f"{result['rows_per_s']:,.0f} rows/s")
+                profile = result.get("profile")
+                if profile and "db_hits" in profile:
+                    line += f"  db hits {profile['db_hits']:,}"
+                elif profile:
+                    line += f"  buffers hit/read {profile['shared_hit_blocks']}/{profile['shared_read_blocks']}"
+                print(line)
+    conn.close()
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2, default=str)
+    print(f"\n✅ Результаты: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
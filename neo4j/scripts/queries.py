@@ -1,66 +1,63 @@
-from neo4j import GraphDatabase
+import time
 
-URI = "bolt://localhost:7687"
-AUTH = ("neo4j", "password123")
-driver = GraphDatabase.driver(URI, auth=AUTH)
+from neo4j_client import Neo4jClient
 
-def run(title, query):
-    print(f"\n{'='*60}")
-    print(f"📌 {title}")
-    print('='*60)
-    with driver.session() as session:
-        results = session.run(query)
-        records = list(results)
-        if not records:
-            print("  (нет результатов)")
-        for r in records:
-            print(" ", dict(r))
-    print(f"  Найдено записей: {len(records)}")
+# Запросы независимы: собираются здесь, выполняются параллельно в конце,
+# печатаются в исходном порядке. Значения фильтров — параметры, не литералы.
+QUERIES = {}
+
+def run(title, query, **params):
+    QUERIES[title] = (query, params)
 
 # П.3 — Простые запросы с фильтрацией
 run("Запрос 1 — Статьи категории technology","""
-    MATCH (a:Article)-[:IN_CATEGORY]->(c:Category {name: 'technology'})
+    MATCH (a:Article)-[:IN_CATEGORY]->(c:Category {name: $category})
     RETURN a.title AS title, a.views AS views, a.likes AS likes
-""")
+""", category="technology")
 
 run("Запрос 2 — Авторы из USA с рейтингом > 8.0","""
     MATCH (a:Author)
-    WHERE a.country = 'USA' AND a.rating > 8.0
+    WHERE a.country = $country AND a.rating > $min_rating
     RETURN a.name AS name, a.rating AS rating, a.country AS country
-""")
+""", country="USA", min_rating=8.0)
 
 run("Запрос 3 — Статьи с тегом ai","""
-    MATCH (a:Article)-[:HAS_TAG]->(t:Tag {name: 'ai'})
+    MATCH (a:Article)-[:HAS_TAG]->(t:Tag {name: $tag})
     RETURN a.title AS title, a.category AS category
-""")
+""", tag="ai")
 
 run("Запрос 4 — Источники с надёжностью 9","""
     MATCH (s:Source)
-    WHERE s.reliability = 9
+    WHERE s.reliability = $reliability
     RETURN s.name AS name, s.country AS country
-""")
+""", reliability=9)
 
 run("Запрос 5 — Статьи опубликованные в Reuters","""
-    MATCH (a:Article)-[:PUBLISHED_IN]->(s:Source {name: 'Reuters'})
+    MATCH (a:Article)-[:PUBLISHED_IN]->(s:Source {name: $source})
     RETURN a.title AS title, a.category AS category, a.views AS views
-""")
+""", source="Reuters")
 
 run("Запрос 6 — Авторы работающие в источниках из UK","""
     MATCH (a:Author)-[:WORKS_FOR]->(s:Source)
-    WHERE s.country = 'UK'
+    WHERE s.country = $country
     RETURN a.name AS name, a.rating AS rating, s.name AS source
-""")
+""", country="UK")
 
 # П.4 — Цепочки связей и переменная длина пути
+# Запросы 7 и 14 читают материализованные SHARES_TAGS (author_similarity.py):
+# один переход вместо Author-WROTE-Article-HAS_TAG-Tag-HAS_TAG-Article-WROTE-Author
 run("Запрос 7 — Авторы связанные через общие теги (цепочка 2 шага)","""
-    MATCH (a1:Author)-[:WROTE]->(art1:Article)-[:HAS_TAG]->(t:Tag)<-[:HAS_TAG]-(art2:Article)<-[:WROTE]-(a2:Author)
-    WHERE a1 <> a2
-    RETURN DISTINCT a1.name AS author1, a2.name AS author2, t.name AS common_tag
+    MATCH (a1:Author)-[s:SHARES_TAGS]-(a2:Author)
+    UNWIND s.tags AS common_tag
+    RETURN a1.name AS author1, a2.name AS author2, common_tag
     LIMIT 10
 """)
 
-run("Запрос 8 — Цепочка переменной длины: от автора до тега через 2-4 шага","""
-    MATCH path = (a:Author)-[*2..4]->(t:Tag)
+# Запрос 8 — с типами: [*2..4] без типов ходил бы и по USES_TAG/SHARES_TAGS.
+# В графе seed.py направленный путь автор → тег один: WROTE → HAS_TAG;
+# теги соседей на расстоянии 2-3 — reachability.py
+run("Запрос 8 — Цепочка от автора до тега (автор → статья → тег)","""
+    MATCH path = (a:Author)-[:WROTE]->(:Article)-[:HAS_TAG]->(t:Tag)
     RETURN a.name AS author, t.name AS tag, length(path) AS steps
     LIMIT 10
 """)
@@ -95,16 +92,15 @@ run("Запрос 12 — Источники и суммарные просмот
 run("Запрос 13 — Категории с avg просмотров > 20000","""
     MATCH (a:Article)-[:IN_CATEGORY]->(c:Category)
     WITH c.name AS category, avg(a.views) AS avg_views
-    WHERE avg_views > 20000
+    WHERE avg_views > $min_avg_views
     RETURN category, round(avg_views) AS avg_views
     ORDER BY avg_views DESC
-""")
+""", min_avg_views=20000)
 
 # П.7 — Общие соседи
 run("Запрос 14 — Авторы с общими тегами (сортировка по кол-ву общих связей)","""
-    MATCH (a1:Author)-[:WROTE]->(art1:Article)-[:HAS_TAG]->(t:Tag)<-[:HAS_TAG]-(art2:Article)<-[:WROTE]-(a2:Author)
-    WHERE a1 <> a2
-    RETURN a1.name AS author1, a2.name AS author2, count(DISTINCT t) AS common_tags
+    MATCH (a1:Author)-[s:SHARES_TAGS]-(a2:Author)
+    RETURN a1.name AS author1, a2.name AS author2, s.count AS common_tags
     ORDER BY common_tags DESC
     LIMIT 10
 """)
@@ -112,14 +108,31 @@ run("Запрос 14 — Авторы с общими тегами (сортир
 # П.8 — Комбинированный запрос
 run("Запрос 15 — Топ источников: цепочка автор→статья→источник с фильтрацией и агрегацией","""
     MATCH (a:Author)-[:WROTE]->(art:Article)-[:PUBLISHED_IN]->(s:Source)
-    WHERE a.rating > 7.0 AND art.views > 15000
+    WHERE a.rating > $min_rating AND art.views > $min_views
     RETURN s.name AS source,
            count(art) AS articles,
            avg(art.views) AS avg_views,
            collect(DISTINCT a.name) AS authors
     ORDER BY avg_views DESC
     LIMIT 5
-""")
+""", min_rating=7.0, min_views=15000)
+
+started = time.monotonic()
+with Neo4jClient() as client:
+    results = client.run_all(QUERIES)
+
+for title, records in results.items():
+    print(f"\n{'='*60}")
+    print(f"📌 {title}")
+    print('='*60)
+    if isinstance(records, Exception):
+        print(f"  ⚠️ Ошибка: {records}")
+        continue
+    if not records:
+        print("  (нет результатов)")
+    for r in records:
+        print(" ", dict(r))
+    print(f"  Найдено записей: {len(records)}")
 
-driver.close()
+print(f"\n⏱️  {len(QUERIES)} запросов за {time.monotonic() - started:.2f}s")
 print("\n✅ Все запросы выполнены!")
\ No newline at end of file
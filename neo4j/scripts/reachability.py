@@ -0,0 +1,318 @@
+"""
+Достижимость автор → тег и автор → автор с ограниченной глубиной.
+
+    python reachability.py tags author1@news.com [--depth 2]
+    python reachability.py authors author1@news.com [--depth 2]
+    python reachability.py bench [--sample 20]
+
+Исходный запрос 8 ((a:Author)-[*2..4]->(t:Tag), теперь LEGACY_QUERY) не
+задаёт типов связей: Neo4j перебирает все пути до глубины 4 и только потом
+применяет LIMIT. Здесь обход идёт по уровням (BFS) и только по нужным
+типам в нужную сторону, поверх слоёв author_similarity.py:
+
+  автор —USES_TAG→ тег          свои теги автора (расстояние 1);
+  автор —SHARES_TAGS— автор     соседи по общим тегам; их теги — расстояние 2 и т.д.
+
+Каждый уровень — один запрос по всему фронтиру; уже посещённые авторы и
+найденные теги отсекаются на сервере (NOT IN $visited), фронтир
+ограничен --max-frontier (остаются самые сильные связи). Результаты
+кэшируются по автору; invalidate(authors) сбрасывает все записи, обход
+которых проходил через этих авторов или их соседей (новые WROTE/HAS_TAG
+меняют их теги и пары SHARES_TAGS, см. author_similarity.apply_published).
+Граф меняет другой процесс (author_similarity.py follow), поэтому
+долгоживущий сервис подписывается на его топик neo4j.authors.changed:
+follow_invalidations(bootstrap) вызывает invalidate() на каждую пачку.
+TTL — страховка на случай пропущенных сообщений (например, пока сервис
+не был запущен).
+
+bench сравнивает db hits (PROFILE) исходного запроса 8 и сервиса на выборке
+авторов при depth=1: в графе seed.py направленный путь автор → тег только
+WROTE → HAS_TAG, т.е. запрос 8 находит лишь свои теги автора, и сравнивать
+можно только с тем же набором пар (bench проверяет, что он совпал). Стоимость
+построения USES_TAG/SHARES_TAGS (author_similarity.py) в сравнение не входит.
+"""
+
+import argparse
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from author_similarity import TOPIC_AUTHORS_CHANGED
+from neo4j_client import Neo4jClient, profile_totals
+
+MAX_DEPTH = 3
+
+# ── УРОВНИ ОБХОДА ──────────────────────────────────────────
+TAGS_LEVEL_CYPHER = """
+UNWIND $authors AS email
+MATCH (:Author {email: email})-[:USES_TAG]->(t:Tag)
+WHERE NOT t.name IN $seen
+RETURN DISTINCT t.name AS tag
+"""
+
+AUTHORS_LEVEL_CYPHER = """
+UNWIND $authors AS email
+MATCH (:Author {email: email})-[s:SHARES_TAGS]-(b:Author)
+WHERE NOT b.email IN $visited AND s.count >= $min_shared
+RETURN b.email AS email, b.name AS name, max(s.count) AS shared
+ORDER BY shared DESC
+LIMIT $max_frontier
+"""
+
+NEIGHBOURS_CYPHER = """
+UNWIND $authors AS email
+MATCH (:Author {email: email})-[:SHARES_TAGS]-(b:Author)
+RETURN DISTINCT b.email AS email
+"""
+
+# Исходный запрос 8 — для сравнения в bench. Типы ограничены связями
+# seed.py: без этого [*2..4] ходил бы и по USES_TAG/SHARES_TAGS
+LEGACY_TYPES = "WROTE|WORKS_FOR|PUBLISHED_IN|IN_CATEGORY|HAS_TAG"
+
+LEGACY_QUERY = f"""
+    MATCH path = (a:Author)-[:{LEGACY_TYPES}*2..4]->(t:Tag)
+    RETURN a.name AS author, t.name AS tag, length(path) AS steps
+    LIMIT 10
+"""
+
+LEGACY_PER_AUTHOR = f"""
+    MATCH path = (a:Author {{email: $email}})-[:{LEGACY_TYPES}*2..4]->(t:Tag)
+    RETURN t.name AS tag, min(length(path)) AS steps
+"""
+
+
+class ReachabilityService:
+
+    def __init__(self, client: Neo4jClient, ttl: float = 300.0, max_entries: int = 10_000,
+                 max_frontier: int = 1_000, min_shared: int = 1, query=None):
+        self.client       = client
+        self.ttl          = ttl
+        self.max_entries  = max_entries
+        self.max_frontier = max_frontier
+        self.min_shared   = min_shared
+        self._query       = query or client.query   # bench подставляет PROFILE-вариант
+        self._cache       = OrderedDict()           # ключ → (expires, результат, посещённые авторы)
+        self._by_author   = {}                      # автор → ключи, чей обход через него прошёл
+        self._generation  = 0                       # +1 на каждый invalidate()
+        self._lock        = threading.Lock()
+        self.hits = self.misses = self.invalidated = 0
+
+    # ── Публичные запросы ────────────────────────────────────
+    def author_tags(self, email: str, depth: int = 2) -> list:
+        """[(тег, расстояние)]: 1 — свои теги, k — теги авторов на расстоянии k-1."""
+        return self._cached(("tags", email, depth), lambda: self._tags(email, self._depth(depth)))
+
+    def related_authors(self, email: str, depth: int = 2) -> list:
+        """[(email, имя, расстояние, общих тегов с предыдущим уровнем)] по SHARES_TAGS."""
+        return self._cached(("authors", email, depth), lambda: self._authors(email, self._depth(depth)))
+
+    # ── Обход ────────────────────────────────────────────────
+    @staticmethod
+    def _depth(depth):
+        if not 1 <= depth <= MAX_DEPTH:
+            raise ValueError(f"depth must be in 1..{MAX_DEPTH}, got {depth}")
+        return depth
+
+    def _expand(self, frontier, visited):
+        records = self._query(AUTHORS_LEVEL_CYPHER, authors=frontier, visited=list(visited),
+                              min_shared=self.min_shared, max_frontier=self.max_frontier)
+        return [(r["email"], r["name"], r["shared"]) for r in records]
+
+    def _authors(self, email, depth):
+        visited, frontier, found = {email}, [email], []
+        for distance in range(1, depth + 1):
+            level = self._expand(frontier, visited)
+            if not level:
+                break
+            found += [(b, name, distance, shared) for b, name, shared in level]
+            frontier = [b for b, _, _ in level]
+            visited.update(frontier)
+        return found, visited
+
+    def _tags(self, email, depth):
+        visited, frontier, seen, found = {email}, [email], set(), []
+        for distance in range(1, depth + 1):
+            tags = [r["tag"] for r in self._query(TAGS_LEVEL_CYPHER, authors=frontier, seen=list(seen))]
+            found += [(tag, distance) for tag in tags]
+            seen.update(tags)
+            if distance == depth:
+                break
+            frontier = [b for b, _, _ in self._expand(frontier, visited)]
+            if not frontier:
+                break
+            visited.update(frontier)
+        return found, visited
+
+    # ── Кэш ──────────────────────────────────────────────────
+    def _cached(self, key, compute):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None and entry[0] > now:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            generation = self._generation
+        result, visited = compute()
+        with self._lock:
+            if self._generation != generation:
+                # invalidate() пришёл во время обхода — результат мог устареть, не кэшируем
+                return result
+            self._drop(key)
+            self._cache[key] = (now + self.ttl, result, visited)
+            for author in visited:
+                self._by_author.setdefault(author, set()).add(key)
+            while len(self._cache) > self.max_entries:
+                self._drop(next(iter(self._cache)))
+        return result
+
+    def _drop(self, key):
+        entry = self._cache.pop(key, None)
+        if entry is None:
+            return
+        for author in entry[2]:
+            keys = self._by_author.get(author)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_author[author]
+
+    def invalidate(self, authors):
+        """
+        Авторы получили новые WROTE/HAS_TAG: сбросить записи, чей обход прошёл
+        через них или их соседей по SHARES_TAGS (у соседей могла появиться новая пара).
+        Обходы, идущие в этот момент, свой результат не кэшируют (_generation).
+        """
+        authors = list(authors)
+        affected = set(authors)
+        affected.update(r["email"] for r in self.client.query(NEIGHBOURS_CYPHER, authors=authors))
+        with self._lock:
+            self._generation += 1
+            keys = set()
+            for author in affected:
+                keys |= self._by_author.get(author, set())
+            for key in keys:
+                self._drop(key)
+            self.invalidated += len(keys)
+        return len(keys)
+
+    def follow_invalidations(self, bootstrap: str) -> threading.Thread:
+        """
+        Фоновый поток: TOPIC_AUTHORS_CHANGED → invalidate(). Без consumer group
+        и с конца топика — у каждого процесса свой кэш и своя копия потока.
+        """
+        from kafka import KafkaConsumer
+
+        consumer = KafkaConsumer(
+            TOPIC_AUTHORS_CHANGED,
+            bootstrap_servers=bootstrap,
+            group_id=None,
+            auto_offset_reset="latest",
+            value_deserializer=lambda v: json.loads(v.decode("utf-8")),
+        )
+
+        def loop():
+            for msg in consumer:
+                try:
+                    self.invalidate(msg.value["authors"])
+                except Exception as exc:
+                    print(f"⚠️ invalidate failed: {exc}")
+
+        thread = threading.Thread(target=loop, name="reachability-invalidations", daemon=True)
+        thread.start()
+        return thread
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._cache), "hits": self.hits,
+                    "misses": self.misses, "invalidated": self.invalidated}
+
+
+# ── БЕНЧМАРК ───────────────────────────────────────────────
+class Profiler:
+    """query(), который выполняет PROFILE и копит db hits."""
+
+    def __init__(self, client):
+        self.client = client
+        self.db_hits = 0
+
+    def __call__(self, cypher, **params):
+        records, profile = self.client.query_profiled(cypher, **params)
+        self.db_hits += profile_totals(profile)[0]
+        return records
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - started) * 1000
+
+
+def bench(client, sample):
+    emails = [r["email"] for r in client.query(
+        "MATCH (a:Author) RETURN a.email AS email ORDER BY email LIMIT $limit", limit=sample)]
+    if not emails:
+        print("⚠️ Нет авторов — сначала seed.py и author_similarity.py rebuild")
+        return
+
+    legacy = Profiler(client)
+    _, legacy_global_ms = timed(lambda: legacy(LEGACY_QUERY))
+    legacy_global_hits = legacy.db_hits
+
+    legacy.db_hits = 0
+    legacy_tags, legacy_ms = timed(lambda: [legacy(LEGACY_PER_AUTHOR, email=e) for e in emails])
+
+    profiler = Profiler(client)
+    service = ReachabilityService(client, query=profiler)
+    # depth=1: тот же ответ, что у запроса 8 (свои теги автора)
+    service_tags, service_ms = timed(lambda: [service.author_tags(e, 1) for e in emails])
+    _, cached_ms = timed(lambda: [service.author_tags(e, 1) for e in emails])
+
+    legacy_pairs = {(e, r["tag"]) for e, rows in zip(emails, legacy_tags) for r in rows}
+    service_pairs = {(e, tag) for e, rows in zip(emails, service_tags) for tag, _ in rows}
+    legacy_found, service_found = len(legacy_pairs), len(service_pairs)
+    print(f"\n{'='*60}\n📊 Автор → теги, {len(emails)} авторов, depth=1\n{'='*60}")
+    print(f"  Запрос 8 как есть (LIMIT 10):   {legacy_global_hits:>12,} db hits  {legacy_global_ms:8.1f} ms")
+    print(f"  Запрос 8 по каждому автору:     {legacy.db_hits:>12,} db hits  {legacy_ms:8.1f} ms  "
+          f"{legacy_found} пар автор-тег")
+    print(f"  ReachabilityService (холодный): {profiler.db_hits:>12,} db hits  {service_ms:8.1f} ms  "
+          f"{service_found} пар автор-тег")
+    print(f"  ReachabilityService (кэш):      {0:>12,} db hits  {cached_ms:8.1f} ms")
+    if legacy_pairs != service_pairs:
+        print(f"\n  ⚠️ Ответы различаются: только в запросе 8 — {len(legacy_pairs - service_pairs)}, "
+              f"только в сервисе — {len(service_pairs - legacy_pairs)} пар "
+              f"(USES_TAG устарел? author_similarity.py rebuild). Отношение db hits не считается")
+    elif profiler.db_hits:
+        print(f"\n  ✅ Ответы совпали, db hits меньше в {legacy.db_hits / profiler.db_hits:,.1f} раз "
+              f"(без учёта построения USES_TAG/SHARES_TAGS)")
+    print(f"  Кэш: {service.stats()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("mode", choices=["tags", "authors", "bench"])
+    parser.add_argument("email", nargs="?", help="email автора (tags/authors)")
+    parser.add_argument("--depth", type=int, default=2, choices=range(1, MAX_DEPTH + 1),
+                        help="tags/authors; bench всегда сравнивает при depth=1")
+    parser.add_argument("--sample", type=int, default=20, help="авторов в bench")
+    args = parser.parse_args()
+    if args.mode != "bench" and not args.email:
+        parser.error(f"{args.mode}: нужен email автора")
+
+    with Neo4jClient() as client:
+        if args.mode == "bench":
+            bench(client, args.sample)
+            return
+        service = ReachabilityService(client)
+        if args.mode == "tags":
+            for tag, distance in service.author_tags(args.email, args.depth):
+                print(f"  {distance}  {tag}")
+        else:
+            for email, name, distance, shared in service.related_authors(args.email, args.depth):
+                print(f"  {distance}  {name:<30} {email:<25} общих тегов: {shared}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,32 @@
-from neo4j import GraphDatabase
+"""
+Заполнение Neo4j тестовыми данными новостного агрегатора.
 
-URI = "bolt://localhost:7687"
-AUTH = ("neo4j", "password123")
+    python seed.py [--articles 50] [--authors 25] [--batch-size 5000] [--seed 42]
 
-driver = GraphDatabase.driver(URI, auth=AUTH)
+Сначала создаются ограничения уникальности (MERGE находит узлы по индексу,
+а не сканированием метки), затем все узлы и связи пишутся пачками:
+один запрос UNWIND $rows ... MERGE на --batch-size строк, одна транзакция
+на пачку. Статья и все её связи (WROTE, PUBLISHED_IN, IN_CATEGORY, HAS_TAG)
+создаются одним запросом, поэтому --articles 3000000 занимает минуты.
+"""
 
-def run(query, params=None):
-    with driver.session() as session:
-        session.run(query, params or {})
+import argparse
+import random
+import time
+
+from neo4j_client import Neo4jClient
+
+# ── ОГРАНИЧЕНИЯ ────────────────────────────────────────────
+# Имена совпадают с commands.md, IF NOT EXISTS — повторный запуск безопасен
+CONSTRAINTS = [
+    "CREATE CONSTRAINT article_id_unique IF NOT EXISTS FOR (a:Article) REQUIRE a.id IS UNIQUE",
+    "CREATE CONSTRAINT author_email_unique IF NOT EXISTS FOR (a:Author) REQUIRE a.email IS UNIQUE",
+    "CREATE CONSTRAINT tag_name_unique IF NOT EXISTS FOR (t:Tag) REQUIRE t.name IS UNIQUE",
+    "CREATE CONSTRAINT category_name_unique IF NOT EXISTS FOR (c:Category) REQUIRE c.name IS UNIQUE",
+    "CREATE CONSTRAINT source_name_unique IF NOT EXISTS FOR (s:Source) REQUIRE s.name IS UNIQUE",
+]
 
-# ── КАТЕГОРИИ ──────────────────────────────────────────────
+# ── СПРАВОЧНИКИ ────────────────────────────────────────────
 categories = [
     {"name": "politics",       "description": "Politics news",       "featured": True},
     {"name": "sports",         "description": "Sports news",         "featured": True},
@@ -19,11 +36,7 @@ categories = [
     {"name": "health",         "description": "Health news",         "featured": False},
     {"name": "science",        "description": "Science news",        "featured": False},
 ]
-for c in categories:
-    run("MERGE (c:Category {name: $name}) SET c.description=$description, c.featured=$featured", c)
-print("✅ Categories done")
 
-# ── ИСТОЧНИКИ ──────────────────────────────────────────────
 sources = [
     {"name": "Reuters",          "website": "https://reuters.com",      "country": "International", "reliability": 9},
     {"name": "BBC News",         "website": "https://bbc.com",          "country": "UK",            "reliability": 9},
@@ -32,49 +45,11 @@ sources = [
     {"name": "Associated Press", "website": "https://apnews.com",       "country": "USA",           "reliability": 9},
     {"name": "The Guardian",     "website": "https://theguardian.com",  "country": "UK",            "reliability": 8},
 ]
-for s in sources:
-    run("MERGE (s:Source {name: $name}) SET s.website=$website, s.country=$country, s.reliability=$reliability", s)
-print("✅ Sources done")
 
-# ── ТЕГИ ───────────────────────────────────────────────────
 tags = ["ai","innovation","digital","football","championship",
         "election","policy","economy","finance","movies",
         "awards","medicine","research","space","climate","breaking","analysis"]
-for t in tags:
-    run("MERGE (:Tag {name: $name})", {"name": t})
-print("✅ Tags done")
-
-# ── АВТОРЫ ─────────────────────────────────────────────────
-import random
-countries = ["USA","UK","Germany","France","Japan","Canada","Australia","Brazil","India"]
-source_names = [s["name"] for s in sources]
 
-authors = []
-for i in range(1, 26):
-    authors.append({
-        "email":   f"author{i}@news.com",
-        "name":    f"Author_{i} LastName_{i}",
-        "rating":  round(random.uniform(6.5, 9.5), 1),
-        "country": random.choice(countries),
-    })
-for a in authors:
-    run("MERGE (a:Author {email: $email}) SET a.name=$name, a.rating=$rating, a.country=$country", a)
-
-# Авторы работают в источниках
-roles = ["senior", "staff", "freelance"]
-for i, a in enumerate(authors):
-    run("""
-        MATCH (a:Author {email: $email}), (s:Source {name: $source})
-        MERGE (a)-[:WORKS_FOR {since: $since, role: $role}]->(s)
-    """, {
-        "email":  a["email"],
-        "source": source_names[i % len(source_names)],
-        "since":  random.randint(2015, 2022),
-        "role":   random.choice(roles),
-    })
-print("✅ Authors done")
-
-# ── СТАТЬИ ─────────────────────────────────────────────────
 cat_tags = {
     "politics":      ["election", "policy", "breaking", "analysis"],
     "sports":        ["football", "championship", "breaking"],
@@ -84,70 +59,150 @@ cat_tags = {
     "health":        ["medicine", "research"],
     "science":       ["space", "research", "climate"],
 }
-cat_list = [c["name"] for c in categories]
-style = ["Breaking", "Exclusive", "Latest", "Special"]
-kind  = ["Report", "Analysis", "Coverage", "Update"]
-
-articles = []
-for i in range(1, 51):
-    cat = cat_list[(i - 1) % len(cat_list)]
-    articles.append({
-        "id":          f"art{i}",
-        "title":       f"{cat.capitalize()} News {i}: {random.choice(style)} {random.choice(kind)}",
-        "category":    cat,
-        "views":       random.randint(5000, 60000),
-        "likes":       random.randint(200, 4000),
-        "shares":      random.randint(50, 1200),
-        "publishDate": f"2024-{random.randint(1,12):02d}-{random.randint(1,28):02d}",
-    })
-
-for art in articles:
-    run("""
-        MERGE (a:Article {id: $id})
-        SET a.title=$title, a.category=$category,
-            a.views=$views, a.likes=$likes,
-            a.shares=$shares, a.publishDate=$publishDate
-    """, art)
-print("✅ Articles done")
-
-# ── СВЯЗИ: WROTE ───────────────────────────────────────────
-for i, art in enumerate(articles):
-    author_email = authors[i % len(authors)]["email"]
-    run("""
-        MATCH (a:Author {email: $email}), (art:Article {id: $id})
-        MERGE (a)-[:WROTE {publishedAt: $date}]->(art)
-    """, {"email": author_email, "id": art["id"], "date": art["publishDate"]})
-print("✅ WROTE relations done")
-
-# ── СВЯЗИ: PUBLISHED_IN ────────────────────────────────────
-sections = ["world", "sport", "tech", "business", "health", "science", "culture"]
-for i, art in enumerate(articles):
-    run("""
-        MATCH (art:Article {id: $id}), (s:Source {name: $source})
-        MERGE (art)-[:PUBLISHED_IN {section: $section}]->(s)
-    """, {
-        "id":      art["id"],
-        "source":  source_names[i % len(source_names)],
-        "section": sections[i % len(sections)],
-    })
-print("✅ PUBLISHED_IN relations done")
-
-# ── СВЯЗИ: IN_CATEGORY ─────────────────────────────────────
-for art in articles:
-    run("""
-        MATCH (art:Article {id: $id}), (c:Category {name: $cat})
-        MERGE (art)-[:IN_CATEGORY]->(c)
-    """, {"id": art["id"], "cat": art["category"]})
-print("✅ IN_CATEGORY relations done")
-
-# ── СВЯЗИ: HAS_TAG ─────────────────────────────────────────
-for art in articles:
-    for tag in random.sample(cat_tags[art["category"]], k=min(2, len(cat_tags[art["category"]]))):
-        run("""
-            MATCH (art:Article {id: $id}), (t:Tag {name: $tag})
-            MERGE (art)-[:HAS_TAG]->(t)
-        """, {"id": art["id"], "tag": tag})
-print("✅ HAS_TAG relations done")
-
-driver.close()
-print("\n🎉 Seed complete!")
\ No newline at end of file
+
+countries = ["USA","UK","Germany","France","Japan","Canada","Australia","Brazil","India"]
+roles     = ["senior", "staff", "freelance"]
+style     = ["Breaking", "Exclusive", "Latest", "Special"]
+kind      = ["Report", "Analysis", "Coverage", "Update"]
+sections  = ["world", "sport", "tech", "business", "health", "science", "culture"]
+
+cat_list     = [c["name"] for c in categories]
+source_names = [s["name"] for s in sources]
+
+# ── ЗАПРОСЫ (одна пачка строк на запрос) ───────────────────
+CATEGORIES_CYPHER = """
+UNWIND $rows AS row
+MERGE (c:Category {name: row.name})
+SET c.description = row.description, c.featured = row.featured
+"""
+
+SOURCES_CYPHER = """
+UNWIND $rows AS row
+MERGE (s:Source {name: row.name})
+SET s.website = row.website, s.country = row.country, s.reliability = row.reliability
+"""
+
+TAGS_CYPHER = """
+UNWIND $rows AS name
+MERGE (:Tag {name: name})
+"""
+
+# Авторы и их место работы
+AUTHORS_CYPHER = """
+UNWIND $rows AS row
+MERGE (a:Author {email: row.email})
+SET a.name = row.name, a.rating = row.rating, a.country = row.country
+WITH a, row
+MATCH (s:Source {name: row.source})
+MERGE (a)-[:WORKS_FOR {since: row.since, role: row.role}]->(s)
+"""
+
+# Статья со всеми связями
+ARTICLES_CYPHER = """
+UNWIND $rows AS row
+MERGE (art:Article {id: row.id})
+SET art.title = row.title, art.category = row.category,
+    art.views = row.views, art.likes = row.likes,
+    art.shares = row.shares, art.publishDate = row.publishDate
+WITH art, row
+MATCH (au:Author {email: row.author})
+MERGE (au)-[:WROTE {publishedAt: row.publishDate}]->(art)
+WITH art, row
+MATCH (s:Source {name: row.source})
+MERGE (art)-[:PUBLISHED_IN {section: row.section}]->(s)
+WITH art, row
+MATCH (c:Category {name: row.category})
+MERGE (art)-[:IN_CATEGORY]->(c)
+WITH art, row
+UNWIND row.tags AS tag
+MATCH (t:Tag {name: tag})
+MERGE (art)-[:HAS_TAG]->(t)
+"""
+
+
+def write_batch(session, query, rows):
+    session.execute_write(lambda tx: tx.run(query, rows=rows).consume())
+
+
+def write_batches(session, label, query, rows, batch_size, total):
+    """rows — итератор; пишет пачками, печатает прогресс и скорость."""
+    started = time.monotonic()
+    done, batch = 0, []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            write_batch(session, query, batch)
+            done += len(batch)
+            batch = []
+            print(f"  {label}: {done:,}/{total:,} ({done / (time.monotonic() - started):,.0f} rows/s)")
+    if batch:
+        write_batch(session, query, batch)
+        done += len(batch)
+    print(f"✅ {label} done: {done:,} in {time.monotonic() - started:.1f}s")
+
+
+# ── ГЕНЕРАЦИЯ СТРОК ────────────────────────────────────────
+def author_rows(count, rnd):
+    for i in range(1, count + 1):
+        yield {
+            "email":   f"author{i}@news.com",
+            "name":    f"Author_{i} LastName_{i}",
+            "rating":  round(rnd.uniform(6.5, 9.5), 1),
+            "country": rnd.choice(countries),
+            # Авторы работают в источниках
+            "source":  source_names[(i - 1) % len(source_names)],
+            "since":   rnd.randint(2015, 2022),
+            "role":    rnd.choice(roles),
+        }
+
+
+def article_rows(count, authors, rnd):
+    for i in range(1, count + 1):
+        cat = cat_list[(i - 1) % len(cat_list)]
+        yield {
+            "id":          f"art{i}",
+            "title":       f"{cat.capitalize()} News {i}: {rnd.choice(style)} {rnd.choice(kind)}",
+            "category":    cat,
+            "views":       rnd.randint(5000, 60000),
+            "likes":       rnd.randint(200, 4000),
+            "shares":      rnd.randint(50, 1200),
+            "publishDate": f"2024-{rnd.randint(1,12):02d}-{rnd.randint(1,28):02d}",
+            "author":      f"author{(i - 1) % authors + 1}@news.com",
+            "source":      source_names[(i - 1) % len(source_names)],
+            "section":     sections[(i - 1) % len(sections)],
+            "tags":        rnd.sample(cat_tags[cat], k=min(2, len(cat_tags[cat]))),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--articles", type=int, default=50)
+    parser.add_argument("--authors", type=int, default=25)
+    parser.add_argument("--batch-size", type=int, default=5000, help="строк на один UNWIND-запрос/транзакцию")
+    parser.add_argument("--seed", type=int, default=None, help="seed для воспроизводимых данных")
+    args = parser.parse_args()
+    if args.batch_size < 1 or args.authors < 1:
+        parser.error("--batch-size и --authors должны быть >= 1")
+    rnd = random.Random(args.seed)
+
+    started = time.monotonic()
+    with Neo4jClient() as client:
+        session = client.session()
+        for statement in CONSTRAINTS:
+            session.run(statement).consume()
+        session.run("CALL db.awaitIndexes(300)").consume()
+        print("✅ Constraints done")
+
+        write_batches(session, "Categories", CATEGORIES_CYPHER, categories, args.batch_size, len(categories))
+        write_batches(session, "Sources", SOURCES_CYPHER, sources, args.batch_size, len(sources))
+        write_batches(session, "Tags", TAGS_CYPHER, tags, args.batch_size, len(tags))
+        write_batches(session, "Authors", AUTHORS_CYPHER, author_rows(args.authors, rnd),
+                      args.batch_size, args.authors)
+        write_batches(session, "Articles + relations", ARTICLES_CYPHER,
+                      article_rows(args.articles, args.authors, rnd), args.batch_size, args.articles)
+
+    print(f"\n🎉 Seed complete in {time.monotonic() - started:.1f}s!")
+
+
+if __name__ == "__main__":
+    main()
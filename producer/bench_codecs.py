@@ -0,0 +1,93 @@
+"""
+Сравнение кодеков событий: JSON vs Avro vs Protobuf.
+
+Для каждого типа события (ArticlePublished/Viewed/Liked) печатает средний
+размер сообщения и скорость encode/decode, а затем — стоимость чтения полей
+analytics-group (eventType + payload.articleId): полный decode vs PartialDecoder
+с заголовками и без. Запуск в контейнере producer:
+
+    python bench_codecs.py [--events 20000]
+
+Локально из каталога producer/: PYTHONPATH=.. python bench_codecs.py
+(нужен common/news_event_pb2.py — см. ProtobufCodec).
+"""
+
+import argparse
+import time
+
+from common.event_codecs import PartialDecoder, decode_any, make_codec
+from producer import EventFactory
+
+CODECS = ("json", "avro", "protobuf")
+# Субъект уже есть в schemas/registry — бенчмарк ничего не регистрирует в репозитории
+BENCH_TOPIC = "news.views.events"
+
+
+def sample_events(n: int) -> dict:
+    factory = EventFactory()
+    return {
+        "ArticlePublished": [factory.article_published(3_000_001 + i) for i in range(n)],
+        "ArticleViewed":    [factory.article_viewed(i + 1, factory.random_user_id()) for i in range(n)],
+        "ArticleLiked":     [factory.article_liked(i + 1, factory.random_user_id()) for i in range(n)],
+    }
+
+
+def bench(codec, events: list) -> tuple:
+    started = time.perf_counter()
+    encoded = [codec.encode(e) for e in events]
+    encode_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for data in encoded:
+        codec.decode(data)
+    decode_s = time.perf_counter() - started
+
+    avg_size = sum(len(d) for d in encoded) / len(encoded)
+    return avg_size, len(events) / encode_s, len(events) / decode_s
+
+
+def bench_partial(events: list):
+    """ev/s чтения полей analytics-group тремя способами (JSON на проводе)."""
+    codec   = make_codec("json", BENCH_TOPIC)
+    decoder = PartialDecoder({"eventType": str, "payload.articleId": int})
+    messages = [
+        (codec.encode(e), [("eventType", e["eventType"].encode()), ("entityId", e["entityId"].encode())])
+        for e in events
+    ]
+
+    def run(label, fn):
+        started = time.perf_counter()
+        for data, headers in messages:
+            fn(data, headers)
+        rate = len(messages) / (time.perf_counter() - started)
+        print(f"  {label:<34}{rate:>14,.0f} ev/s")
+
+    run("full decode (decode_any)", lambda data, _: decode_any(BENCH_TOPIC, data))
+    run("PartialDecoder, JSON key scan", lambda data, _: decoder.extract(BENCH_TOPIC, data))
+    run("PartialDecoder, Kafka headers", lambda data, headers: decoder.extract(BENCH_TOPIC, data, headers))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=20_000)
+    args = parser.parse_args()
+
+    samples = sample_events(args.events)
+    print(f"{'event':<18}{'codec':<10}{'avg bytes':>10}{'encode ev/s':>14}{'decode ev/s':>14}")
+    for event_type, events in samples.items():
+        baseline = None
+        for name in CODECS:
+            codec = make_codec(name, BENCH_TOPIC)
+            size, enc, dec = bench(codec, events)
+            baseline = baseline or size
+            print(
+                f"{event_type:<18}{name:<10}{size:>10.0f}{enc:>14,.0f}{dec:>14,.0f}"
+                f"   ({size / baseline:.0%} of json)"
+            )
+
+    print("\nПоля analytics-group из ArticleViewed:")
+    bench_partial(samples["ArticleViewed"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Микробенчмарк построения событий: build_article_*_event vs EventFactory.
+
+    python bench_events.py [--events 200000] [--tick-every 100]
+
+--tick-every — сколько событий приходится на один factory.tick()
+(в loadtest-режиме тик — одна итерация цикла отправки).
+"""
+
+import argparse
+import json
+import random
+import time
+
+from producer import (
+    EventFactory,
+    build_article_liked_event,
+    build_article_published_event,
+    build_article_viewed_event,
+)
+
+
+def _shape(event: dict) -> dict:
+    """Ключи и типы значений события (рекурсивно) — для проверки контракта."""
+    return {
+        k: _shape(v) if isinstance(v, dict) else type(v).__name__
+        for k, v in event.items()
+    }
+
+
+def bench_builders(n: int) -> float:
+    started = time.perf_counter()
+    for i in range(n):
+        roll = i % 15
+        if roll == 0:
+            build_article_published_event(3_000_001 + i)
+        elif roll < 11:
+            build_article_viewed_event(random.randint(1, 3_000_000), f"user-{random.randint(1, 50000)}")
+        else:
+            build_article_liked_event(random.randint(1, 3_000_000), f"user-{random.randint(1, 50000)}")
+    return n / (time.perf_counter() - started)
+
+
+def bench_factory(n: int, tick_every: int) -> float:
+    factory = EventFactory()
+    started = time.perf_counter()
+    for i in range(n):
+        if i % tick_every == 0:
+            factory.tick()
+        roll = i % 15
+        if roll == 0:
+            factory.article_published(3_000_001 + i)
+        elif roll < 11:
+            factory.article_viewed(random.randint(1, 3_000_000), factory.random_user_id())
+        else:
+            factory.article_liked(random.randint(1, 3_000_000), factory.random_user_id())
+    return n / (time.perf_counter() - started)
+
+
+def check_contract():
+    factory = EventFactory()
+    pairs = [
+        (build_article_published_event(1), factory.article_published(1)),
+        (build_article_viewed_event(1, "user-1"), factory.article_viewed(1, "user-1")),
+        (build_article_liked_event(1, "user-1"), factory.article_liked(1, "user-1")),
+    ]
+    for reference, fast in pairs:
+        assert _shape(reference) == _shape(fast), (
+            f"shape mismatch for {reference['eventType']}:\n"
+            f"{json.dumps(_shape(reference))}\n{json.dumps(_shape(fast))}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=200_000)
+    parser.add_argument("--tick-every", type=int, default=100)
+    args = parser.parse_args()
+
+    check_contract()
+    print("Контракт событий совпадает (ключи и типы)")
+
+    builders = bench_builders(args.events)
+    factory  = bench_factory(args.events, args.tick_every)
+    print(f"build_article_*_event : {builders:>12,.0f} ev/s")
+    print(f"EventFactory          : {factory:>12,.0f} ev/s  (x{factory / builders:.2f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -12,26 +12,56 @@ News Aggregator - Kafka Producer (pure kafka-python, без FastStream)
 
 Формат каждого сообщения:
   eventId, eventType, entityId, timestamp, source, version, payload, metadata
+
+Режимы (PRODUCER_MODE):
+  demo      — 1 итерация/сек, как раньше (по умолчанию)
+  loadtest  — целевой RATE событий/сек, микс топиков, асинхронная доставка
+              через callbacks, отчёт о фактическом throughput и p50/p95/p99
+
+События строит EventFactory (тот же формат, что build_article_*_event,
+но без лишних аллокаций); сравнение — bench_events.py.
+
+Выбор статьи для просмотров/лайков и веса категорий/источников задаёт
+общий с agregatorCreate.py профиль (common/distributions.py, POPULARITY_DIST,
+RECENCY_HALF_LIFE_DAYS, CATEGORY_WEIGHTS, ...).
 """
 
-import json
+import os
 import uuid
 import random
 import logging
 import time
+from collections import defaultdict
 from datetime import datetime, timezone
+from itertools import chain
 from typing import Optional
 
 from kafka import KafkaProducer
 from kafka.errors import NoBrokersAvailable
 
+from common.distributions import DataProfile
+from common.event_codecs import EventSerializer
+
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s %(levelname)s [producer] %(message)s",
 )
 logger = logging.getLogger("news-producer")
 
-BOOTSTRAP = "kafka:29092"
+BOOTSTRAP = os.getenv("KAFKA_BOOTSTRAP_SERVERS", "kafka:29092")
+
+PRODUCER_MODE = os.getenv("PRODUCER_MODE", "demo")
+
+# ─── Load test ────────────────────────────────────────────────────────────────
+LOADTEST_RATE        = int(os.getenv("LOADTEST_RATE", "10000"))        # событий/сек, все топики
+LOADTEST_DURATION_S  = int(os.getenv("LOADTEST_DURATION_S", "0"))      # 0 = бесконечно
+LOADTEST_MIX         = os.getenv("LOADTEST_MIX", "1:10:4")             # published:viewed:liked
+LOADTEST_REPORT_S    = int(os.getenv("LOADTEST_REPORT_S", "10"))
+LOADTEST_LINGER_MS   = int(os.getenv("LOADTEST_LINGER_MS", "20"))
+LOADTEST_BATCH_SIZE  = int(os.getenv("LOADTEST_BATCH_SIZE", "262144"))
+LOADTEST_COMPRESSION = os.getenv("LOADTEST_COMPRESSION", "lz4") or None  # gzip/snappy/lz4/zstd
+LOADTEST_ACKS        = os.getenv("LOADTEST_ACKS", "1")
+LOADTEST_TICK_S      = 0.005
 
 TOPIC_ARTICLES  = "news.articles.events"
 TOPIC_VIEWS     = "news.views.events"
@@ -73,6 +103,14 @@ BASE_CONTENTS = [
     "Market participants are closely watching the situation for potential opportunities.",
 ]
 
+# Популярность статей, категории/источники — общий с agregatorCreate.py профиль
+# (POPULARITY_DIST=zipf и т.д., см. common/distributions.py): горячие статьи
+# в потоке просмотров совпадают с горячими статьями в БД
+PROFILE = DataProfile.from_env(
+    [cat_name for _, cat_name, _ in CATEGORIES],
+    [src_name for _, src_name, _ in SOURCES],
+)
+
 USER_AGENTS = [
     "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
     "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36",
@@ -206,19 +244,186 @@ def build_article_liked_event(article_id: int, user_id: str) -> dict:
     }
 
 
-def make_producer() -> KafkaProducer:
-    """Подключается к Kafka, ретраит до победы."""
+# ─── Быстрая фабрика событий ──────────────────────────────────────────────────
+# Тот же формат, что у build_article_*_event, но:
+#   - фрагменты категорий/источников/авторов посчитаны заранее;
+#   - случайные значения (UUID, IP, user id, счётчики) берутся блоками;
+#   - время берётся один раз на тик (EventFactory.tick), а не дважды на событие.
+# build_article_*_event остаются эталоном — их сравнивает bench_events.py.
+
+RANDOM_BLOCK_SIZE = 4096
+
+_CATEGORY_FRAGMENTS = [
+    (cat_id, cat_name, cat_name.capitalize(), f"https://newsportal.com/{cat_name}/")
+    for cat_id, cat_name, _ in CATEGORIES
+]
+_SOURCE_FRAGMENTS  = [(src_id, src_name) for src_id, src_name, _ in SOURCES]
+_AUTHOR_FULL_NAMES = {i: f"Author_{i} LastName_{i}" for i in range(1, 101)}
+_AUTHOR_NAMES      = [f"Author_{i}" for i in range(1, 101)]
+_OCTETS_1_254      = [str(i) for i in range(1, 255)]
+_OCTETS_0_255      = [str(i) for i in range(0, 256)]
+_UUID_VARIANT      = {c: "89ab"[int(c, 16) & 3] for c in "0123456789abcdef"}
+
+
+def _uuid4_block(n: int) -> list:
+    """n строк UUID4 из одного os.urandom — без uuid.UUID() на каждое событие."""
+    h = os.urandom(16 * n).hex()
+    variant = _UUID_VARIANT
+    return [
+        f"{h[i:i + 8]}-{h[i + 8:i + 12]}-4{h[i + 13:i + 16]}-"
+        f"{variant[h[i + 16]]}{h[i + 17:i + 20]}-{h[i + 20:i + 32]}"
+        for i in range(0, 32 * n, 32)
+    ]
+
+
+def _ip_block(n: int) -> list:
+    choices = random.choices
+    return [
+        f"{a}.{b}.{c}.{d}"
+        for a, b, c, d in zip(
+            choices(_OCTETS_1_254, k=n), choices(_OCTETS_0_255, k=n),
+            choices(_OCTETS_0_255, k=n), choices(_OCTETS_1_254, k=n),
+        )
+    ]
+
+
+def _randint_block(lo: int, hi: int):
+    population = range(lo, hi + 1)
+    return lambda n: random.choices(population, k=n)
+
+
+def _choice_block(population: list, weighted=None):
+    """weighted — WeightedChoice из PROFILE (None = равновероятно)."""
+    cum_weights = weighted.cum_weights if weighted else None
+    return lambda n: random.choices(population, cum_weights=cum_weights, k=n)
+
+
+def _stream(fill, block_size: int = RANDOM_BLOCK_SIZE):
+    """Бесконечный итератор, который дозаполняется блоками по block_size."""
+    return chain.from_iterable(iter(lambda: fill(block_size), None))
+
+
+class EventFactory:
+    """
+    Генератор событий ArticlePublished/ArticleViewed/ArticleLiked.
+    Вызывайте tick() раз в итерацию цикла отправки — все события до следующего
+    tick() получают одинаковые timestamp и publishDate.
+    """
+
+    def __init__(self):
+        self._uuids      = _stream(_uuid4_block)
+        self._ips        = _stream(_ip_block)
+        self._categories = _stream(_choice_block(_CATEGORY_FRAGMENTS, PROFILE.categories))
+        self._sources    = _stream(_choice_block(_SOURCE_FRAGMENTS, PROFILE.sources))
+        self._titles     = _stream(_choice_block(BASE_TITLES))
+        self._contents   = _stream(_choice_block(BASE_CONTENTS))
+        self._agents     = _stream(_choice_block(USER_AGENTS))
+        self._author_ids = _stream(_randint_block(1, 100))
+        self._views      = _stream(_randint_block(1, 50000))
+        self._likes_view = _stream(_randint_block(0, 1000))
+        self._likes_like = _stream(_randint_block(1, 1000))
+        self._user_ids   = _stream(_choice_block([f"user-{i}" for i in range(1, 50001)]))
+        self.tick()
+
+    def tick(self):
+        now = datetime.now(timezone.utc)
+        self._ts_ms = int(now.timestamp() * 1000)
+        self._iso   = now.isoformat()
+
+    def random_user_id(self) -> str:
+        return next(self._user_ids)
+
+    def article_published(self, article_id: int) -> dict:
+        cat_id, cat_name, cat_cap, url_prefix = next(self._categories)
+        src_id, src_name = next(self._sources)
+        author_id = next(self._author_ids)
+        return {
+            "eventId":   next(self._uuids),
+            "eventType": "ArticlePublished",
+            "entityId":  str(article_id),
+            "timestamp": self._ts_ms,
+            "source":    "news-cms",
+            "version":   "1.0",
+            "payload": {
+                "articleId":   article_id,
+                "title":       f"{next(self._titles)} #{article_id} - {cat_cap}",
+                "content":     f"{next(self._contents)} Article #{article_id}.",
+                "categoryId":  cat_id,
+                "categoryName": cat_name,
+                "sourceId":    src_id,
+                "sourceName":  src_name,
+                "authorId":    author_id,
+                "authorName":  _AUTHOR_FULL_NAMES[author_id],
+                "viewsCount":  0,
+                "likesCount":  0,
+                "publishDate": self._iso,
+                "url":         f"{url_prefix}{article_id}",
+            },
+            "metadata": {
+                "correlationId": next(self._uuids),
+                "userId":        None,
+                "ipAddress":     next(self._ips),
+                "userAgent":     None,
+                "environment":   "production",
+            },
+        }
+
+    def _interaction(self, event_type: str, article_id: int, user_id: str, likes) -> dict:
+        cat_id, cat_name, _, url_prefix = next(self._categories)
+        src_id, src_name = next(self._sources)
+        return {
+            "eventId":   next(self._uuids),
+            "eventType": event_type,
+            "entityId":  str(article_id),
+            "timestamp": self._ts_ms,
+            "source":    "news-api",
+            "version":   "1.0",
+            "payload": {
+                "articleId":   article_id,
+                "title":       f"{next(self._titles)} #{article_id}",
+                "content":     "",
+                "categoryId":  cat_id,
+                "categoryName": cat_name,
+                "sourceId":    src_id,
+                "sourceName":  src_name,
+                "authorId":    next(self._author_ids),
+                "authorName":  _AUTHOR_NAMES[next(self._author_ids) - 1],
+                "viewsCount":  next(self._views),
+                "likesCount":  next(likes),
+                "publishDate": self._iso,
+                "url":         f"{url_prefix}{article_id}",
+            },
+            "metadata": {
+                "correlationId": next(self._uuids),
+                "userId":        user_id,
+                "ipAddress":     next(self._ips),
+                "userAgent":     next(self._agents),
+                "environment":   "production",
+            },
+        }
+
+    def article_viewed(self, article_id: int, user_id: str) -> dict:
+        return self._interaction("ArticleViewed", article_id, user_id, self._likes_view)
+
+    def article_liked(self, article_id: int, user_id: str) -> dict:
+        return self._interaction("ArticleLiked", article_id, user_id, self._likes_like)
+
+
+def make_producer(**overrides) -> KafkaProducer:
+    """Подключается к Kafka, ретраит до победы. overrides — параметры KafkaProducer."""
+    config = dict(
+        bootstrap_servers=BOOTSTRAP,
+        value_serializer=EventSerializer(),   # codec по топику, см. common/event_codecs.py
+        key_serializer=lambda k: k.encode("utf-8") if k else None,
+        acks="all",
+        retries=5,
+        linger_ms=10,        # небольшая задержка для батчинга
+        batch_size=16384,
+    )
+    config.update(overrides)
     while True:
         try:
-            p = KafkaProducer(
-                bootstrap_servers=BOOTSTRAP,
-                value_serializer=lambda v: json.dumps(v).encode("utf-8"),
-                key_serializer=lambda k: k.encode("utf-8") if k else None,
-                acks="all",
-                retries=5,
-                linger_ms=10,        # небольшая задержка для батчинга
-                batch_size=16384,
-            )
+            p = KafkaProducer(**config)
             logger.info(f"Connected to Kafka at {BOOTSTRAP}")
             return p
         except NoBrokersAvailable:
@@ -236,6 +441,7 @@ def run():
     time.sleep(15)
 
     producer = make_producer()
+    factory  = EventFactory()
 
     # Начинаем с article_id = 3_000_001 чтобы не пересекаться с данными в БД
     # (agregatorCreate.py генерирует 3 млн записей с id 1..3_000_000)
@@ -244,12 +450,14 @@ def run():
     viewed_count = 0
     liked_count = 0
 
-    logger.info("Starting event generation loop...")
+    logger.info(f"Starting event generation loop ({PROFILE.describe()})...")
 
     while True:
         try:
+            factory.tick()
+
             # ── Event 1: ArticlePublished ──────────────────────────────────────
-            event1 = build_article_published_event(article_counter)
+            event1 = factory.article_published(article_counter)
             future = producer.send(
                 TOPIC_ARTICLES,
                 key=str(article_counter),
@@ -258,6 +466,7 @@ def run():
                     ("eventType", b"ArticlePublished"),
                     ("version",   b"1.0"),
                     ("source",    b"news-cms"),
+                    ("entityId",  str(article_counter).encode()),
                 ],
             )
             future.get(timeout=10)  # ждём подтверждения
@@ -269,10 +478,11 @@ def run():
             )
 
             # ── Event 2: ArticleViewed ─────────────────────────────────────────
-            # Просматривают как новые статьи, так и старые из БД (1..article_counter)
-            view_id   = random.randint(1, article_counter)
-            user_id   = f"user-{random.randint(1, 50000)}"
-            event2    = build_article_viewed_event(view_id, user_id)
+            # Просматривают как новые статьи, так и старые из БД (1..article_counter);
+            # при POPULARITY_DIST=zipf — в основном горячие статьи каталога
+            view_id   = PROFILE.pick_article(article_counter)
+            user_id   = factory.random_user_id()
+            event2    = factory.article_viewed(view_id, user_id)
             producer.send(
                 TOPIC_VIEWS,
                 key=user_id,
@@ -281,6 +491,7 @@ def run():
                     ("eventType", b"ArticleViewed"),
                     ("version",   b"1.0"),
                     ("source",    b"news-api"),
+                    ("entityId",  str(view_id).encode()),
                 ],
             )
             viewed_count += 1
@@ -291,9 +502,9 @@ def run():
 
             # ── Event 3: ArticleLiked (40% вероятность) ────────────────────────
             if random.random() < 0.40:
-                like_id   = random.randint(1, article_counter)
-                like_user = f"user-{random.randint(1, 50000)}"
-                event3    = build_article_liked_event(like_id, like_user)
+                like_id   = PROFILE.pick_article(article_counter)
+                like_user = factory.random_user_id()
+                event3    = factory.article_liked(like_id, like_user)
                 producer.send(
                     TOPIC_REACTIONS,
                     key=like_user,
@@ -302,6 +513,7 @@ def run():
                         ("eventType", b"ArticleLiked"),
                         ("version",   b"1.0"),
                         ("source",    b"news-api"),
+                        ("entityId",  str(like_id).encode()),
                     ],
                 )
                 liked_count += 1
@@ -336,5 +548,168 @@ def run():
             producer = make_producer()
 
 
+# ─── Load test mode ───────────────────────────────────────────────────────────
+# К этим заголовкам добавляется ("entityId", id) — его читает PartialDecoder
+HEADERS_PUBLISHED = [("eventType", b"ArticlePublished"), ("version", b"1.0"), ("source", b"news-cms")]
+HEADERS_VIEWED    = [("eventType", b"ArticleViewed"),    ("version", b"1.0"), ("source", b"news-api")]
+HEADERS_LIKED     = [("eventType", b"ArticleLiked"),     ("version", b"1.0"), ("source", b"news-api")]
+
+
+def _parse_mix(mix: str) -> list:
+    """'1:10:4' → накопленные доли [published, published+viewed, 1.0]."""
+    weights = [float(w) for w in mix.split(":")]
+    if len(weights) != 3 or sum(weights) <= 0:
+        raise ValueError(f"LOADTEST_MIX must be 'published:viewed:liked', got {mix!r}")
+    total = sum(weights)
+    return [weights[0] / total, (weights[0] + weights[1]) / total, 1.0]
+
+
+LATENCY_BUCKET_MS = 0.1   # разрешение гистограммы задержек
+
+
+def _percentile(histogram: dict, pct: float) -> float:
+    """Перцентиль по гистограмме {bucket: count}, где bucket = мс / LATENCY_BUCKET_MS."""
+    total = sum(histogram.values())
+    if not total:
+        return 0.0
+    rank = pct / 100 * total
+    seen = 0
+    for bucket in sorted(histogram):
+        seen += histogram[bucket]
+        if seen >= rank:
+            return bucket * LATENCY_BUCKET_MS
+    return max(histogram) * LATENCY_BUCKET_MS
+
+
+class DeliveryStats:
+    """
+    Счётчики доставки, которые обновляют callbacks KafkaProducer.
+    Задержки копятся в гистограммах (за интервал и за весь прогон), поэтому
+    память не растёт с длительностью теста.
+    """
+
+    def __init__(self):
+        self.sent      = 0
+        self.delivered = 0
+        self.failed    = 0
+        self.interval_hist = defaultdict(int)
+        self.total_hist    = defaultdict(int)
+
+    def track(self, future, sent_at: float):
+        self.sent += 1
+        future.add_callback(self._on_success, sent_at)
+        future.add_errback(self._on_error)
+
+    def _on_success(self, sent_at, _metadata):
+        self.delivered += 1
+        bucket = int((time.perf_counter() - sent_at) * 1000 / LATENCY_BUCKET_MS)
+        self.interval_hist[bucket] += 1
+        self.total_hist[bucket] += 1
+
+    def _on_error(self, exc):
+        self.failed += 1
+        logger.error(f"Delivery failed: {exc}")
+
+    def drain_interval(self) -> dict:
+        histogram, self.interval_hist = self.interval_hist, defaultdict(int)
+        return histogram
+
+
+def _report(stats: DeliveryStats, histogram: dict, interval_s: float,
+            delivered: int, label: str):
+    rate = delivered / interval_s if interval_s > 0 else 0.0
+    logger.info(
+        f"[{label}] sent={stats.sent} delivered={stats.delivered} failed={stats.failed} "
+        f"throughput={rate:,.0f} ev/s "
+        f"latency p50={_percentile(histogram, 50):.1f}ms "
+        f"p95={_percentile(histogram, 95):.1f}ms "
+        f"p99={_percentile(histogram, 99):.1f}ms"
+    )
+
+
+def run_loadtest():
+    """
+    Нагрузочный режим: держит LOADTEST_RATE событий/сек суммарно по трём топикам
+    в пропорции LOADTEST_MIX. send() не блокируется — подтверждения приходят в
+    callbacks, из них считаются фактический throughput и задержка доставки.
+    """
+    mix = _parse_mix(LOADTEST_MIX)
+    logger.info(
+        f"Load test: rate={LOADTEST_RATE} ev/s mix={LOADTEST_MIX} "
+        f"linger_ms={LOADTEST_LINGER_MS} batch_size={LOADTEST_BATCH_SIZE} "
+        f"compression={LOADTEST_COMPRESSION} acks={LOADTEST_ACKS} {PROFILE.describe()}"
+    )
+
+    producer = make_producer(
+        acks="all" if LOADTEST_ACKS == "all" else int(LOADTEST_ACKS),
+        linger_ms=LOADTEST_LINGER_MS,
+        batch_size=LOADTEST_BATCH_SIZE,
+        compression_type=LOADTEST_COMPRESSION,
+        buffer_memory=256 * 1024 * 1024,
+        max_in_flight_requests_per_connection=5,
+    )
+    stats   = DeliveryStats()
+    factory = EventFactory()
+    article_counter = 3_000_001
+
+    started     = time.perf_counter()
+    last_report = started
+    delivered_at_report = 0
+
+    try:
+        while True:
+            now = time.perf_counter()
+            elapsed = now - started
+            if LOADTEST_DURATION_S and elapsed >= LOADTEST_DURATION_S:
+                break
+
+            factory.tick()
+
+            # Досылаем столько, сколько положено к этому моменту по целевой скорости
+            due = int(elapsed * LOADTEST_RATE) - stats.sent
+            for _ in range(due):
+                roll = random.random()
+                sent_at = time.perf_counter()
+                if roll < mix[0]:
+                    article_id = article_counter
+                    event = factory.article_published(article_id)
+                    future = producer.send(TOPIC_ARTICLES, key=str(article_id), value=event,
+                                           headers=HEADERS_PUBLISHED + [("entityId", str(article_id).encode())])
+                    article_counter += 1
+                elif roll < mix[1]:
+                    article_id = PROFILE.pick_article(article_counter)
+                    user_id = factory.random_user_id()
+                    event = factory.article_viewed(article_id, user_id)
+                    future = producer.send(TOPIC_VIEWS, key=user_id, value=event,
+                                           headers=HEADERS_VIEWED + [("entityId", str(article_id).encode())])
+                else:
+                    article_id = PROFILE.pick_article(article_counter)
+                    user_id = factory.random_user_id()
+                    event = factory.article_liked(article_id, user_id)
+                    future = producer.send(TOPIC_REACTIONS, key=user_id, value=event,
+                                           headers=HEADERS_LIKED + [("entityId", str(article_id).encode())])
+                stats.track(future, sent_at)
+
+            if now - last_report >= LOADTEST_REPORT_S:
+                _report(stats, stats.drain_interval(), now - last_report,
+                        stats.delivered - delivered_at_report, "LOADTEST")
+                last_report = now
+                delivered_at_report = stats.delivered
+
+            if due <= 0:
+                time.sleep(LOADTEST_TICK_S)
+
+    except KeyboardInterrupt:
+        logger.info("Load test interrupted")
+
+    producer.flush()
+    total_s = time.perf_counter() - started
+    _report(stats, stats.total_hist, total_s, stats.delivered, "LOADTEST TOTAL")
+    producer.close()
+
+
 if __name__ == "__main__":
-    run()
\ No newline at end of file
+    if PRODUCER_MODE == "loadtest":
+        run_loadtest()
+    else:
+        run()
\ No newline at end of file
@@ -1,9 +1,9 @@
-import json
-import redis
 from datetime import datetime
 
-# Подключение к Redis (с хоста)
-r = redis.Redis(host='localhost', port=6379, db=0)
+from common.redis_cache import ArticleCacheWriter, connect_redis
+
+# Подключение к Redis (с хоста; REDIS_HOST/REDIS_PORT переопределяют)
+r = connect_redis()
 
 # Актуальные праздничные изображения (обновлённые ссылки на декабрь 2025)
 image_urls = [
@@ -35,26 +35,22 @@ news_items = [
 
 print("Заполняем Redis тестовыми данными для новостного агрегатора...\n")
 
-for i, item in enumerate(news_items, start=1):
-    # Кэш полной статьи (как JSON) с TTL 1 час
-    article_key = f"article:{i}"
-    article_data = {
-        "id": i,
-        "title": item["title"],
-        "category": item["category"],
-        "image_url": image_urls[i-1],
-        "published_at": datetime(2025, 12, 20 + (i % 5), 12, 0, 0).isoformat(),
-        "views": 0
-    }
-    r.set(article_key, json.dumps(article_data, ensure_ascii=False), ex=3600)
-
-    # Отдельный счётчик просмотров
-    r.set(f"article:{i}:views", 0)
-
-    # Сортированный набор для топа по просмотрам (zset)
-    r.zadd("top_articles", {i: 0})
+# Все записи уходят одним pipeline: SET статьи + SET счётчика на каждую статью
+# и один ZADD со всеми статьями (для миллионов статей — warm_redis_cache.py)
+with ArticleCacheWriter(r, batch_size=len(news_items)) as writer:
+    for i, item in enumerate(news_items, start=1):
+        # Кэш полной статьи (как JSON) с TTL 1 час, счётчик просмотров article:{i}:views
+        # и место в сортированном наборе top_articles
+        writer.add({
+            "id": i,
+            "title": item["title"],
+            "category": item["category"],
+            "image_url": image_urls[i-1],
+            "published_at": datetime(2025, 12, 20 + (i % 5), 12, 0, 0).isoformat(),
+            "views": 0
+        })
 
-    print(f"Добавлена в кэш: article:{i} — {item['title']}")
+        print(f"Добавлена в кэш: article:{i} — {item['title']}")
 
 print("\nГотово! Redis заполнен:")
 print("- 10 статей в кэше (ключи article:1 ... article:10)")
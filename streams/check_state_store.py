@@ -0,0 +1,77 @@
+"""
+Проверка round-trip PersistentKVStore через changelog: checkpoint → удалить
+SQLite → restore. Пишет во временный changelog-топик и удаляет его в конце.
+
+    python check_state_store.py [--bootstrap localhost:9092] [--keys 1000]
+
+Из каталога streams/: PYTHONPATH=.. python check_state_store.py
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import uuid
+from pathlib import Path
+
+from kafka import TopicPartition
+from kafka.admin import KafkaAdminClient
+
+from state_store import PersistentKVStore, ensure_changelog_topic, make_changelog_producer
+
+
+def drop_local_state(store: PersistentKVStore):
+    """Новый контейнер: локальной базы нет, только changelog."""
+    store.close()
+    for suffix in ("", "-wal", "-shm"):
+        Path(f"{store.path}{suffix}").unlink(missing_ok=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bootstrap", default="localhost:9092")
+    parser.add_argument("--keys", type=int, default=1000)
+    args = parser.parse_args()
+
+    topic = f"streams-state-check-{uuid.uuid4().hex[:8]}-changelog"
+    ensure_changelog_topic(args.bootstrap, topic)
+    producer = make_changelog_producer(args.bootstrap)
+    input_tp = TopicPartition("streams-state-check-input", 0)
+    rng = random.Random(42)
+    expected = {}
+
+    try:
+        with tempfile.TemporaryDirectory() as state_dir:
+            state_dir = Path(state_dir)
+            store = PersistentKVStore("check", topic, changelog_partition=0, state_dir=state_dir)
+            # Два checkpoint: restore должен взять последнее значение ключа
+            for offset in (args.keys, 2 * args.keys):
+                for _ in range(args.keys):
+                    key = f"article-{rng.randrange(args.keys // 2 or 1)}"
+                    expected[key] = store.increment(key)
+                store.checkpoint(producer, {input_tp: offset})
+            drop_local_state(store)
+
+            restored = PersistentKVStore("check", topic, changelog_partition=0, state_dir=state_dir)
+            restored.restore(args.bootstrap)
+            values = {key: restored.get(key, None) for key in expected}
+            offsets = restored.input_offsets()
+            restored.close()
+    finally:
+        producer.close()
+        admin = KafkaAdminClient(bootstrap_servers=args.bootstrap)
+        try:
+            admin.delete_topics([topic])
+        finally:
+            admin.close()
+
+    wrong = {key: (values[key], value) for key, value in expected.items() if values[key] != value}
+    if wrong or offsets.get(input_tp) != 2 * args.keys:
+        print(f"❌ restore mismatch: {len(wrong)} keys (restored, expected) e.g. "
+              f"{list(wrong.items())[:5]}; input offset {offsets.get(input_tp)} != {2 * args.keys}")
+        sys.exit(1)
+    print(f"✅ {len(expected)} keys and input offset {offsets[input_tp]} restored from {topic}")
+
+
+if __name__ == "__main__":
+    main()
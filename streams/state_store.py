@@ -0,0 +1,338 @@
+"""
+Персистентное хранилище состояния для KTable-агрегатов streams_app.
+
+PersistentKVStore — счётчики key -> int (delete() — tombstone в changelog):
+  - на диске: SQLite (WAL) в STATE_DIR, память ограничена LRU-кэшем чтения
+    и буфером грязных ключей (write-back);
+  - checkpoint(): грязные ключи → compacted changelog-топик, затем одной
+    SQLite-транзакцией → значения + входные оффсеты + оффсеты changelog;
+    после этого вызывающий коммитит те же оффсеты в Kafka;
+  - при старте: локальная база + догон changelog с сохранённого оффсета;
+    без локальной базы (новый контейнер) — полный replay changelog.
+    Входные оффсеты тоже пишутся в changelog (ключи "__offset__|topic|partition"),
+    поэтому восстановленное состояние и позиция чтения всегда согласованы;
+  - changelog_partition: store одной входной партиции (задача streams_app)
+    пишет и читает только свою партицию changelog — так состояние передаётся
+    между воркерами при ребалансе.
+
+Формат changelog свой, не кодеки событий (EventDeserializer выбирает
+Avro/Protobuf по первому байту, а счётчик — это просто JSON-число):
+значение — JSON (int или dict), ключ — UTF-8. Пишет только producer из
+make_changelog_producer(), restore() читает тем же форматом.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from kafka import KafkaConsumer, KafkaProducer, TopicPartition
+from kafka.admin import KafkaAdminClient, NewTopic
+from kafka.errors import TopicAlreadyExistsError
+from kafka.structs import OffsetAndMetadata
+
+logger = logging.getLogger("news-streams")
+
+STATE_DIR          = Path(os.getenv("STATE_DIR", "/var/lib/streams-state"))
+STATE_CACHE_SIZE   = int(os.getenv("STATE_CACHE_SIZE", "100000"))   # ключей в LRU
+STATE_MAX_DIRTY    = int(os.getenv("STATE_MAX_DIRTY", "50000"))     # checkpoint раньше интервала
+COMMIT_INTERVAL_S  = float(os.getenv("COMMIT_INTERVAL_S", "5"))
+
+OFFSET_KEY_PREFIX = "__offset__|"
+
+
+# ── Формат changelog ─────────────────────────────────────────────────────────
+def serialize_changelog_value(value) -> bytes | None:
+    """int/dict → JSON; None → tombstone."""
+    if value is None:
+        return None
+    return json.dumps(value, separators=(",", ":")).encode("utf-8")
+
+
+def deserialize_changelog_value(data: bytes | None):
+    if data is None:
+        return None
+    return json.loads(data)
+
+
+def serialize_changelog_key(key: str) -> bytes:
+    return key.encode("utf-8")
+
+
+def deserialize_changelog_key(data: bytes | None) -> str | None:
+    return data.decode("utf-8") if data is not None else None
+
+
+def make_changelog_producer(bootstrap: str, **overrides) -> KafkaProducer:
+    """Producer для checkpoint(): формат changelog, а не кодеки событий."""
+    return KafkaProducer(
+        bootstrap_servers=bootstrap,
+        value_serializer=serialize_changelog_value,
+        key_serializer=serialize_changelog_key,
+        acks="all",
+        retries=5,
+        **overrides,
+    )
+
+
+def ensure_changelog_topic(bootstrap: str, topic: str, partitions: int = 1):
+    """
+    Создаёт compacted changelog-топик, если его ещё нет. Число партиций должно
+    совпадать с входным топиком: партиция N changelog = состояние партиции N.
+    """
+    admin = KafkaAdminClient(bootstrap_servers=bootstrap)
+    try:
+        admin.create_topics([NewTopic(
+            name=topic,
+            num_partitions=partitions,
+            replication_factor=1,
+            topic_configs={"cleanup.policy": "compact", "min.compaction.lag.ms": "60000"},
+        )])
+        logger.info(f"[STATE] Created changelog topic {topic}")
+    except TopicAlreadyExistsError:
+        pass
+    finally:
+        admin.close()
+
+
+class PersistentKVStore:
+
+    def __init__(self, name: str, changelog_topic: str,
+                 changelog_partition: int | None = None,
+                 state_dir: Path = STATE_DIR,
+                 cache_size: int = STATE_CACHE_SIZE,
+                 max_dirty: int = STATE_MAX_DIRTY):
+        self.name = name
+        self.changelog_topic = changelog_topic
+        self.changelog_partition = changelog_partition
+        self.cache_size = cache_size
+        self.max_dirty  = max_dirty
+        self.cache = OrderedDict()   # чистые значения, LRU
+        self.dirty = {}              # изменённые после последнего checkpoint
+        self.last_checkpoint = time.monotonic()
+
+        state_dir.mkdir(parents=True, exist_ok=True)
+        self.path = state_dir / f"{name}.sqlite"
+        # Пишет только поток-владелец; check_same_thread=False — создаваться может в другом потоке
+        self.conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self.conn.executescript("""
+            PRAGMA journal_mode=WAL;
+            PRAGMA synchronous=NORMAL;
+            CREATE TABLE IF NOT EXISTS kv (
+                key   TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS input_offsets (
+                topic     TEXT,
+                partition INTEGER,
+                "offset"  INTEGER NOT NULL,
+                PRIMARY KEY (topic, partition)
+            );
+            CREATE TABLE IF NOT EXISTS changelog_offsets (
+                partition INTEGER PRIMARY KEY,
+                "offset"  INTEGER NOT NULL
+            );
+        """)
+
+    # ── Доступ к значениям ───────────────────────────────────────────────────
+    def get(self, key: str, default: int = 0) -> int:
+        if key in self.dirty:
+            value = self.dirty[key]
+            return default if value is None else value
+        value = self.cache.get(key)
+        if value is not None:
+            self.cache.move_to_end(key)
+            return value
+        row = self.conn.execute("SELECT value FROM kv WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return default
+        self._cache_put(key, row[0])
+        return row[0]
+
+    def put(self, key: str, value: int):
+        self.dirty[key] = value
+        self.cache.pop(key, None)
+
+    def increment(self, key: str, delta: int = 1) -> int:
+        value = self.get(key) + delta
+        self.put(key, value)
+        return value
+
+    def delete(self, key: str):
+        self.dirty[key] = None   # при checkpoint: tombstone в changelog и DELETE
+        self.cache.pop(key, None)
+
+    def items(self, prefix: str = "") -> dict:
+        """Все ключи с префиксом, включая несохранённые. Для небольших наборов (открытые окна)."""
+        rows = dict(self.conn.execute(
+            "SELECT key, value FROM kv WHERE substr(key, 1, ?) = ?", (len(prefix), prefix)
+        ))
+        for key, value in self.dirty.items():
+            if not key.startswith(prefix):
+                continue
+            if value is None:
+                rows.pop(key, None)
+            else:
+                rows[key] = value
+        return rows
+
+    def _cache_put(self, key: str, value: int):
+        self.cache[key] = value
+        self.cache.move_to_end(key)
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    # ── Checkpoint ───────────────────────────────────────────────────────────
+    def checkpoint_due(self) -> bool:
+        return (
+            len(self.dirty) >= self.max_dirty
+            or time.monotonic() - self.last_checkpoint >= COMMIT_INTERVAL_S
+        )
+
+    def checkpoint(self, producer, input_offsets: dict) -> dict:
+        """
+        Сохраняет грязные ключи и входные оффсеты {TopicPartition: next_offset}.
+        producer — из make_changelog_producer(). Возвращает оффсеты в формате
+        consumer.commit(); коммитить их в Kafka нужно только после успешного
+        возврата.
+        """
+        partition = self.changelog_partition
+        futures = [
+            producer.send(self.changelog_topic, key=key, value=value, partition=partition)
+            for key, value in self.dirty.items()
+        ]
+        futures += [
+            producer.send(self.changelog_topic, partition=partition,
+                          key=f"{OFFSET_KEY_PREFIX}{tp.topic}|{tp.partition}", value=offset)
+            for tp, offset in input_offsets.items()
+        ]
+        producer.flush()
+
+        changelog_next = {}
+        for future in futures:
+            metadata = future.get(timeout=30)
+            changelog_next[metadata.partition] = max(
+                changelog_next.get(metadata.partition, 0), metadata.offset + 1
+            )
+
+        with self.conn:
+            self.conn.execute("BEGIN")
+            self._write_values(self.dirty)
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO input_offsets (topic, partition, "offset") VALUES (?, ?, ?)',
+                [(tp.topic, tp.partition, offset) for tp, offset in input_offsets.items()],
+            )
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO changelog_offsets (partition, "offset") VALUES (?, ?)',
+                changelog_next.items(),
+            )
+
+        for key, value in self.dirty.items():
+            if value is not None:
+                self._cache_put(key, value)
+        self.dirty.clear()
+        self.last_checkpoint = time.monotonic()
+        return {tp: OffsetAndMetadata(offset, None) for tp, offset in input_offsets.items()}
+
+    def input_offsets(self) -> dict:
+        """Оффсеты входных топиков, согласованные с сохранённым состоянием."""
+        rows = self.conn.execute('SELECT topic, partition, "offset" FROM input_offsets').fetchall()
+        return {TopicPartition(topic, partition): offset for topic, partition, offset in rows}
+
+    # ── Восстановление ───────────────────────────────────────────────────────
+    def restore(self, bootstrap: str):
+        """Догоняет локальную базу по changelog до его текущего конца."""
+        started = time.monotonic()
+        consumer = KafkaConsumer(
+            bootstrap_servers=bootstrap,
+            group_id=None,
+            enable_auto_commit=False,
+            value_deserializer=deserialize_changelog_value,
+            key_deserializer=deserialize_changelog_key,
+        )
+        try:
+            partitions = consumer.partitions_for_topic(self.changelog_topic) or set()
+            if self.changelog_partition is not None:
+                partitions = partitions & {self.changelog_partition}
+            tps = [TopicPartition(self.changelog_topic, p) for p in partitions]
+            if not tps:
+                return
+            consumer.assign(tps)
+            stored = dict(self.conn.execute('SELECT partition, "offset" FROM changelog_offsets'))
+            for tp in tps:
+                if tp.partition in stored:
+                    consumer.seek(tp, stored[tp.partition])
+                else:
+                    consumer.seek_to_beginning(tp)
+            end_offsets = consumer.end_offsets(tps)
+
+            values, offsets, restored = {}, {}, 0
+            while any(consumer.position(tp) < end_offsets[tp] for tp in tps):
+                for msgs in consumer.poll(timeout_ms=1000, max_records=10000).values():
+                    for msg in msgs:
+                        restored += 1
+                        if msg.key.startswith(OFFSET_KEY_PREFIX):
+                            topic, partition = msg.key[len(OFFSET_KEY_PREFIX):].rsplit("|", 1)
+                            offsets[(topic, int(partition))] = msg.value
+                        else:
+                            values[msg.key] = msg.value   # None — tombstone
+                if len(values) >= self.max_dirty:
+                    self._apply_restored(values, {}, {})
+                    values.clear()
+
+            self._apply_restored(
+                values, offsets,
+                {tp.partition: end_offsets[tp] for tp in tps},
+            )
+            logger.info(
+                f"[STATE] {self.name}: restored {restored} changelog records "
+                f"in {time.monotonic() - started:.1f}s"
+            )
+        finally:
+            consumer.close()
+
+    def _apply_restored(self, values: dict, offsets: dict, changelog_offsets: dict):
+        with self.conn:
+            self.conn.execute("BEGIN")
+            self._write_values(values)
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO input_offsets (topic, partition, "offset") VALUES (?, ?, ?)',
+                [(topic, partition, offset) for (topic, partition), offset in offsets.items()],
+            )
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO changelog_offsets (partition, "offset") VALUES (?, ?)',
+                changelog_offsets.items(),
+            )
+
+    def _write_values(self, values: dict):
+        """{key: value | None} в kv; None — удаление ключа. Внутри транзакции вызывающего."""
+        self.conn.executemany(
+            "INSERT INTO kv (key, value) VALUES (?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            [(key, value) for key, value in values.items() if value is not None],
+        )
+        self.conn.executemany(
+            "DELETE FROM kv WHERE key = ?",
+            [(key,) for key, value in values.items() if value is None],
+        )
+
+    # ── Статистика (для stats-logger, из любого потока) ──────────────────────
+    def summary(self, top: int = 3) -> tuple:
+        """(число ключей, top-N по значению) по сохранённому состоянию."""
+        conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+        try:
+            # Служебные ключи ("__stream_time__" и т.п.) в статистику не входят
+            total = conn.execute(r"SELECT count(*) FROM kv WHERE key NOT LIKE '\_\_%' ESCAPE '\'").fetchone()[0]
+            top_rows = conn.execute(
+                r"SELECT key, value FROM kv WHERE key NOT LIKE '\_\_%' ESCAPE '\' ORDER BY value DESC LIMIT ?",
+                (top,),
+            ).fetchall()
+        finally:
+            conn.close()
+        return total, top_rows
+
+    def close(self):
+        self.conn.close()
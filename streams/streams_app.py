@@ -4,24 +4,46 @@ Faust несовместим с Python 3.11 из-за mode.utils.contexts.nullco
 Реализуем то же самое вручную через kafka-python KafkaConsumer/KafkaProducer.
 
 1. ТРАНСФОРМАЦИЯ  — обогащаем ArticleViewed полем categoryLabel + engagementScore
-2. АГРЕГАЦИЯ      — считаем суммарные просмотры по article_id (в памяти, KTable-style)
-3. ОКОННОЕ ВЫЧИСЛЕНИЕ — просмотры по категории за последнюю 1 минуту (tumbling window)
+2. АГРЕГАЦИЯ      — считаем суммарные просмотры по article_id (KTable-style,
+                    PersistentKVStore: SQLite + compacted changelog, см. state_store.py)
+3. ОКОННОЕ ВЫЧИСЛЕНИЕ — просмотры по категории в окнах по event time
+   (tumbling или hopping, allowed lateness, один результат на закрытое окно)
 4. Результаты → отдельные топики
+
+0. REPARTITION — события перекладываются во внутренние топики с ключом
+   article_id (байты value не трогаем), чтобы все события статьи попадали
+   в одну партицию и агрегаты были полными без шага слияния. Для окон —
+   второй repartition по categoryId: все просмотры категории считает одна
+   задача, итог окна полный, а не сумма частичных по партициям
+
+Параллелизм — как в Kafka Streams: одна задача (task) на входную партицию.
+У задачи своё состояние (store + changelog-партиция с тем же номером), окна и
+suppression-буфер, поэтому общих блокировок нет. Задачи распределяются между
+STREAM_WORKERS процессами на каждый поток через consumer group; при ребалансе
+задача делает checkpoint и закрывается, новый владелец восстанавливает её
+состояние из changelog (счётчики статей и открытые окна). Если restore не
+удался, партиция ставится на паузу до следующей попытки.
 """
 
-import json
 import logging
+import multiprocessing
+import os
 import time
-import threading
-from collections import defaultdict
 from datetime import datetime, timezone
+from functools import partial
+
+from kafka import ConsumerRebalanceListener, KafkaConsumer, KafkaProducer, TopicPartition
+from kafka.admin import KafkaAdminClient, NewTopic
+from kafka.errors import KafkaError, TopicAlreadyExistsError
 
-from kafka import KafkaConsumer, KafkaProducer
-from kafka.errors import KafkaError
+from common.event_codecs import EventDeserializer, EventSerializer, PartialDecoder
+from state_store import PersistentKVStore, ensure_changelog_topic, make_changelog_producer
+from suppress import SuppressionBuffer
+from windows import WindowedCounter
 
 logging.basicConfig(
     level=logging.INFO,
-    format="%(asctime)s %(levelname)s [streams] %(message)s",
+    format="%(asctime)s %(levelname)s [streams] %(processName)s %(message)s",
 )
 logger = logging.getLogger("news-streams")
 
@@ -36,34 +58,62 @@ TOPIC_ENRICHED = "news.enriched.views"
 TOPIC_AGG      = "news.stats.article-views"
 TOPIC_WINDOW   = "news.stats.category-windows"
 
+# Внутренние топики: те же события, ключ = article_id
+REPARTITION_VIEWS = "streams-views-group-by-article-repartition"
+REPARTITION_LIKES = "streams-reactions-group-by-article-repartition"
+# Просмотры с ключом categoryId (только categoryId и timestamp) — для окон
+REPARTITION_CATEGORY = "streams-views-group-by-category-repartition"
+
+# Changelog topics (compacted) для восстановления KTables
+CHANGELOG_VIEWS = "streams-views-group-article-view-counts-changelog"
+CHANGELOG_LIKES = "streams-reactions-group-article-like-counts-changelog"
+CHANGELOG_WINDOWS = "streams-windows-group-category-window-counts-changelog"
+
 CATEGORY_LABELS = {
     1: "politics", 2: "sports", 3: "technology",
     4: "entertainment", 5: "business", 6: "health", 7: "science",
 }
 
-WINDOW_SECONDS = 60  # tumbling window size
-
+# news.stats.article-views: последнее значение по статье раз в COMMIT_INTERVAL_S
+AGG_SUPPRESS          = os.getenv("AGG_SUPPRESS", "true").lower() == "true"
+AGG_SUPPRESS_MAX_KEYS = int(os.getenv("AGG_SUPPRESS_MAX_KEYS", "50000"))
 
-# ─── State (in-memory KTables) ────────────────────────────────────────────────
-article_view_counts = defaultdict(int)   # article_id -> total views
-article_like_counts = defaultdict(int)   # article_id -> total likes
+# Окна по event time: ADVANCE == SIZE → tumbling, ADVANCE < SIZE → hopping
+WINDOW_SIZE_S    = int(os.getenv("WINDOW_SIZE_S", "60"))
+WINDOW_ADVANCE_S = int(os.getenv("WINDOW_ADVANCE_S", str(WINDOW_SIZE_S)))
+WINDOW_GRACE_S   = int(os.getenv("WINDOW_GRACE_S", "10"))   # allowed lateness
 
-# windowed: category_id -> list of timestamps in current window
-window_timestamps = defaultdict(list)
+# Параллелизм: процессов на каждый поток; партиций у создаваемых входных и
+# внутренних топиков (задач больше, чем партиций, не бывает)
+STREAM_WORKERS    = int(os.getenv("STREAM_WORKERS", str(os.cpu_count() or 1)))
+STREAM_PARTITIONS = int(os.getenv("STREAM_PARTITIONS", "6"))
+STATS_INTERVAL_S  = int(os.getenv("STATS_INTERVAL_S", "30"))
+RESTORE_RETRY_S   = int(os.getenv("RESTORE_RETRY_S", "10"))
 
-state_lock = threading.Lock()
+# Repartition producer: отправки копятся в батчи, сжатие — на уровне батча
+REPARTITION_LINGER_MS   = int(os.getenv("REPARTITION_LINGER_MS", "20"))
+REPARTITION_BATCH_SIZE  = int(os.getenv("REPARTITION_BATCH_SIZE", str(256 * 1024)))
+REPARTITION_COMPRESSION = os.getenv("REPARTITION_COMPRESSION", "lz4") or None
 
 
-def make_producer():
+def make_producer(raw=False, changelog=False, **overrides):
+    """
+    raw=True — value отправляется как есть (bytes), без сериализации;
+    changelog=True — формат changelog-топиков state_store, не кодеки событий.
+    """
     while True:
         try:
-            p = KafkaProducer(
-                bootstrap_servers=BOOTSTRAP,
-                value_serializer=lambda v: json.dumps(v).encode("utf-8"),
-                key_serializer=lambda k: k.encode("utf-8") if k else None,
-                acks="all",
-                retries=5,
-            )
+            if changelog:
+                p = make_changelog_producer(BOOTSTRAP, **overrides)
+            else:
+                p = KafkaProducer(
+                    bootstrap_servers=BOOTSTRAP,
+                    value_serializer=None if raw else EventSerializer(),  # JSON для выходных топиков, если не задано иное
+                    key_serializer=lambda k: k.encode("utf-8") if k else None,
+                    acks="all",
+                    retries=5,
+                    **overrides,
+                )
             logger.info("Producer connected")
             return p
         except Exception as e:
@@ -71,16 +121,20 @@ def make_producer():
             time.sleep(5)
 
 
-def make_consumer(group_id, *topics):
+def make_consumer(group_id, *topics, raw=False, auto_commit=True):
+    """
+    raw=True — value остаётся bytes (для PartialDecoder), без полного декодирования.
+    Без topics consumer возвращается неподписанным (subscribe со своим listener).
+    """
     while True:
         try:
             c = KafkaConsumer(
                 *topics,
                 bootstrap_servers=BOOTSTRAP,
                 group_id=group_id,
-                enable_auto_commit=True,
+                enable_auto_commit=auto_commit,
                 auto_offset_reset="earliest",
-                value_deserializer=lambda v: json.loads(v.decode("utf-8")),
+                value_deserializer=None if raw else EventDeserializer(),  # формат определяется по первому байту
                 key_deserializer=lambda k: k.decode("utf-8") if k else None,
                 session_timeout_ms=30000,
                 request_timeout_ms=40000,
@@ -92,18 +146,270 @@ def make_consumer(group_id, *topics):
             time.sleep(5)
 
 
-# ─── 1. ТРАНСФОРМАЦИЯ + АГРЕГАЦИЯ + ОКОННОЕ ВЫЧИСЛЕНИЕ ───────────────────────
-def run_views_stream():
+# ─── Топики ───────────────────────────────────────────────────────────────────
+def ensure_topic(topic, partitions=STREAM_PARTITIONS):
+    """Создаёт топик, если его ещё нет. Возвращает фактическое число партиций."""
+    while True:
+        try:
+            admin = KafkaAdminClient(bootstrap_servers=BOOTSTRAP)
+            break
+        except KafkaError as e:
+            logger.warning(f"Admin connect failed: {e}, retrying in 5s...")
+            time.sleep(5)
+    try:
+        try:
+            admin.create_topics([NewTopic(topic, partitions, 1)])
+            logger.info(f"Created topic {topic} with {partitions} partitions")
+        except TopicAlreadyExistsError:
+            pass
+        (meta,) = admin.describe_topics([topic])
+        return len(meta["partitions"])
+    finally:
+        admin.close()
+
+
+# ─── 0. REPARTITION ПО article_id ─────────────────────────────────────────────
+# Ключ берём из заголовка entityId (или сканом JSON) — событие не разбираем
+ARTICLE_KEY = PartialDecoder({"entityId": str})
+
+
+def run_repartition_worker(group_id, source_topic, target_topic):
     """
-    Читает news.views.events.
+    source_topic (ключ user_id) → target_topic (ключ article_id).
+    value, заголовки и timestamp переносятся без изменений — ни декодирования,
+    ни повторной сериализации. Оффсеты коммитятся после flush каждого
+    poll-батча (at-least-once).
+    """
+    producer = make_producer(
+        raw=True,
+        linger_ms=REPARTITION_LINGER_MS,
+        batch_size=REPARTITION_BATCH_SIZE,
+        compression_type=REPARTITION_COMPRESSION,
+    )
+    consumer = make_consumer(group_id, source_topic, raw=True, auto_commit=False)
+
+    forwarded = 0
+    next_stats = time.monotonic() + STATS_INTERVAL_S
+    while True:
+        batch = consumer.poll(timeout_ms=500)
+        for msgs in batch.values():
+            for msg in msgs:
+                try:
+                    article_id = ARTICLE_KEY.extract(msg.topic, msg.value, msg.headers)["entityId"]
+                except Exception as exc:
+                    logger.error(f"[REPARTITION] {source_topic}@{msg.offset}: {exc}")
+                    article_id = None
+                producer.send(
+                    target_topic,
+                    key=article_id or "unknown",
+                    value=msg.value,
+                    headers=msg.headers,
+                    timestamp_ms=msg.timestamp,
+                )
+                forwarded += 1
+        if batch:
+            producer.flush()
+            consumer.commit()
+        if time.monotonic() >= next_stats:
+            logger.info(f"[REPARTITION] {source_topic} → {target_topic}: forwarded={forwarded}")
+            next_stats = time.monotonic() + STATS_INTERVAL_S
+
+
+# ─── Задачи (одна на входную партицию) ───────────────────────────────────────
+def open_state_store(name, changelog_topic, partition):
+    """Открывает локальную базу партиции и догоняет её по changelog."""
+    store = PersistentKVStore(f"{name}-{partition}", changelog_topic, changelog_partition=partition)
+    try:
+        store.restore(BOOTSTRAP)
+    except Exception:
+        store.close()
+        raise
+    return store
+
+
+class StreamTask:
+    """
+    Обработка одной входной партиции. Состоянием владеет только задача, оффсет
+    партиции коммитится только вместе с ним (checkpoint).
+    """
+
+    def __init__(self, tp, store, producer, changelog_producer):
+        self.tp       = tp
+        self.store    = store
+        self.producer = producer               # выходные топики
+        self.changelog_producer = changelog_producer
+        self.position = None   # следующий оффсет после последнего обработанного
+
+    def process(self, msg):
+        raise NotImplementedError
+
+    def before_checkpoint(self):
+        """Выходные записи, которые должны уйти до коммита оффсетов."""
+
+    def checkpoint(self) -> dict:
+        self.before_checkpoint()
+        offsets = {self.tp: self.position} if self.position is not None else {}
+        return self.store.checkpoint(self.changelog_producer, offsets)
+
+    def stats(self) -> str:
+        return ""
+
+    def close(self):
+        self.store.close()
+
+
+class TaskManager(ConsumerRebalanceListener):
+    """
+    Держит задачи для назначенных consumer'у партиций. Rebalance:
+      - revoke: checkpoint всех задач и коммит — состояние в changelog до
+        того, как партиция уйдёт другому воркеру;
+      - assign: закрывает задачи отданных партиций, открывает (restore) задачи
+        новых, перематывает все назначенные на оффсеты из их хранилищ.
+    Партиция, для которой restore упал, стоит на паузе (без задачи её записи
+    не читаются) и открывается повторно через RESTORE_RETRY_S из poll-цикла.
+    """
+
+    def __init__(self, consumer, producer, changelog_producer, store_name, changelog_topic, task_cls):
+        self.consumer        = consumer
+        self.producer        = producer
+        self.changelog_producer = changelog_producer
+        self.store_name      = store_name
+        self.changelog_topic = changelog_topic
+        self.task_cls        = task_cls
+        self.tasks           = {}   # TopicPartition -> StreamTask
+        self.pending         = {}   # TopicPartition -> время следующей попытки restore
+
+    def process(self, tp, msgs):
+        task = self.tasks.get(tp)
+        if task is None:
+            # Задачи нет (restore упал) — вернуть позицию, записи прочитаем после restore
+            self.consumer.seek(tp, msgs[0].offset)
+            self.consumer.pause(tp)
+            return
+        for msg in msgs:
+            task.process(msg)
+        task.position = msgs[-1].offset + 1
+
+    def checkpoint(self, force=False):
+        offsets = {}
+        for task in self.tasks.values():
+            if force or task.store.checkpoint_due():
+                offsets.update(task.checkpoint())
+        if offsets:
+            self.consumer.commit(offsets)
+
+    def on_partitions_revoked(self, revoked):
+        try:
+            self.checkpoint(force=True)
+        except Exception as exc:
+            logger.error(f"[STATE] {self.store_name}: checkpoint on revoke failed: {exc}")
+
+    def open_task(self, tp) -> bool:
+        try:
+            store = open_state_store(self.store_name, self.changelog_topic, tp.partition)
+            self.tasks[tp] = self.task_cls(tp, store, self.producer, self.changelog_producer)
+        except Exception as exc:
+            logger.error(
+                f"[STATE] {self.store_name}: restore of partition {tp.partition} failed: {exc}, "
+                f"retrying in {RESTORE_RETRY_S}s"
+            )
+            self.pending[tp] = time.monotonic() + RESTORE_RETRY_S
+            self.consumer.pause(tp)
+            return False
+        self.pending.pop(tp, None)
+        return True
+
+    def seek_to_stored(self, tp):
+        stored = self.tasks[tp].store.input_offsets().get(tp)
+        if stored is not None:
+            self.consumer.seek(tp, stored)
+
+    def on_partitions_assigned(self, assigned):
+        assigned = set(assigned)
+        for tp in set(self.tasks) - assigned:
+            self.tasks.pop(tp).close()
+        self.pending = {tp: due for tp, due in self.pending.items() if tp in assigned}
+        for tp in assigned - set(self.tasks):
+            self.open_task(tp)
+        for tp in self.tasks:
+            self.seek_to_stored(tp)
+        logger.info(
+            f"[STATE] {self.store_name}: tasks {sorted(tp.partition for tp in self.tasks)}"
+            f" paused {sorted(tp.partition for tp in self.pending)}"
+        )
+
+    def retry_pending(self):
+        """Повторный restore партиций на паузе; удачные перематываются и снимаются с паузы."""
+        now = time.monotonic()
+        for tp in [tp for tp, due in self.pending.items() if due <= now]:
+            if self.open_task(tp):
+                self.seek_to_stored(tp)
+                self.consumer.resume(tp)
+                logger.info(f"[STATE] {self.store_name}: partition {tp.partition} restored, resumed")
+
+    def log_stats(self):
+        # По последнему checkpoint каждой задачи, read-only соединением
+        tracked, top = 0, []
+        for task in self.tasks.values():
+            count, task_top = task.store.summary(top=3)
+            tracked += count
+            top += task_top
+        top = sorted(top, key=lambda kv: kv[1], reverse=True)[:3]
+        extra = " ".join(s for s in (t.stats() for t in self.tasks.values()) if s)
+        logger.info(
+            f"[STATE] {self.store_name}: partitions={sorted(tp.partition for tp in self.tasks)} "
+            f"tracked_keys={tracked} top3={top} {extra}".rstrip()
+        )
+
+
+def run_stream_worker(group_id, topic, store_name, changelog_topic, task_cls, raw=False):
+    """poll-цикл одного воркера: сообщения → задачи партиций, checkpoint по интервалу."""
+    producer = make_producer()
+    changelog_producer = make_producer(changelog=True)
+    consumer = make_consumer(group_id, raw=raw, auto_commit=False)
+    manager  = TaskManager(consumer, producer, changelog_producer, store_name, changelog_topic, task_cls)
+    consumer.subscribe([topic], listener=manager)
+
+    next_stats = time.monotonic() + STATS_INTERVAL_S
+    while True:
+        for tp, msgs in consumer.poll(timeout_ms=500).items():
+            manager.process(tp, msgs)
+        manager.checkpoint()
+        manager.retry_pending()
+        if time.monotonic() >= next_stats:
+            manager.log_stats()
+            next_stats = time.monotonic() + STATS_INTERVAL_S
+
+
+# ─── 1. ТРАНСФОРМАЦИЯ + АГРЕГАЦИЯ ────────────────────────────────────────────
+class ViewsTask(StreamTask):
+    """
+    Партиция REPARTITION_VIEWS (news.views.events с ключом article_id).
     - Трансформация: добавляет categoryLabel и engagementScore → news.enriched.views
     - Агрегация: считает суммарные просмотры по статье → news.stats.article-views
-    - Окно: считает просмотры по категории за 1 мин → news.stats.category-windows
+      (с AGG_SUPPRESS — только последнее значение по статье за интервал коммита)
+    - Для окон: categoryId и event time → REPARTITION_CATEGORY (ключ categoryId),
+      окна считает WindowsTask
     """
-    producer = make_producer()
-    consumer = make_consumer("streams-views-group", TOPIC_VIEWS)
 
-    for msg in consumer:
+    def __init__(self, tp, store, producer, changelog_producer):
+        super().__init__(tp, store, producer, changelog_producer)
+        self.agg_buffer = SuppressionBuffer(self.send_agg, AGG_SUPPRESS_MAX_KEYS) if AGG_SUPPRESS else None
+
+    def send_agg(self, article_id, agg_result):
+        self.producer.send(TOPIC_AGG, key=article_id, value=agg_result)
+
+    def before_checkpoint(self):
+        if self.agg_buffer and self.agg_buffer.pending:
+            drained = self.agg_buffer.drain()
+            logger.debug(
+                f"[AGG] p{self.tp.partition}: emitted {drained} coalesced updates "
+                f"(x{self.agg_buffer.ratio:.1f} reduction)"
+            )
+        # Записи для окон должны быть в Kafka до коммита входных оффсетов
+        self.producer.flush()
+
+    def process(self, msg):
         try:
             event   = msg.value
             payload = event.get("payload", {})
@@ -122,77 +428,157 @@ def run_views_stream():
                 "engagementScore": engagement,
                 "processedAt":     datetime.now(timezone.utc).isoformat(),
             }
-            producer.send(TOPIC_ENRICHED, key=article_id, value=enriched)
+            self.producer.send(TOPIC_ENRICHED, key=article_id, value=enriched)
 
             # ── 2. АГРЕГАЦИЯ (running total) ──────────────────────────────────
-            with state_lock:
-                article_view_counts[article_id] += 1
-                total = article_view_counts[article_id]
+            total = self.store.increment(article_id)
 
             agg_result = {
                 "articleId":  article_id,
                 "totalViews": total,
                 "updatedAt":  datetime.now(timezone.utc).isoformat(),
             }
-            producer.send(TOPIC_AGG, key=article_id, value=agg_result)
+            if self.agg_buffer:
+                self.agg_buffer.update(article_id, agg_result)
+            else:
+                self.send_agg(article_id, agg_result)
 
             if total % 50 == 0:
                 logger.info(f"[AGG] article={article_id} total_views={total}")
 
-            # ── 3. ОКОННОЕ ВЫЧИСЛЕНИЕ (1-min tumbling window) ─────────────────
-            now_ts = time.time()
-            cat_key = str(cat_id)
-            with state_lock:
-                # Убираем метки старше 1 минуты
-                window_timestamps[cat_key] = [
-                    t for t in window_timestamps[cat_key]
-                    if now_ts - t < WINDOW_SECONDS
-                ]
-                window_timestamps[cat_key].append(now_ts)
-                window_count = len(window_timestamps[cat_key])
-
-            window_result = {
-                "categoryId":   cat_id,
-                "categoryName": cat_label,
-                "windowCount":  window_count,
-                "windowType":   "tumbling-1min",
-                "windowEnd":    datetime.now(timezone.utc).isoformat(),
-            }
-            producer.send(TOPIC_WINDOW, key=cat_key, value=window_result)
+            # ── 3. REPARTITION ДЛЯ ОКОН (ключ categoryId) ─────────────────────
+            event_ts = event.get("timestamp") or msg.timestamp
+            self.producer.send(
+                REPARTITION_CATEGORY, key=str(cat_id),
+                value={"categoryId": cat_id, "timestamp": event_ts},
+                timestamp_ms=event_ts,
+            )
 
             logger.debug(
-                f"[STREAMS] article={article_id} cat={cat_label} "
-                f"total_views={total} window_count={window_count}"
+                f"[STREAMS] article={article_id} cat={cat_label} total_views={total}"
             )
 
         except Exception as exc:
             logger.error(f"[STREAMS] Error processing message: {exc}", exc_info=True)
 
 
+def _iso_ms(ms: int) -> str:
+    return datetime.fromtimestamp(ms / 1000, tz=timezone.utc).isoformat()
+
+
+def run_views_stream():
+    run_stream_worker(
+        "streams-views-group", REPARTITION_VIEWS,
+        "article-view-counts", CHANGELOG_VIEWS, ViewsTask,
+    )
+
+
 # ─── 2. АГРЕГАЦИЯ ЛАЙКОВ ─────────────────────────────────────────────────────
-def run_reactions_stream():
-    """Читает news.reactions.events, агрегирует лайки по статье."""
-    consumer = make_consumer("streams-reactions-group", TOPIC_REACTIONS)
-    for msg in consumer:
+class ReactionsTask(StreamTask):
+    """Партиция REPARTITION_LIKES, агрегирует лайки по статье."""
+
+    def process(self, msg):
         try:
-            event      = msg.value
-            article_id = str(event.get("entityId", "unknown"))
-            with state_lock:
-                article_like_counts[article_id] += 1
-                total_likes = article_like_counts[article_id]
+            # После repartition ключ и есть article_id — value не разбираем
+            article_id = msg.key or "unknown"
+            total_likes = self.store.increment(article_id)
             logger.info(f"[LIKES] article={article_id} total_likes={total_likes}")
         except Exception as exc:
             logger.error(f"[LIKES] Error: {exc}", exc_info=True)
 
 
-# ─── Периодический лог состояния ─────────────────────────────────────────────
-def run_stats_logger():
-    while True:
-        time.sleep(30)
-        with state_lock:
-            total_articles = len(article_view_counts)
-            top = sorted(article_view_counts.items(), key=lambda x: x[1], reverse=True)[:3]
-        logger.info(f"[STATE] tracked_articles={total_articles} top3={top}")
+def run_reactions_stream():
+    run_stream_worker(
+        "streams-reactions-group", REPARTITION_LIKES,
+        "article-like-counts", CHANGELOG_LIKES, ReactionsTask, raw=True,
+    )
+
+
+# ─── 3. ОКОННОЕ ВЫЧИСЛЕНИЕ ПО КАТЕГОРИЯМ ─────────────────────────────────────
+WINDOW_KEY_PREFIX = "window|"          # window|<window_start>|<categoryId> -> count
+STREAM_TIME_KEY   = "__stream_time__"
+
+
+def _window_store_key(start, key):
+    return f"{WINDOW_KEY_PREFIX}{start}|{key}"
+
+
+class WindowsTask(StreamTask):
+    """
+    Партиция REPARTITION_CATEGORY (ключ categoryId): все просмотры категории
+    в одной задаче, поэтому в news.stats.category-windows уходит ровно одна
+    итоговая запись на закрытое окно.
+    Открытые окна и stream time пишутся в store перед каждым checkpoint
+    (закрытые — удаляются), т.е. вместе с входным оффсетом: после ребаланса
+    или рестарта задача продолжает с тех же окон. Окна, закрытые после
+    последнего checkpoint, при повторе выпускаются ещё раз с тем же значением.
+    """
+
+    def __init__(self, tp, store, producer, changelog_producer):
+        super().__init__(tp, store, producer, changelog_producer)
+        self.windows = WindowedCounter(
+            WINDOW_SIZE_S * 1000, WINDOW_ADVANCE_S * 1000, WINDOW_GRACE_S * 1000,
+        )
+        saved = []
+        for store_key, count in store.items(WINDOW_KEY_PREFIX).items():
+            start, key = store_key[len(WINDOW_KEY_PREFIX):].split("|", 1)
+            saved.append((int(start), key, count))
+        self.windows.load(store.get(STREAM_TIME_KEY, -1), saved)
+        self.closed = []   # ключи store окон, закрытых после последнего checkpoint
+
+    def process(self, msg):
+        try:
+            cat_key  = msg.key or str(msg.value.get("categoryId", 0))
+            event_ts = msg.value.get("timestamp") or msg.timestamp
+            if not self.windows.add(cat_key, event_ts):
+                logger.debug(f"[WINDOW] late event dropped: cat={cat_key} ts={event_ts}")
+            for window in self.windows.close_expired():
+                self.emit_window(window)
+                self.closed.append(_window_store_key(window.start, window.key))
+        except Exception as exc:
+            logger.error(f"[WINDOW] Error processing message: {exc}", exc_info=True)
+
+    def before_checkpoint(self):
+        for store_key in self.closed:
+            self.store.delete(store_key)
+        self.closed.clear()
+        # В changelog уходят только изменившиеся окна
+        for start, key, count in self.windows.open_windows():
+            store_key = _window_store_key(start, key)
+            if self.store.get(store_key, None) != count:
+                self.store.put(store_key, count)
+        if self.store.get(STREAM_TIME_KEY, None) != self.windows.stream_time:
+            self.store.put(STREAM_TIME_KEY, self.windows.stream_time)
+        self.producer.flush()
+
+    def emit_window(self, window):
+        cat_id = int(window.key)
+        window_result = {
+            "categoryId":   cat_id,
+            "categoryName": CATEGORY_LABELS.get(cat_id, "unknown"),
+            "windowCount":  window.count,
+            "windowType":   self.windows.window_type,
+            "windowStart":  _iso_ms(window.start),
+            "windowEnd":    _iso_ms(window.end),
+        }
+        self.producer.send(TOPIC_WINDOW, key=window.key, value=window_result)
+        logger.info(
+            f"[WINDOW] cat={window_result['categoryName']} "
+            f"[{window_result['windowStart']} .. {window_result['windowEnd']}) count={window.count}"
+        )
+
+    def stats(self):
+        return (
+            f"p{self.tp.partition}:open_windows={self.windows.open_window_count()}"
+            f",late_dropped={self.windows.dropped_late}"
+        )
+
+
+def run_windows_stream():
+    run_stream_worker(
+        "streams-windows-group", REPARTITION_CATEGORY,
+        "category-window-counts", CHANGELOG_WINDOWS, WindowsTask,
+    )
 
 
 if __name__ == "__main__":
@@ -201,15 +587,48 @@ if __name__ == "__main__":
     # Подождём пока Kafka поднимется
     time.sleep(10)
 
-    threads = [
-        threading.Thread(target=run_views_stream,     daemon=True, name="views-stream"),
-        threading.Thread(target=run_reactions_stream, daemon=True, name="reactions-stream"),
-        threading.Thread(target=run_stats_logger,     daemon=True, name="stats-logger"),
+    # Число партиций входного топика ограничивает только repartition-воркеры;
+    # агрегация масштабируется по партициям внутреннего топика
+    sources, partitions = {}, {}
+    for source, internal, changelog in (
+        (TOPIC_VIEWS,     REPARTITION_VIEWS, CHANGELOG_VIEWS),
+        (TOPIC_REACTIONS, REPARTITION_LIKES, CHANGELOG_LIKES),
+    ):
+        sources[source] = ensure_topic(source)
+        partitions[internal] = ensure_topic(internal)
+        ensure_changelog_topic(BOOTSTRAP, changelog, partitions[internal])
+    partitions[REPARTITION_CATEGORY] = ensure_topic(REPARTITION_CATEGORY)
+    ensure_changelog_topic(BOOTSTRAP, CHANGELOG_WINDOWS, partitions[REPARTITION_CATEGORY])
+
+    # Воркеров больше, чем партиций, держать незачем — лишние простаивают
+    streams = [
+        (partial(run_repartition_worker, "streams-views-repartition-group",
+                 TOPIC_VIEWS, REPARTITION_VIEWS),
+         "views-repartition", min(STREAM_WORKERS, sources[TOPIC_VIEWS])),
+        (partial(run_repartition_worker, "streams-reactions-repartition-group",
+                 TOPIC_REACTIONS, REPARTITION_LIKES),
+         "reactions-repartition", min(STREAM_WORKERS, sources[TOPIC_REACTIONS])),
+        (run_views_stream,     "views",     min(STREAM_WORKERS, partitions[REPARTITION_VIEWS])),
+        (run_windows_stream,   "windows",   min(STREAM_WORKERS, partitions[REPARTITION_CATEGORY])),
+        (run_reactions_stream, "reactions", min(STREAM_WORKERS, partitions[REPARTITION_LIKES])),
     ]
-    for t in threads:
-        t.start()
-        logger.info(f"Started thread: {t.name}")
+    workers = {}
+    for target, name, count in streams:
+        for i in range(count):
+            workers[f"{name}-worker-{i}"] = target
+
+    def start(name):
+        proc = multiprocessing.Process(target=workers[name], name=name, daemon=True)
+        proc.start()
+        logger.info(f"Started worker: {name} (pid={proc.pid})")
+        return proc
 
-    # Держим главный поток живым
-    for t in threads:
-        t.join()
\ No newline at end of file
+    procs = {name: start(name) for name in workers}
+
+    # Упавший воркер перезапускаем — его партиции пока обработают остальные
+    while True:
+        time.sleep(5)
+        for name, proc in procs.items():
+            if not proc.is_alive():
+                logger.warning(f"Worker {name} exited with code {proc.exitcode}, restarting")
+                procs[name] = start(name)
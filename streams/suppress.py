@@ -0,0 +1,48 @@
+"""
+Suppression (coalescing) буфер для KTable-обновлений.
+
+Вместо отправки агрегата на каждое входное событие держим только последнее
+значение по ключу и выпускаем его:
+  - при drain() — streams_app вызывает его перед каждым checkpoint,
+    т.е. раз в COMMIT_INTERVAL_S, до коммита оффсетов;
+  - при переполнении — ключ, который дольше всех не обновлялся, выпускается
+    сразу, поэтому память ограничена max_keys.
+"""
+
+from collections import OrderedDict
+
+
+class SuppressionBuffer:
+
+    def __init__(self, emit, max_keys: int):
+        """emit(key, value) — отправка одной записи (обычно producer.send)."""
+        self.emit     = emit
+        self.max_keys = max_keys
+        self.pending  = OrderedDict()   # key -> последнее значение
+        self.emitted  = 0               # выпущено записей за всё время
+        self.received = 0               # принято обновлений за всё время
+
+    def update(self, key, value):
+        self.pending[key] = value
+        self.pending.move_to_end(key)
+        self.received += 1
+        if len(self.pending) > self.max_keys:
+            oldest_key, oldest_value = self.pending.popitem(last=False)
+            self._emit(oldest_key, oldest_value)
+
+    def drain(self) -> int:
+        """Выпускает все накопленные значения; возвращает их число."""
+        count = len(self.pending)
+        for key, value in self.pending.items():
+            self._emit(key, value)
+        self.pending.clear()
+        return count
+
+    def _emit(self, key, value):
+        self.emit(key, value)
+        self.emitted += 1
+
+    @property
+    def ratio(self) -> float:
+        """Во сколько раз уменьшен поток записей."""
+        return self.received / self.emitted if self.emitted else 0.0
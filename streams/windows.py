@@ -0,0 +1,102 @@
+"""
+Оконные агрегаты по event time (поле timestamp события, мс).
+
+WindowedCounter — хранилище (key, window_start) -> count:
+  - tumbling: size == advance, каждое событие попадает ровно в одно окно;
+  - hopping:  advance < size, событие попадает в size/advance окон;
+  - инкремент O(1) на окно, память — только открытые окна;
+  - stream time = максимальный виденный timestamp; окно закрывается, когда
+    stream time >= window_end + grace (allowed lateness);
+  - события, пришедшие после закрытия своего окна, отбрасываются и считаются
+    в dropped_late;
+  - close_expired() возвращает каждое закрытое окно ровно один раз;
+  - open_windows() / load() — снимок открытых окон для внешнего хранилища
+    (streams_app сохраняет его в PersistentKVStore при checkpoint).
+"""
+
+import heapq
+from collections import defaultdict, namedtuple
+
+# start — мс включительно, end — мс исключительно
+ClosedWindow = namedtuple("ClosedWindow", ["key", "start", "end", "count"])
+
+
+class WindowedCounter:
+
+    def __init__(self, size_ms: int, advance_ms: int | None = None, grace_ms: int = 0):
+        advance_ms = advance_ms or size_ms
+        if advance_ms <= 0 or advance_ms > size_ms or size_ms % advance_ms:
+            raise ValueError("advance_ms must divide size_ms and be in (0, size_ms]")
+        self.size_ms    = size_ms
+        self.advance_ms = advance_ms
+        self.grace_ms   = grace_ms
+        self.windows    = {}    # window_start -> {key: count}
+        self._starts    = []    # min-heap открытых window_start
+        self.stream_time  = -1
+        self.dropped_late = 0
+
+    @property
+    def window_type(self) -> str:
+        kind = "tumbling" if self.advance_ms == self.size_ms else "hopping"
+        label = f"{kind}-{_fmt_ms(self.size_ms)}"
+        if kind == "hopping":
+            label += f"-every-{_fmt_ms(self.advance_ms)}"
+        return label
+
+    def add(self, key: str, timestamp_ms: int, amount: int = 1) -> bool:
+        """Учесть событие. False — событие опоздало больше чем на grace и отброшено."""
+        if timestamp_ms > self.stream_time:
+            self.stream_time = timestamp_ms
+
+        # Последнее окно, содержащее timestamp, и далее назад с шагом advance
+        last_start = timestamp_ms - timestamp_ms % self.advance_ms
+        first_start = last_start - self.size_ms + self.advance_ms
+        accepted = False
+        for start in range(max(first_start, 0), last_start + 1, self.advance_ms):
+            if start + self.size_ms + self.grace_ms <= self.stream_time:
+                continue    # окно уже закрыто
+            counts = self.windows.get(start)
+            if counts is None:
+                counts = self.windows[start] = defaultdict(int)
+                heapq.heappush(self._starts, start)
+            counts[key] += amount
+            accepted = True
+
+        if not accepted:
+            self.dropped_late += 1
+        return accepted
+
+    def close_expired(self) -> list:
+        """Окна, у которых end + grace <= stream time, в порядке window_start."""
+        closed = []
+        horizon = self.stream_time - self.size_ms - self.grace_ms
+        while self._starts and self._starts[0] <= horizon:
+            start = heapq.heappop(self._starts)
+            for key, count in self.windows.pop(start).items():
+                closed.append(ClosedWindow(key, start, start + self.size_ms, count))
+        return closed
+
+    def open_window_count(self) -> int:
+        return len(self.windows)
+
+    def open_windows(self) -> list:
+        """[(window_start, key, count)] открытых окон."""
+        return [(start, key, count) for start, counts in self.windows.items() for key, count in counts.items()]
+
+    def load(self, stream_time: int, counts):
+        """Восстановить состояние из снимка open_windows() и stream time."""
+        self.stream_time = max(self.stream_time, stream_time)
+        for start, key, count in counts:
+            window = self.windows.get(start)
+            if window is None:
+                window = self.windows[start] = defaultdict(int)
+                heapq.heappush(self._starts, start)
+            window[key] += count
+
+
+def _fmt_ms(ms: int) -> str:
+    if ms % 60_000 == 0:
+        return f"{ms // 60_000}min"
+    if ms % 1000 == 0:
+        return f"{ms // 1000}s"
+    return f"{ms}ms"
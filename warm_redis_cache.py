@@ -0,0 +1,83 @@
+"""
+Redis cache warm-up from the PostgreSQL news table.
+
+    python warm_redis_cache.py [--batch-size 5000] [--fetch-size 20000] [--top 100000]
+
+Reads articles with a server-side (named) cursor, so memory stays bounded by
+one fetch, and writes them with common.redis_cache.ArticleCacheWriter: one
+pipeline round-trip per batch, top_articles filled by multi-member ZADD.
+Same key layout as seed_redis.py (--layout / ARTICLE_LAYOUT: json or bucketed).
+
+views/likes counters and top_articles scores are only created where missing:
+redis-counters-group keeps incrementing them and PostgreSQL lags behind.
+--overwrite-counters resets them to the PostgreSQL values; run it only with
+redis-counters-group stopped (its offsets:redis-counters-group stay as is).
+"""
+
+import argparse
+import time
+
+from common.article_cache import ARTICLE_SQL, article_from_row
+from common.postgres import connect
+from common.redis_cache import (ARTICLE_LAYOUT, ARTICLE_TTL_S, TOP_ARTICLES, ArticleCacheWriter, connect_redis,
+                                make_layout)
+
+
+def iter_articles(conn, fetch_size, top=None):
+    """Article dicts from news; top: only the N most viewed, hottest first."""
+    query, params = ARTICLE_SQL, ()
+    if top:
+        query += "ORDER BY n.views_count DESC LIMIT %s"
+        params = (top,)
+    with conn.cursor(name="warm_redis_cache") as cur:
+        cur.itersize = fetch_size
+        cur.execute(query, params)
+        for row in cur:
+            yield article_from_row(row)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=5000, help="articles per Redis pipeline")
+    parser.add_argument("--fetch-size", type=int, default=20000, help="rows per server-side cursor fetch")
+    parser.add_argument("--top", type=int, default=None, help="warm only the N most viewed articles")
+    parser.add_argument("--ttl", type=int, default=ARTICLE_TTL_S, help="TTL of article:{id}, seconds (json layout)")
+    parser.add_argument("--layout", choices=("json", "bucketed"), default=ARTICLE_LAYOUT,
+                        help="json: key per article; bucketed: Avro records in small hashes")
+    parser.add_argument("--no-counters", action="store_true", help="skip article:{id}:views counters")
+    parser.add_argument("--overwrite-counters", action="store_true",
+                        help="replace existing counters and top_articles scores (stop redis-counters-group first)")
+    parser.add_argument("--reset-top", action="store_true", help=f"delete {TOP_ARTICLES} before warming")
+    parser.add_argument("--report-every", type=int, default=100_000, help="progress line every N articles")
+    args = parser.parse_args()
+    if args.batch_size < 1 or args.fetch_size < 1:
+        parser.error("--batch-size and --fetch-size must be >= 1")
+
+    client = connect_redis()
+    if args.reset_top:
+        client.delete(TOP_ARTICLES)
+
+    conn = connect()
+    started = time.monotonic()
+    try:
+        with ArticleCacheWriter(client, args.batch_size, args.ttl, counters=not args.no_counters,
+                                layout=make_layout(args.layout),
+                                overwrite_counters=args.overwrite_counters) as writer:
+            next_report = args.report_every
+            for article in iter_articles(conn, args.fetch_size, args.top):
+                writer.add(article)
+                if writer.written >= next_report:
+                    print(f"Progress: {writer.written:,} articles ({writer.rate:,.0f}/s)")
+                    next_report += args.report_every
+    finally:
+        conn.close()
+
+    elapsed = time.monotonic() - started
+    print(f"\nWarmed {writer.written:,} articles in {elapsed:.1f}s "
+          f"({writer.written / max(elapsed, 1e-9):,.0f} articles/s, "
+          f"{writer.commands / max(elapsed, 1e-9):,.0f} commands/s, {writer.round_trips:,} round-trips)")
+    print(f"{TOP_ARTICLES}: {client.zcard(TOP_ARTICLES):,} members")
+
+
+if __name__ == "__main__":
+    main()